@@ -0,0 +1,159 @@
+"""
+Switching Activity
+
+This module counts what the simulation of a circuit board does: how often
+every component is updated, how often its output toggles between FALSE and
+TRUE, and how many components are updated per tick, where a tick is one
+iteration of CircuitBoard.settle, one call of CircuitBoard.update or one
+call of CircuitBoard.solve. This shows where simulation time goes, and the
+number of toggles is a simple estimate of the dynamic power of a circuit.
+
+Counting is opt-in. A profiler is attached to a board with
+
+    profiler = ActivityProfiler(board)
+
+and counts until it is stopped. The board hands whole ticks to the profiler,
+so a board without one only checks that it has none once per tick.
+"""
+from logic_circuit import Input
+
+
+class ActivityProfiler:
+
+    """
+    Counts the updates and toggles of the components of a circuit board.
+
+    evaluations and toggles map components to their counts and ticks holds
+    the number of updates of every tick. An output only toggles if it changes
+    from FALSE to TRUE or back, so settling a board for the first time, when
+    the outputs are still None, does not count. Inputs are set from outside
+    of the simulation and are never counted.
+
+    The profiler can be used in a with statement, it stops at the end.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.evaluations = {}
+        self.toggles = {}
+        self.ticks = []
+        # The last output of every component the profiler has seen
+        self._outputs = {c: c.output for c in board}
+        self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        self.board.profiler = self
+
+    def stop(self):
+        if self.board.profiler is self:
+            self.board.profiler = None
+
+    def reset(self):
+        """
+        Forgets all counts.
+        """
+        self.evaluations = {}
+        self.toggles = {}
+        self.ticks = []
+        self._outputs = {c: c.output for c in self.board}
+
+    def tick(self, updated, changed):
+        """
+        Records a tick, called by the board.
+
+        updated are the components that were updated, once for every update,
+        and changed includes every component whose output might have changed.
+        """
+        self.ticks.append(len(updated))
+        evaluations = self.evaluations
+        for c in updated:
+            evaluations[c] = evaluations.get(c, 0) + 1
+        toggles = self.toggles
+        outputs = self._outputs
+        for c in changed:
+            output = c.output
+            last = outputs.get(c)
+            if output is not None and last is not None and output != last:
+                toggles[c] = toggles.get(c, 0) + 1
+            outputs[c] = output
+
+    @property
+    def total_evaluations(self):
+        return sum(self.ticks)
+
+    @property
+    def total_toggles(self):
+        return sum(self.toggles.values())
+
+    def report(self, top=None):
+        """
+        Returns (component, evaluations, toggles) for the components that were
+        updated, the ones that toggled most first, then the ones that were
+        updated most.
+
+        top limits the number of components that are returned.
+        """
+        rows = [(c, n, self.toggles.get(c, 0))
+                for c, n in self.evaluations.items()]
+        rows.sort(key=lambda row: (row[2], row[1]), reverse=True)
+        return rows[:top]
+
+    def idle_cones(self):
+        """
+        Returns the groups of connected components of the board whose outputs
+        never toggled, the largest group first.
+
+        Components that never toggle do not need to be simulated for the
+        vectors that were simulated, large idle cones are the parts of a board
+        that the vectors do not exercise.
+        """
+        idle = [c for c in self.board if not self.toggles.get(c) and
+                not isinstance(c, Input)]
+        # Union find over the connections between idle components
+        parents = {c: c for c in idle}
+
+        def find(c):
+            while parents[c] is not c:
+                parents[c] = parents[parents[c]]
+                c = parents[c]
+            return c
+
+        for c in idle:
+            for driver in c.inputs.values():
+                if driver in parents:
+                    parents[find(driver)] = find(c)
+        groups = {}
+        for c in idle:
+            groups.setdefault(find(c), []).append(c)
+        cones = [tuple(group) for group in groups.values()]
+        cones.sort(key=len, reverse=True)
+        return cones
+
+    def format_report(self, top=10, names={}):
+        """
+        Returns the report as text, with the totals and the top components.
+
+        names maps components to their names, other components are named after
+        their class and their position on the board, like Gate12.
+        """
+        positions = {c: i for i, c in enumerate(self.board)}
+        lines = ["{} ticks, {} evaluations, {} toggles".format(
+            len(self.ticks), self.total_evaluations, self.total_toggles)]
+        lines.append("{:>11}  {:>7}  component".format("evaluations",
+                                                      "toggles"))
+        for c, evaluations, toggles in self.report(top):
+            name = names.get(c, "{}{}".format(c.__class__.__name__,
+                                              positions.get(c, "")))
+            lines.append("{:>11}  {:>7}  {}".format(evaluations, toggles,
+                                                   name))
+        cones = self.idle_cones()
+        if cones:
+            lines.append("{} idle cones, the largest has {} components"
+                         .format(len(cones), len(cones[0])))
+        return "\n".join(lines)
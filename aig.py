@@ -0,0 +1,513 @@
+"""
+And-Inverter Graphs
+
+An and-inverter graph (AIG) is a logic circuit made only of two input AND
+nodes whose inputs and outputs can be complemented. Every function can be
+written like this and complementing an edge is free, so it is the most
+compact general representation of a circuit and a simple one to optimise.
+
+Nodes are numbered from 0, node 0 is the constant FALSE. A literal is an edge
+to a node, 2 * node if it is not complemented and 2 * node + 1 if it is, so
+literal 0 is FALSE, literal 1 is TRUE and literal ^ 1 is the complement.
+This is the same numbering that AIGER files use. AND nodes are structurally
+hashed, adding an AND of the same two literals twice returns the same node.
+
+AIGs can be converted from and to boolean expressions, netlists and circuit
+boards, and read from and written to binary AIGER files.
+"""
+import boolean
+from logic_circuit import (OP_INPUT, OP_NONE, OP_FALSE, OP_TRUE, OP_NOT,
+                           OP_AND, OP_OR, OP_NAND, OP_NOR, OP_XOR, OP_XNOR,
+                           OP_BUF)
+from netlist import Netlist
+from netlist_formats import ParseError
+
+FALSE = 0
+TRUE = 1
+
+
+def literal(node, complemented=False):
+    """
+    Returns the literal of a node.
+    """
+    return 2 * node + bool(complemented)
+
+
+def literal_node(literal):
+    """
+    Returns the node of a literal.
+    """
+    return literal >> 1
+
+
+def is_complemented(literal):
+    return bool(literal & 1)
+
+
+def negate(literal):
+    return literal ^ 1
+
+
+class AIG:
+
+    """
+    An and-inverter graph.
+
+    fanins holds the two fanin literals of every AND node and None for the
+    constant and the inputs, the fanins of a node are always smaller than
+    it. inputs are the nodes of the inputs and outputs are literals,
+    input_names and output_names hold their names or None.
+    """
+
+    def __init__(self):
+        self.fanins = [None]
+        self.inputs = []
+        self.input_names = []
+        self.outputs = []
+        self.output_names = []
+        self.hash_table = {}
+
+    def __len__(self):
+        return len(self.fanins)
+
+    @property
+    def and_count(self):
+        return len(self.fanins) - 1 - len(self.inputs)
+
+    def is_and(self, node):
+        return self.fanins[node] is not None
+
+    def add_input(self, name=None):
+        """
+        Adds an input and returns its literal.
+        """
+        self.fanins.append(None)
+        node = len(self.fanins) - 1
+        self.inputs.append(node)
+        self.input_names.append(name)
+        return literal(node)
+
+    def add_output(self, literal, name=None):
+        self.outputs.append(literal)
+        self.output_names.append(name)
+
+    def AND(self, a, b):
+        """
+        Returns the literal of the AND of two literals.
+        """
+        if a > b:
+            a, b = b, a
+        if a == FALSE or a == b ^ 1:
+            return FALSE
+        if a == TRUE or a == b:
+            return b
+        key = (a, b)
+        if key not in self.hash_table:
+            self.fanins.append(key)
+            self.hash_table[key] = literal(len(self.fanins) - 1)
+        return self.hash_table[key]
+
+    def OR(self, a, b):
+        return self.AND(a ^ 1, b ^ 1) ^ 1
+
+    def XOR(self, a, b):
+        return self.OR(self.AND(a, b ^ 1), self.AND(a ^ 1, b))
+
+    def MUX(self, select, a, b):
+        """
+        Returns the literal of a if select is TRUE, otherwise of b.
+        """
+        return self.OR(self.AND(select, a), self.AND(select ^ 1, b))
+
+    def balanced(self, operation, literals):
+        """
+        Returns the literal of an operation over many literals as a balanced
+        tree of the operation.
+        """
+        literals = list(literals)
+        while len(literals) > 1:
+            pairs = [operation(literals[i], literals[i + 1])
+                     for i in range(0, len(literals) - 1, 2)]
+            if len(literals) % 2:
+                pairs.append(literals[-1])
+            literals = pairs
+        return literals[0]
+
+    def add_expression(self, expression, inputs=None):
+        """
+        Adds an expression and returns its literal.
+
+        inputs maps symbols to literals. Symbols that are not in it are added
+        as new inputs named by the symbol and added to it.
+        """
+        if inputs is None:
+            inputs = {}
+        # Iterative post order, so deep expressions work
+        literals = {}
+        stack = [(expression, False)]
+        while stack:
+            e, expanded = stack.pop()
+            if id(e) in literals:
+                continue
+            if isinstance(e, boolean.BaseElement):
+                literals[id(e)] = TRUE if e is boolean.TRUE else FALSE
+            elif isinstance(e, boolean.Symbol):
+                if e not in inputs:
+                    inputs[e] = self.add_input(e)
+                literals[id(e)] = inputs[e]
+            elif not expanded:
+                stack.append((e, True))
+                # Reversed, so the arguments are added from left to right
+                stack.extend((arg, False) for arg in reversed(e.args)
+                             if id(arg) not in literals)
+            else:
+                args = [literals[id(arg)] for arg in e.args]
+                if isinstance(e, boolean.NOT):
+                    result = args[0] ^ 1
+                elif isinstance(e, boolean.AND):
+                    result = self.balanced(self.AND, args)
+                elif isinstance(e, boolean.OR):
+                    result = self.balanced(self.OR, args)
+                elif isinstance(e, boolean.ParityBase):
+                    result = self.balanced(self.XOR, args)
+                    if isinstance(e, boolean.XNOR):
+                        result ^= 1
+                else:
+                    raise TypeError("Cannot add expression of type {}"
+                                    .format(e.__class__))
+                literals[id(e)] = result
+        return literals[id(expression)]
+
+    @classmethod
+    def from_expression(cls, expression):
+        """
+        Returns the AIG of an expression with a single output.
+        """
+        if isinstance(expression, str):
+            expression = boolean.parse(expression, eval=False)
+        aig = cls()
+        aig.add_output(aig.add_expression(expression))
+        return aig
+
+    def expressions(self):
+        """
+        Returns the expressions of the outputs.
+
+        Inputs are the symbols they are named by, or new symbols if their
+        names are not symbols. Nodes that are used more than once are the
+        same object in the expressions.
+        """
+        symbols = {node: name if isinstance(name, boolean.Symbol)
+                   else boolean.Symbol(name)
+                   for node, name in zip(self.inputs, self.input_names)}
+        fanins = self.fanins
+        expressions = {0: boolean.FALSE}
+        expressions.update(symbols)
+        negations = {}
+
+        def edge(literal):
+            e = expressions[literal >> 1]
+            if not literal & 1:
+                return e
+            if literal == TRUE:
+                return boolean.TRUE
+            if literal not in negations:
+                negations[literal] = boolean.NOT(e, eval=False)
+            return negations[literal]
+
+        needed = bytearray(len(fanins))
+        for output in self.outputs:
+            needed[output >> 1] = 1
+        for node in range(len(fanins) - 1, 0, -1):
+            if needed[node] and fanins[node] is not None:
+                a, b = fanins[node]
+                needed[a >> 1] = needed[b >> 1] = 1
+        for node in range(1, len(fanins)):
+            if needed[node] and fanins[node] is not None:
+                a, b = fanins[node]
+                expressions[node] = boolean.AND(edge(a), edge(b), eval=False)
+        return tuple(edge(output) for output in self.outputs)
+
+    def run_vectors(self, inputs, width):
+        """
+        Returns the values of all nodes for many input vectors at once.
+
+        Bit i of every input is its value in vector i, like
+        CompiledBoard.run_vectors.
+        """
+        if len(inputs) != len(self.inputs):
+            raise ValueError("Expected {} inputs but got {}"
+                             .format(len(self.inputs), len(inputs)))
+        full = (1 << width) - 1
+        values = [0] * len(self.fanins)
+        for node, value in zip(self.inputs, inputs):
+            values[node] = value & full
+        for node, fanin in enumerate(self.fanins):
+            if fanin is not None:
+                a, b = fanin
+                values[node] = (values[a >> 1] ^ (full if a & 1 else 0)) &\
+                    (values[b >> 1] ^ (full if b & 1 else 0))
+        return values
+
+    def output_values(self, inputs):
+        """
+        Returns the outputs for a tuple of input values.
+        """
+        values = self.run_vectors([int(bool(v)) for v in inputs], 1)
+        return tuple(bool(values[o >> 1] ^ (o & 1)) for o in self.outputs)
+
+    @classmethod
+    def from_netlist(cls, netlist):
+        """
+        Returns the AIG of a netlist.
+
+        Gates with more than two inputs become balanced trees.
+        """
+        aig = cls()
+        outputs = aig.add_netlist(netlist)
+        for node, output in zip(netlist.outputs, outputs):
+            aig.add_output(output, netlist.names.get(node))
+        return aig
+
+    def add_netlist(self, netlist, inputs=None):
+        """
+        Adds the nodes of a netlist and returns the literals of its outputs.
+
+        inputs are the literals of the inputs of the netlist, if it is None
+        an input is added for every input of the netlist.
+        """
+        if inputs is not None:
+            if len(inputs) != len(netlist.inputs):
+                raise ValueError("Expected {} inputs but got {}"
+                                 .format(len(netlist.inputs), len(inputs)))
+            inputs = dict(zip(netlist.inputs, inputs))
+        literals = []
+        types = netlist.types
+        for node in range(len(netlist)):
+            opcode = types[node]
+            fanins = [literals[f] for f in netlist.fanins(node)]
+            if None in fanins or opcode == OP_NONE:
+                # Nodes that are not connected can only be added if no output
+                # depends on them
+                literals.append(None)
+                continue
+            if opcode == OP_INPUT:
+                if inputs is None:
+                    result = self.add_input(netlist.names.get(node))
+                else:
+                    result = inputs[node]
+            elif opcode == OP_FALSE:
+                result = FALSE
+            elif opcode == OP_TRUE:
+                result = TRUE
+            elif opcode == OP_NOT:
+                result = fanins[0] ^ 1
+            elif opcode == OP_BUF:
+                result = fanins[0]
+            elif opcode == OP_AND or opcode == OP_NAND:
+                result = self.balanced(self.AND, fanins)
+            elif opcode == OP_OR or opcode == OP_NOR:
+                result = self.balanced(self.OR, fanins)
+            elif opcode == OP_XOR or opcode == OP_XNOR:
+                result = self.balanced(self.XOR, fanins)
+            else:
+                raise ValueError("Node {} has the unknown type {}"
+                                 .format(node, opcode))
+            if opcode in (OP_NAND, OP_NOR, OP_XNOR):
+                result ^= 1
+            literals.append(result)
+        for node in netlist.outputs:
+            if literals[node] is None:
+                raise ValueError("Output {} depends on a component that is "
+                                 "not connected".format(node))
+        return [literals[node] for node in netlist.outputs]
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Returns the AIG of a circuit board.
+
+        The inputs and outputs are in the same order as on the board.
+        """
+        return cls.from_netlist(Netlist.from_board(board))
+
+    def to_netlist(self):
+        """
+        Returns a netlist of AND and NOT nodes.
+        """
+        netlist = Netlist()
+        nodes = {}
+        negations = {}
+
+        def edge(literal):
+            if literal >> 1 == 0:
+                if literal not in nodes:
+                    nodes[literal] = netlist.add(OP_TRUE if literal
+                                                 else OP_FALSE)
+                return nodes[literal]
+            node = nodes[literal >> 1]
+            if not literal & 1:
+                return node
+            if node not in negations:
+                negations[node] = netlist.add(OP_NOT, (node,))
+            return negations[node]
+
+        names = {node: None if name is None else str(name)
+                 for node, name in zip(self.inputs, self.input_names)}
+        for node, fanin in enumerate(self.fanins):
+            if node == 0:
+                continue
+            if fanin is None:
+                nodes[node] = netlist.add(OP_INPUT, name=names[node])
+            else:
+                nodes[node] = netlist.add(OP_AND, (edge(fanin[0]),
+                                                   edge(fanin[1])))
+        for output, name in zip(self.outputs, self.output_names):
+            node = edge(output)
+            if name is not None:
+                netlist.names[node] = str(name)
+            netlist.outputs.append(node)
+        return netlist
+
+    def to_board(self):
+        """
+        Returns a settled circuit board of AND and NOT gates.
+        """
+        return self.to_netlist().to_board()
+
+
+def _write_number(file, number):
+    """
+    Writes a number in the variable length encoding of AIGER, 7 bits at a
+    time with the highest bit set if more bytes follow.
+    """
+    data = bytearray()
+    while number >= 0x80:
+        data.append(number & 0x7f | 0x80)
+        number >>= 7
+    data.append(number)
+    file.write(bytes(data))
+
+
+def write_aiger(aig, file):
+    """
+    Writes an AIG into a binary file in the binary AIGER format.
+
+    The nodes are renumbered so the inputs come first.
+    """
+    nodes = [0] * len(aig.fanins)
+    for i, node in enumerate(aig.inputs):
+        nodes[node] = i + 1
+    new_node = len(aig.inputs)
+    ands = []
+    for node, fanin in enumerate(aig.fanins):
+        if fanin is not None:
+            new_node += 1
+            nodes[node] = new_node
+            ands.append(fanin)
+
+    def renumber(literal):
+        return 2 * nodes[literal >> 1] + (literal & 1)
+
+    file.write("aig {} {} 0 {} {}\n".format(
+        new_node, len(aig.inputs), len(aig.outputs), len(ands))
+        .encode("ascii"))
+    for output in aig.outputs:
+        file.write("{}\n".format(renumber(output)).encode("ascii"))
+    lhs = 2 * len(aig.inputs)
+    for a, b in ands:
+        lhs += 2
+        a, b = renumber(a), renumber(b)
+        if a < b:
+            a, b = b, a
+        _write_number(file, lhs - a)
+        _write_number(file, a - b)
+    for prefix, names in (("i", aig.input_names), ("o", aig.output_names)):
+        for i, name in enumerate(names):
+            if name is not None:
+                file.write("{}{} {}\n".format(prefix, i, name)
+                           .encode("utf-8"))
+
+
+def read_aiger(file):
+    """
+    Reads an AIG from a binary file in the binary AIGER format.
+
+    Latches are cut like in netlist_formats, every latch becomes an input
+    after the real inputs and its next state an output after the real
+    outputs.
+    """
+    header = file.readline().split()
+    if len(header) < 6 or header[0] != b"aig" or\
+            not all(h.isdigit() for h in header[1:]):
+        raise ParseError("Not a binary AIGER file")
+    m, i, l, o, a = (int(h) for h in header[1:6])
+    if any(int(h) for h in header[6:]):
+        raise ParseError("Bad states, constraints and fairness are not "
+                         "supported")
+    if m != i + l + a:
+        raise ParseError("The header is inconsistent")
+
+    aig = AIG()
+    # Inputs and latches are nodes 1 to i + l in this order
+    for _ in range(i + l):
+        aig.add_input()
+
+    def read_literal():
+        line = file.readline().split()
+        if not line or not line[0].isdigit():
+            raise ParseError("Expected a literal")
+        return int(line[0])
+    latches = [read_literal() for _ in range(l)]
+    outputs = [read_literal() for _ in range(o)]
+
+    data = file.read()
+    position = 0
+
+    def read_number():
+        nonlocal position
+        number = 0
+        shift = 0
+        while True:
+            if position >= len(data):
+                raise ParseError("Unexpected end of file")
+            byte = data[position]
+            position += 1
+            number |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                return number
+            shift += 7
+
+    # Maps the literals of the file to literals of the AIG, the AIG only
+    # differs when two ANDs of the file are the same
+    literals = list(range(2 * (i + l + 1)))
+    for lhs in range(2 * (i + l + 1), 2 * (m + 1), 2):
+        delta0 = read_number()
+        delta1 = read_number()
+        a = lhs - delta0
+        b = a - delta1
+        if delta0 == 0 or b < 0:
+            raise ParseError("AND {} is not sorted".format(lhs))
+        result = aig.AND(literals[a], literals[b])
+        literals.append(result)
+        literals.append(result ^ 1)
+
+    for literal in outputs + latches:
+        if literal >= len(literals):
+            raise ParseError("Literal {} is not defined".format(literal))
+        aig.add_output(literals[literal])
+
+    # The symbol table and the comments
+    for line in data[position:].decode("utf-8").splitlines():
+        if line == "c":
+            break
+        kind, _, name = line.partition(" ")
+        if kind[:1] in ("i", "l", "o") and kind[1:].isdigit():
+            index = int(kind[1:])
+            if kind[0] == "i" and index < i:
+                aig.input_names[index] = name
+            elif kind[0] == "l" and index < l:
+                aig.input_names[i + index] = name
+            elif kind[0] == "o" and index < o:
+                aig.output_names[index] = name
+    return aig
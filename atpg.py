@@ -0,0 +1,402 @@
+"""
+Automatic Test Pattern Generation
+
+This module generates test vectors for the stuck-at faults of a netlist or a
+circuit board, see fault_simulation for how faults are written.
+
+Most faults are easy to detect, so random vectors are fault simulated first
+and only the vectors that detect new faults are kept. Every fault that is
+still not detected is given to PODEM, which decides the values of the inputs
+one at a time until the fault is detected, and undoes decisions when it cannot
+be. The result is a test cube, where inputs that do not matter are None. The
+cube is extended to also detect other faults, so one vector detects many of
+them, then filled with random values and fault simulated, which drops every
+fault it detects. At the end the vectors are fault simulated in reverse order
+and vectors that do not detect a fault that no later vector detects are
+removed.
+"""
+import heapq
+import random
+
+from logic_circuit import (OP_INPUT, OP_FALSE, OP_TRUE, OP_NOT, OP_AND, OP_OR,
+                           OP_NAND, OP_NOR, OP_XOR, OP_XNOR, OP_BUF)
+import fault_simulation
+
+# The unknown value of the three valued logic PODEM uses
+X = 2
+
+# The number of times PODEM can undo a decision before it gives up on a fault
+BACKTRACK_LIMIT = 100
+# The number of other faults a test cube is extended for
+COMPACTION_LIMIT = 20
+
+
+def _evaluate(opcode, values):
+    """
+    Returns the value of a node in three valued logic.
+    """
+    if opcode == OP_AND or opcode == OP_NAND:
+        value = 0 if 0 in values else X if X in values else 1
+    elif opcode == OP_OR or opcode == OP_NOR:
+        value = 1 if 1 in values else X if X in values else 0
+    elif opcode == OP_XOR or opcode == OP_XNOR:
+        value = X if X in values else sum(values) & 1
+    elif opcode == OP_NOT:
+        value = values[0] if values[0] == X else values[0] ^ 1
+    elif opcode == OP_BUF:
+        value = values[0]
+    elif opcode == OP_FALSE:
+        return 0
+    elif opcode == OP_TRUE:
+        return 1
+    else:
+        return X
+    if value != X and (opcode == OP_NAND or opcode == OP_NOR or
+                       opcode == OP_XNOR):
+        value ^= 1
+    return value
+
+
+class TestGenerator:
+
+    """
+    Generates test vectors for the stuck-at faults of a netlist or a circuit
+    board.
+
+    faults defaults to the collapsed fault_list. After run, vectors holds the
+    test vectors, simulator the FaultSimulator of the faults they detect,
+    untestable the faults that cannot be detected and aborted the faults
+    PODEM gave up on.
+    """
+
+    def __init__(self,
+                 circuit,
+                 faults=None,
+                 backtrack_limit=BACKTRACK_LIMIT,
+                 seed=0):
+        self.simulator = fault_simulation.FaultSimulator(circuit, faults)
+        self.netlist = netlist = self.simulator.netlist
+        self.backtrack_limit = backtrack_limit
+        self.random = random.Random(seed)
+        self.vectors = []
+        self.untestable = []
+        self.aborted = []
+
+        self._types = list(netlist.types)
+        self._fanins = self.simulator._fanins
+        self._fanouts = self.simulator._fanouts
+        self._inputs = list(netlist.inputs)
+        self._outputs = self.simulator._outputs
+        self._levels = []
+        for fanins in self._fanins:
+            self._levels.append(1 + max((self._levels[f] for f in fanins),
+                                        default=-1))
+        # If a node has a path to an output
+        self._observable = bytearray(len(netlist))
+        for node in netlist.outputs:
+            self._observable[node] = 1
+        for node in range(len(netlist) - 1, -1, -1):
+            if self._observable[node]:
+                for fanin in self._fanins[node]:
+                    self._observable[fanin] = 1
+        # The values of the good circuit when all inputs are X
+        self._unknown = [X] * len(netlist)
+        for node, opcode in enumerate(self._types):
+            if opcode != OP_INPUT:
+                self._unknown[node] = _evaluate(
+                    opcode, [self._unknown[f] for f in self._fanins[node]])
+
+    @property
+    def coverage(self):
+        return self.simulator.coverage
+
+    def _faulty_value(self, node):
+        if node == self._stem:
+            return self._stuck
+        values = [self._faulty[f] for f in self._fanins[node]]
+        if node == self._branch:
+            values[self._branch_index] = self._stuck
+        return _evaluate(self._types[node], values)
+
+    def _imply(self, changed):
+        """
+        Evaluates the nodes that read from changed nodes again until nothing
+        changes any more.
+        """
+        good = self._good
+        faulty = self._faulty
+        types = self._types
+        fanins = self._fanins
+        fanouts = self._fanouts
+        queue = []
+        queued = set()
+        for node in changed:
+            for reader in fanouts[node]:
+                if reader not in queued:
+                    queued.add(reader)
+                    heapq.heappush(queue, reader)
+        while queue:
+            node = heapq.heappop(queue)
+            g = _evaluate(types[node], [good[f] for f in fanins[node]])
+            f = self._faulty_value(node)
+            if g != good[node] or f != faulty[node]:
+                good[node] = g
+                faulty[node] = f
+                for reader in fanouts[node]:
+                    if reader not in queued:
+                        queued.add(reader)
+                        heapq.heappush(queue, reader)
+
+    def _assign(self, node, value):
+        self._good[node] = value
+        self._faulty[node] = self._stuck if node == self._stem else value
+        self._imply((node,))
+
+    def _fanin_values(self, node, index, fanin):
+        """
+        Returns the good and faulty value a node reads from one of its fanins.
+        """
+        if node == self._branch and index == self._branch_index:
+            return self._good[fanin], self._stuck
+        return self._good[fanin], self._faulty[fanin]
+
+    def _detected(self):
+        good = self._good
+        faulty = self._faulty
+        return any(good[o] != X and faulty[o] != X and good[o] != faulty[o]
+                   for o in self.netlist.outputs)
+
+    def _x_path(self, node):
+        """
+        Returns if there is a path from a node to an output on which the
+        outputs are unknown, so a fault effect could still get through.
+        """
+        good = self._good
+        faulty = self._faulty
+        outputs = self._outputs
+        observable = self._observable
+        stack = [node]
+        seen = {node}
+        while stack:
+            node = stack.pop()
+            if node in outputs:
+                return True
+            for reader in self._fanouts[node]:
+                if reader not in seen and observable[reader] and\
+                        (good[reader] == X or faulty[reader] == X):
+                    seen.add(reader)
+                    stack.append(reader)
+        return False
+
+    def _objective(self):
+        """
+        Returns a node and the value it should have to get closer to
+        detecting the fault, or None if it cannot be detected any more.
+        """
+        good = self._good
+        faulty = self._faulty
+        if good[self._line] == self._stuck:
+            return None
+        if good[self._line] == X:
+            return self._line, self._stuck ^ 1
+        # The D frontier are the nodes with an unknown output that read a
+        # fault effect
+        for node in self._cone:
+            if good[node] != X and faulty[node] != X:
+                continue
+            fanin_values = [self._fanin_values(node, i, f)
+                            for i, f in enumerate(self._fanins[node])]
+            if not any(g != X and f != X and g != f
+                       for g, f in fanin_values) or not self._x_path(node):
+                continue
+            opcode = self._types[node]
+            value = 1 if opcode in (OP_AND, OP_NAND) else 0
+            for fanin, (g, f) in zip(self._fanins[node], fanin_values):
+                if g == X or f == X:
+                    return fanin, value
+        return None
+
+    def _backtrace(self, node, value):
+        """
+        Returns an input and a value for it that might give a node a value.
+        """
+        good = self._good
+        faulty = self._faulty
+        types = self._types
+        levels = self._levels
+        while types[node] != OP_INPUT:
+            opcode = types[node]
+            fanins = self._fanins[node]
+            if opcode in (OP_NAND, OP_NOR, OP_NOT, OP_XNOR):
+                value ^= 1
+            candidates = [f for f in fanins if good[f] == X] or\
+                [f for f in fanins if faulty[f] == X]
+            if not candidates:
+                return None
+            if opcode in (OP_AND, OP_NAND, OP_OR, OP_NOR):
+                controlling = 0 if opcode in (OP_AND, OP_NAND) else 1
+                # One fanin is enough for the controlling value, so the one
+                # closest to the inputs is chosen, otherwise all are needed
+                # and the hardest one is done first
+                if value == controlling:
+                    node = min(candidates, key=lambda f: levels[f])
+                else:
+                    node = max(candidates, key=lambda f: levels[f])
+            elif opcode in (OP_XOR, OP_XNOR):
+                for f in fanins:
+                    if good[f] != X:
+                        value ^= good[f]
+                node = min(candidates, key=lambda f: levels[f])
+            else:
+                node = candidates[0]
+        return node, value
+
+    def podem(self, fault, cube=None, backtrack_limit=None):
+        """
+        Returns the result of looking for a test cube for a fault and the
+        cube.
+
+        The result is "detected", "untestable" or "aborted" if there were too
+        many backtracks. The cube holds the values of the inputs or None if
+        they do not matter. If a cube is given its values cannot be changed,
+        so a fault that is untestable with it might be detected by another
+        cube.
+        """
+        if backtrack_limit is None:
+            backtrack_limit = self.backtrack_limit
+        node, index, stuck = fault
+        if not self._observable[node]:
+            return "untestable", None
+        self._stuck = int(stuck)
+        self._stem = node if index is None else None
+        self._branch = node if index is not None else None
+        self._branch_index = index
+        self._line = node if index is None else self._fanins[node][index]
+        self._good = good = list(self._unknown)
+        self._faulty = list(self._unknown)
+        if self._stem is not None:
+            self._faulty[node] = self._stuck
+            self._imply((node,))
+        else:
+            self._faulty[node] = self._faulty_value(node)
+            self._imply((node,))
+        # The nodes a fault effect can reach, in order
+        cone = {node}
+        for n in range(node, len(self._types)):
+            if n in cone:
+                cone.update(self._fanouts[n])
+        self._cone = sorted(cone)
+
+        fixed = {}
+        if cube is not None:
+            for i, value in enumerate(cube):
+                if value is not None:
+                    fixed[self._inputs[i]] = int(bool(value))
+                    self._assign(self._inputs[i], fixed[self._inputs[i]])
+
+        # Decisions as [input, value, if the other value was tried]
+        decisions = []
+        backtracks = 0
+        while not self._detected():
+            objective = self._objective()
+            decision = None
+            if objective is not None:
+                decision = self._backtrace(*objective)
+            if decision is not None and decision[0] not in fixed and\
+                    good[decision[0]] == X:
+                decisions.append([decision[0], decision[1], False])
+                self._assign(decision[0], decision[1])
+                continue
+            # Undo decisions until one can be tried with the other value
+            while decisions and decisions[-1][2]:
+                self._assign(decisions.pop()[0], X)
+            if not decisions:
+                return "untestable", None
+            backtracks += 1
+            if backtracks > backtrack_limit:
+                return "aborted", None
+            decisions[-1][1] ^= 1
+            decisions[-1][2] = True
+            self._assign(decisions[-1][0], decisions[-1][1])
+
+        return "detected", [None if good[i] == X else bool(good[i])
+                            for i in self._inputs]
+
+    def run(self,
+            random_words=4,
+            compaction_limit=COMPACTION_LIMIT,
+            compact=True):
+        """
+        Generates test vectors and returns them.
+
+        random_words words of fault_simulation.WORD_SIZE random vectors are
+        tried first, fewer if a word does not detect any new fault.
+        """
+        simulator = self.simulator
+        n = len(self._inputs)
+        for _ in range(random_words):
+            word = [[self.random.random() < 0.5 for _ in range(n)]
+                    for _ in range(simulator.word_size)]
+            start = simulator.vectors
+            detected = simulator.simulate(word)
+            used = set(detected.values())
+            self.vectors.extend(v for i, v in enumerate(word, start)
+                                if i in used)
+            if not detected:
+                break
+
+        given_up = set()
+        for fault in simulator.faults:
+            if fault in simulator.detected or fault in given_up:
+                continue
+            result, cube = self.podem(fault)
+            if result == "untestable":
+                self.untestable.append(fault)
+                given_up.add(fault)
+                continue
+            elif result == "aborted":
+                self.aborted.append(fault)
+                given_up.add(fault)
+                continue
+            # Extend the cube to detect other faults as well
+            tries = 0
+            for other in simulator.faults:
+                if tries >= compaction_limit or None not in cube:
+                    break
+                if other == fault or other in simulator.detected or\
+                        other in given_up:
+                    continue
+                tries += 1
+                result, extended = self.podem(other, cube,
+                                              self.backtrack_limit // 10)
+                if result == "detected":
+                    cube = extended
+            vector = [self.random.random() < 0.5 if v is None else v
+                      for v in cube]
+            simulator.simulate([vector])
+            self.vectors.append(vector)
+
+        if compact:
+            self.compact()
+        return self.vectors
+
+    def compact(self):
+        """
+        Removes the vectors that are not needed to detect the faults that
+        are detected.
+        """
+        reverse = self.vectors[::-1]
+        simulator = fault_simulation.FaultSimulator(
+            self.netlist, list(self.simulator.detected))
+        simulator.simulate(reverse)
+        needed = set(simulator.detected.values())
+        self.vectors = [v for i, v in enumerate(reverse) if i in needed][::-1]
+        return self.vectors
+
+
+def generate_tests(circuit, faults=None, seed=0):
+    """
+    Returns test vectors for the stuck-at faults of a netlist or a circuit
+    board.
+    """
+    return TestGenerator(circuit, faults, seed=seed).run()
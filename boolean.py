@@ -2,8 +2,8 @@
 Boolean Algebra.
 
 This module defines a Boolean Algebra over the set {TRUE, FALSE} with boolean
-variables and the boolean functions AND, OR, NOT. For extensive documentation
-look either into the docs directory or view it online at
+variables and the boolean functions AND, OR, NOT, XOR and XNOR. For extensive
+documentation look either into the docs directory or view it online at
 https://booleanpy.readthedocs.org/en/latest/.
 
 Copyright (c) 2009-2010 Sebastian Kraemer, basti.kr@gmail.com
@@ -19,9 +19,10 @@ Copyright (c) 2015 Qi-rui Chen, Qi-rui.Chen@hotmail.co.uk
 """
 import itertools
 import collections
+import functools
 
 # A boolean algebra is defined by its base elements (=domain), its operations
-# (in this case only NOT, AND and OR) and an additional "symbol" type.
+# (in this case NOT, AND, OR, XOR and XNOR) and an additional "symbol" type.
 Algebra = collections.namedtuple("Algebra",
                                  ("domain", "operations", "symbol"))
 
@@ -29,9 +30,11 @@ Algebra = collections.namedtuple("Algebra",
 BooleanDomain = collections.namedtuple("BooleanDomain",
                                        ("TRUE", "FALSE"))
 
-# Defines the basic boolean operations NOT, AND and OR.
+# Defines the basic boolean operations NOT, AND and OR and the exclusive
+# operations XOR and XNOR.
 BooleanOperations = collections.namedtuple("BooleanOperations",
-                                           ("NOT", "AND", "OR"))
+                                           ("NOT", "AND", "OR",
+                                            "XOR", "XNOR"))
 
 
 class Expression(object):
@@ -149,6 +152,8 @@ class Expression(object):
         for expr, substitution in subs_dict.items():
             if expr == self:
                 return substitution
+        if self.args is None:
+            return self
         expr = self._subs(subs_dict, eval=eval)
         return self if expr is None else expr
 
@@ -261,6 +266,9 @@ class Expression(object):
     def __add__(self, other):
         return self.algebra.operations.OR(self, other)
 
+    def __xor__(self, other):
+        return self.algebra.operations.XOR(self, other)
+
 
 class BaseElement(Expression):
 
@@ -383,6 +391,9 @@ class Symbol(Expression):
     _iscanonical = True
 
     _obj = None
+    # Set for symbols interned by a SymbolTable
+    _table = None
+    _id = None
 
     def __new__(cls, obj=None, *, eval=False):
         return object.__new__(cls)
@@ -426,6 +437,8 @@ class Symbol(Expression):
             return True
         if not isinstance(other, self.__class__):
             return NotImplemented
+        if self._table is not None and self._table is other._table:
+            return False  # Interned symbols of a table are singletons.
         if self.obj is None or other.obj is None:
             return False
         else:
@@ -462,6 +475,91 @@ class Symbol(Expression):
         return "%s(%s)" % (self.__class__.__name__, obj)
 
 
+class SymbolTable:
+
+    """
+    Table of interned named symbols.
+
+    A symbol table returns the same Symbol object every time it is asked for
+    the same object, so named symbols can be compared by identity and used as
+    keys without hashing their objects again. Every interned symbol gets a
+    small integer id, starting at 0 in the order the symbols were interned,
+    which can be used as a bit position. Anonymous symbols are never interned.
+    """
+
+    def __init__(self, objs=()):
+        self._symbols = []
+        # Maps objects to ids
+        self._ids = {}
+        for obj in objs:
+            self.symbol(obj)
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __iter__(self):
+        return iter(self._symbols)
+
+    def __getitem__(self, id):
+        return self._symbols[id]
+
+    def __contains__(self, symbol):
+        if isinstance(symbol, Symbol):
+            if symbol._table is self:
+                return True
+            symbol = symbol.obj
+        return symbol in self._ids
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__,
+                           [s.obj for s in self._symbols])
+
+    def symbol(self, obj):
+        """
+        Returns the interned symbol for an object or a named symbol.
+        """
+        if isinstance(obj, Symbol):
+            if obj._table is self:
+                return obj
+            if obj.obj is None:
+                raise ValueError("Anonymous symbols cannot be interned.")
+            obj = obj.obj
+        elif obj is None:
+            raise ValueError("Anonymous symbols cannot be interned.")
+        id = self._ids.get(obj)
+        if id is None:
+            id = len(self._symbols)
+            symbol = ALGEBRA.symbol(obj)
+            symbol._table = self
+            symbol._id = id
+            self._symbols.append(symbol)
+            self._ids[obj] = id
+        return self._symbols[id]
+
+    def id(self, symbol):
+        """
+        Returns the id of a symbol, interning it if needed.
+        """
+        if isinstance(symbol, Symbol) and symbol._table is self:
+            return symbol._id
+        return self.symbol(symbol)._id
+
+    def mask(self, symbols):
+        """
+        Returns an integer with the bit of every given symbol set.
+        """
+        mask = 0
+        for symbol in symbols:
+            mask |= 1 << self.id(symbol)
+        return mask
+
+    def symbols(self, mask):
+        """
+        Returns the symbols whose bits are set in a mask, ordered by id.
+        """
+        return tuple(s for s in self._symbols if mask >> s._id & 1)
+
+
 class Function(Expression):
 
     """
@@ -617,10 +715,13 @@ class NOT(Function):
         This is achieved by canceling double NOTs and using de Morgan laws.
         """
         term = self.cancel()
-        if term.isliteral or\
+        if not isinstance(term, self.__class__) or term.isliteral or\
                 not isinstance(term.args[0], self.algebra.operations):
             return term
         op = term.args[0]
+        if isinstance(op, ParityBase):
+            # ~(A xor B) = A xnor B, ~(A xnor B) = A xor B
+            return op.complement(*op.args, eval=False)
         return op.dual(*tuple(self.__class__(arg, eval=False).cancel()
                               for arg in op.args), eval=False)
 
@@ -989,9 +1090,161 @@ class OR(DualBase):
     operator = "+"
 
 
+class ParityBase(Function):
+
+    """
+    Base class for XOR and XNOR function.
+
+    Both operations take 2 or more arguments. XOR is TRUE if an odd number of
+    its arguments are TRUE, XNOR is the negation of XOR, as for gates with more
+    than two inputs. XOR can be created by using "^" between two boolean
+    expressions.
+    """
+    # Stores if the operation negates the parity of its arguments.
+    _negated = None
+
+    @property
+    def complement(self):
+        """
+        Return the class that computes the negation of this function.
+
+        This means XOR.complement is XNOR and XNOR.complement is XOR.
+        """
+        return self.getcomplement()
+
+    @classmethod
+    def getcomplement(cls):
+        """
+        Return the class that computes the negation of this function.
+        """
+        ops = cls.algebra.operations
+        if issubclass(cls, ops.XOR):
+            return ops.XNOR
+        elif issubclass(cls, ops.XNOR):
+            return ops.XOR
+        else:
+            raise AttributeError("Class must be in algebra.operations.")
+
+    def eval(self, **evalkwargs):
+        """
+        Return a simplified expression in canonical form.
+
+        For simplification of XOR and XNOR following rules are used:
+         - Associativity (nested XOR and XNOR are merged)
+         - Self cancellation (A xor A = 0)
+         - Identity (A xor 0 = A)
+         - Constants and NOTs are moved into the parity (A xor 1 = A xnor 0,
+           ~A xor B = A xnor B)
+         - Commutivity (output is always sorted)
+
+        The canonical form is XOR or XNOR of two or more distinct arguments,
+        none of which is a constant, NOT, XOR or XNOR.
+        """
+        if self.iscanonical:
+            return self
+        domain = self.algebra.domain
+        ops = self.algebra.operations
+        negated = self._negated
+        # Maps the arguments to True if they appear an odd number of times.
+        odd = collections.OrderedDict()
+        stack = list(reversed(self.args))
+        while stack:
+            arg = stack.pop().eval()
+            if arg is domain.TRUE:
+                negated = not negated
+            elif arg is domain.FALSE:
+                pass
+            elif isinstance(arg, ops.NOT):
+                negated = not negated
+                stack.append(arg.args[0])
+            elif isinstance(arg, ParityBase):
+                if arg._negated:
+                    negated = not negated
+                stack.extend(reversed(arg.args))
+            else:
+                odd[arg] = not odd.get(arg, False)
+        args = sorted(arg for arg, isodd in odd.items() if isodd)
+        if len(args) == 0:
+            return domain.TRUE if negated else domain.FALSE
+        elif len(args) == 1:
+            return ops.NOT(args[0]) if negated else args[0]
+        term = (ops.XNOR if negated else ops.XOR)(*args, eval=False)
+        term._iscanonical = True
+        return term
+
+    def expand(self):
+        """
+        Return an equivalent OR of ANDs that does not contain this function.
+
+        An XOR of n arguments has 2^(n-1) terms.
+        """
+        ops = self.algebra.operations
+        products = []
+        n = len(self.args)
+        for negations in itertools.product((False, True), repeat=n):
+            if (sum(negations) % 2 == 0) != ((n % 2 == 1) != self._negated):
+                continue
+            products.append(ops.AND(*(ops.NOT(arg, eval=False) if negate
+                                      else arg
+                                      for arg, negate
+                                      in zip(self.args, negations)),
+                                    eval=False))
+        return ops.OR(*products, eval=False)
+
+    def __str__(self):
+        # A⊙B⊙C is read as (A⊙B)⊙C, which is the XOR of A, B and C, so an
+        # XNOR of more than two arguments is printed as a negated XOR.
+        if self._negated and len(self.args) > 2:
+            return "~(%s)" % self.complement(*self.args, eval=False)
+        return super().__str__()
+
+    def __hash__(self):
+        # Unlike AND and OR, A xor A is not A, so arguments are counted.
+        if self._hash is None:
+            counts = collections.Counter(self.args)
+            self._hash = hash(self.__class__.__name__) ^\
+                hash(frozenset(counts.items()))
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, self.__class__):
+            return NotImplemented
+        return collections.Counter(self.args) ==\
+            collections.Counter(other.args)
+
+    __lt__ = DualBase.__lt__
+
+
+class XOR(ParityBase):
+
+    """
+    Boolean XOR operation.
+
+    The XOR operation takes 2 or more arguments and can also be created by
+    using "^" between two boolean expressions.
+    """
+    _cls_order = 15
+    _negated = False
+    operator = "⊕"
+
+
+class XNOR(ParityBase):
+
+    """
+    Boolean XNOR operation.
+
+    The XNOR operation takes 2 or more arguments and is the negation of XOR.
+    """
+    _cls_order = 20
+    _negated = True
+    operator = "⊙"
+
+
 # Create a default algebra.
 DOMAIN = BooleanDomain(TRUE=TRUE, FALSE=FALSE)
-OPERATIONS = BooleanOperations(NOT=NOT, AND=AND, OR=OR)
+OPERATIONS = BooleanOperations(NOT=NOT, AND=AND, OR=OR, XOR=XOR, XNOR=XNOR)
 ALGEBRA = Algebra(DOMAIN, OPERATIONS, Symbol)
 Expression.algebra = ALGEBRA
 
@@ -1006,6 +1259,15 @@ def normalize(operation, expr):
     in literals.
     """
     dualoperation = operation.getdual()
+
+    def expand(expr):
+        if expr.args is None:
+            return expr
+        if isinstance(expr, ParityBase):
+            expr = expr.expand()
+        return expr.__class__(*(expand(arg) for arg in expr.args), eval=False)
+    # Normal forms only contain AND, OR and NOT.
+    expr = expand(expr)
     # Move NOT inwards.
     expr = expr.literalize()
     # Simplify as much as possible, otherwise rdistributive may take
@@ -1014,7 +1276,7 @@ def normalize(operation, expr):
     # Totally flatten everything.
 
     def rdistributive(expr):
-        if expr.isliteral:
+        if expr.isliteral or expr.args is None:
             return expr
         args = tuple(rdistributive(arg).eval() for arg in expr.args)
         if len(args) == 1:
@@ -1033,10 +1295,14 @@ def normalize(operation, expr):
     return args
 
 
-def symbols(*args):
+def symbols(*args, symbol_table=None):
     """
     Returns a Symbol for every argument given.
+
+    If a symbol table is given the symbols are interned in it.
     """
+    if symbol_table is not None:
+        return tuple(symbol_table.symbol(arg) for arg in args)
     Symbol = ALGEBRA.symbol
     return tuple(Symbol(arg) for arg in args)
 
@@ -1044,17 +1310,39 @@ def symbols(*args):
 PRECEDENCE = {
     NOT: 5,
     AND: 10,
+    XOR: 12,
+    XNOR: 12,
     OR: 15,
     "(": 20,
 }
 
 
-def parse(expr, eval=True):
+def parse(expr, eval=True, xor_caret=False, symbol_table=None):
     """
     Returns a boolean expression created from the given string.
+
+    "^" is read as AND (as a short form of "∧") unless xor_caret is True, in
+    which case it is read as XOR like in most programming languages. "⊕" is
+    always XOR and "⊙" is always XNOR. Both have the same precedence and are
+    read from left to right, so A⊕B⊙C is read as (A⊕B)⊙C. XNOR is not
+    associative in the way gates with more than two inputs are, so A⊙B⊙C is
+    read as (A⊙B)⊙C, the XOR of A, B and C, and an XNOR of more than two
+    arguments is printed as ~(A⊕B⊕C).
+
+    A name used more than once is always the same Symbol object. If a symbol
+    table is given the symbols are interned in it.
     """
     if not isinstance(expr, str):
         raise TypeError("Argument must be string but it is %s." % expr.__class__)
+    if symbol_table is None:
+        interned = {}
+
+        def intern(name):
+            if name not in interned:
+                interned[name] = Symbol(name)
+            return interned[name]
+    else:
+        intern = symbol_table.symbol
 
     def prime_to_tilde(expr):
         """
@@ -1094,8 +1382,11 @@ def parse(expr, eval=True):
             if prec > op_prec:  # op=*, [ast, +, x, y] -> [[ast, +, x], *, y]
                 ast = [ast, operation, ast.pop(-1)]
                 return ast
-            if prec == op_prec:  # op=*, [ast, *, x] -> [ast, *, x]
-                return ast
+            if prec == op_prec:
+                if operation is XNOR or ast[1] is not operation:
+                    # op=⊙, [ast, ⊕, x, y] -> [ast, ⊙, x⊕y]
+                    return [ast[0], operation, ast[1](*ast[2:], eval=eval)]
+                return ast  # op=*, [ast, *, x] -> [ast, *, x]
             if ast[0] is None:  # op=+, [None, *, x, y] -> [None, +, x*y]
                 return [ast[0], operation, ast[1](*ast[2:], eval=eval)]
             else:  # op=+, [[ast, *, x], ~, y] -> [ast, *, x, ~y]
@@ -1117,7 +1408,7 @@ def parse(expr, eval=True):
             j = 1
             while i + j < length and expr[i + j].isalnum():
                 j += 1
-            ast.append(Symbol(expr[i:i + j]))
+            ast.append(intern(expr[i:i + j]))
             i += j - 1
         elif char == "(":
             ast = [ast, "("]
@@ -1133,8 +1424,14 @@ def parse(expr, eval=True):
                 ast = ast[0]
         elif char in ("~", "¬", "!"):
             ast = [ast, NOT]
+        elif char == "^" and xor_caret:
+            ast = start_operation(ast, XOR)
         elif char in ("*", "∙", ".", "^", "∧"):
             ast = start_operation(ast, AND)
+        elif char == "⊕":
+            ast = start_operation(ast, XOR)
+        elif char == "⊙":
+            ast = start_operation(ast, XNOR)
         elif char in ("+", "∨"):
             ast = start_operation(ast, OR)
         else:
@@ -1202,6 +1499,360 @@ def truth_table(expr, format_str=False):
     return rows
 
 
+def from_truth_table(minterms, symbols, dont_cares=()):
+    """
+    Returns a sum of products expression for a function given by its minterms.
+
+    Minterms are numbered in the same order as the rows of truth_table, so the
+    first symbol is the most significant bit of a minterm. Don't cares may be
+    used as either TRUE or FALSE to make the expression smaller.
+
+    Symbols may be Symbols or objects that are used to create named Symbols.
+    The arguments are in the same order as the ones of from_bitset.
+    """
+    symbols = tuple(symbols)
+    size = 1 << len(symbols)
+
+    def to_bitset(indices):
+        bitset = 0
+        for i in indices:
+            if not 0 <= i < size:
+                raise ValueError("Minterm %s is out of range for %s symbols."
+                                 % (i, len(symbols)))
+            bitset |= 1 << i
+        return bitset
+    return from_bitset(to_bitset(minterms), symbols, to_bitset(dont_cares))
+
+
+def variable_bitsets(n):
+    """
+    Returns the bitsets of the n variables of a truth table.
+
+    masks[v] has a bit set for every minterm where variable v is TRUE.
+    Variable v is bit v of the minterm, which is symbol n - 1 - v.
+    """
+    masks = []
+    for v in range(n):
+        block = ((1 << (1 << v)) - 1) << (1 << v)
+        mask = 0
+        for i in range(0, 1 << n, 2 << v):
+            mask |= block << i
+        masks.append(mask)
+    return masks
+
+
+def to_bitset(expr, symbols):
+    """
+    Returns the truth table of an expression as a bitset.
+
+    Bit i of the bitset is the value of the expression for minterm i, see
+    from_truth_table. All operations are done on whole bitsets at once.
+    """
+    Symbol = ALGEBRA.symbol
+    symbols = tuple(s if isinstance(s, Symbol) else Symbol(s)
+                    for s in symbols)
+    n = len(symbols)
+    full = (1 << (1 << n)) - 1
+    masks = variable_bitsets(n)
+    tables = {s: masks[n - 1 - i] for i, s in enumerate(symbols)}
+    ops = ALGEBRA.operations
+
+    def recursive_bitset(e):
+        if e is TRUE:
+            return full
+        elif e is FALSE:
+            return 0
+        elif isinstance(e, Symbol):
+            if e not in tables:
+                raise ValueError("Symbol %s is not one of the symbols." % e)
+            return tables[e]
+        args = [recursive_bitset(arg) for arg in e.args]
+        if isinstance(e, ops.NOT):
+            return full ^ args[0]
+        result = args[0]
+        if isinstance(e, ops.AND):
+            for arg in args[1:]:
+                result &= arg
+        elif isinstance(e, ops.OR):
+            for arg in args[1:]:
+                result |= arg
+        elif isinstance(e, ParityBase):
+            for arg in args[1:]:
+                result ^= arg
+            if e._negated:
+                result ^= full
+        else:
+            raise TypeError("Unknown function %s." % e.__class__.__name__)
+        return result
+    if isinstance(expr, str):
+        expr = parse(expr, eval=False)
+    return recursive_bitset(expr)
+
+
+def esop(expr, symbols=None):
+    """
+    Returns an exclusive sum of products (XOR of ANDs) for an expression.
+
+    The products are the Reed-Muller expansion of the expression with the
+    polarity of every symbol chosen to give the fewest products. For up to
+    8 symbols all polarities are tried, otherwise the polarity of one symbol
+    at a time is changed while that gives fewer products. Parity functions
+    have a linear sized ESOP while their sum of products is exponential.
+    """
+    if isinstance(expr, str):
+        expr = parse(expr, eval=False)
+    Symbol = ALGEBRA.symbol
+    if symbols is None:
+        symbols = sorted(expr.symbols, key=str)
+    symbols = tuple(s if isinstance(s, Symbol) else Symbol(s)
+                    for s in symbols)
+    n = len(symbols)
+    full = (1 << (1 << n)) - 1
+    masks = variable_bitsets(n)
+    table = to_bitset(expr, symbols)
+
+    def flip(table, v):
+        # Swaps the halves of the truth table where variable v is TRUE and
+        # FALSE, which is the same as negating variable v.
+        shift = 1 << v
+        return ((table & masks[v]) >> shift) |\
+            ((table & ~masks[v] & full) << shift)
+
+    def reed_muller(table):
+        for v in range(n):
+            table ^= (table & ~masks[v] & full) << (1 << v)
+        return table
+
+    def cost(coefficients):
+        return bin(coefficients).count("1")
+
+    polarity = 0
+    best = reed_muller(table)
+    if n <= 8:
+        for p in range(1, 1 << n):
+            flipped = table
+            for v in range(n):
+                if p >> v & 1:
+                    flipped = flip(flipped, v)
+            coefficients = reed_muller(flipped)
+            if cost(coefficients) < cost(best):
+                polarity, best = p, coefficients
+    else:
+        improved = True
+        while improved:
+            improved = False
+            for v in range(n):
+                flipped = table
+                for w in range(n):
+                    if (polarity ^ 1 << v) >> w & 1:
+                        flipped = flip(flipped, w)
+                coefficients = reed_muller(flipped)
+                if cost(coefficients) < cost(best):
+                    polarity, best = polarity ^ 1 << v, coefficients
+                    improved = True
+
+    negated = False
+    products = []
+    for m in range(1 << n):
+        if not best >> m & 1:
+            continue
+        literals = []
+        for v in range(n - 1, -1, -1):
+            if m >> v & 1:
+                s = symbols[n - 1 - v]
+                literals.append(NOT(s, eval=False) if polarity >> v & 1
+                                else s)
+        if not literals:
+            negated = True
+        elif len(literals) == 1:
+            products.append(literals[0])
+        else:
+            products.append(AND(*literals, eval=False))
+    if len(products) == 0:
+        return TRUE if negated else FALSE
+    elif len(products) == 1:
+        return NOT(products[0], eval=False) if negated else products[0]
+    return (XNOR if negated else XOR)(*products, eval=False)
+
+
+def from_bitset(on_set, symbols, dont_cares=0):
+    """
+    Returns a sum of products expression for a function given as a bitset.
+
+    Bit i of on_set (and dont_cares) is minterm i, see from_truth_table. The
+    cover is computed with the Minato-Morreale ISOP algorithm directly on the
+    bitsets, which returns an irredundant sum of prime implicants without ever
+    expanding the minterms into expressions.
+    """
+    Symbol = ALGEBRA.symbol
+    symbols = tuple(s if isinstance(s, Symbol) else Symbol(s)
+                    for s in symbols)
+    n = len(symbols)
+    full = (1 << (1 << n)) - 1
+    if on_set & ~full or dont_cares & ~full:
+        raise ValueError("Bitset is too large for %s symbols." % n)
+    masks = variable_bitsets(n)
+
+    cache = {}
+
+    def isop(lower, upper, v):
+        """
+        Returns (cubes, cover) with lower <= cover <= upper.
+
+        Cubes are (positive, negative) pairs of variable masks.
+        """
+        if lower == 0:
+            return [], 0
+        if upper == full:
+            return [(0, 0)], full
+        key = (lower, upper)
+        if key in cache:
+            return cache[key]
+        # Find the top most variable that either bitset depends on.
+        while True:
+            v -= 1
+            mask, shift = masks[v], 1 << v
+            if (lower & mask) >> shift != lower & ~mask & full or\
+                    (upper & mask) >> shift != upper & ~mask & full:
+                break
+        lower0 = lower & ~mask & full
+        lower0 |= lower0 << shift
+        lower1 = lower & mask
+        lower1 |= lower1 >> shift
+        upper0 = upper & ~mask & full
+        upper0 |= upper0 << shift
+        upper1 = upper & mask
+        upper1 |= upper1 >> shift
+        cubes0, cover0 = isop(lower0 & ~upper1 & full, upper0, v)
+        cubes1, cover1 = isop(lower1 & ~upper0 & full, upper1, v)
+        rest = (lower0 & ~cover0 & full) | (lower1 & ~cover1 & full)
+        cubes2, cover2 = isop(rest, upper0 & upper1, v)
+        cubes = [(p, q | 1 << v) for p, q in cubes0]
+        cubes += [(p | 1 << v, q) for p, q in cubes1]
+        cubes += cubes2
+        cover = (cover0 & ~mask & full) | (cover1 & mask) | cover2
+        cache[key] = cubes, cover
+        return cubes, cover
+
+    cubes, _ = isop(on_set, on_set | dont_cares, n)
+    if not cubes:
+        return FALSE
+    products = []
+    for positive, negative in cubes:
+        literals = []
+        for v in range(n - 1, -1, -1):
+            if positive >> v & 1:
+                literals.append(symbols[n - 1 - v])
+            elif negative >> v & 1:
+                literals.append(NOT(symbols[n - 1 - v], eval=False))
+        if not literals:
+            return TRUE
+        elif len(literals) == 1:
+            products.append(literals[0])
+        else:
+            products.append(AND(*literals, eval=False))
+    if len(products) == 1:
+        return products[0]
+    return OR(*products, eval=False)
+
+
+# The largest number of inputs npn_canonical accepts
+NPN_MAX_INPUTS = 6
+
+# The number of canonical forms npn_canonical keeps, the least recently used
+# ones are dropped first
+NPN_CACHE_SIZE = 1 << 14
+
+
+def npn_canonical(bitset, n):
+    """
+    Returns the NPN canonical form of a truth table with n inputs.
+
+    Two functions are NPN equivalent if one can be turned into the other by
+    negating inputs, permuting inputs and negating the output. The canonical
+    form is the smallest truth table of all these functions, so equivalent
+    functions have the same canonical form, which makes it useful as a hash.
+
+    Returns a tuple of the canonical bitset and the transform (permutation,
+    negations, output_negation) that gives it, see npn_transform. The last
+    NPN_CACHE_SIZE results are cached, functions of NPN_MAX_INPUTS inputs take
+    the longest the first time.
+    """
+    if not 0 <= n <= NPN_MAX_INPUTS:
+        raise ValueError("NPN canonical forms need 0 to %s inputs but got %s."
+                         % (NPN_MAX_INPUTS, n))
+    if not 0 <= bitset < 1 << (1 << n):
+        raise ValueError("Bitset is too large for %s symbols." % n)
+    return _npn_canonical(bitset, n)
+
+
+@functools.lru_cache(maxsize=NPN_CACHE_SIZE)
+def _npn_canonical(bitset, n):
+    full = (1 << (1 << n)) - 1
+    masks = variable_bitsets(n)
+
+    def negate(table, v):
+        shift = 1 << v
+        return ((table & masks[v]) >> shift) |\
+            ((table & ~masks[v] & full) << shift)
+
+    def swap(table, v):
+        # Minterms with only one of the variables v and v + 1 set trade places
+        shift = 1 << v
+        up = masks[v] & ~masks[v + 1]
+        down = masks[v + 1] & ~masks[v]
+        return (table & ~(up | down)) | ((table & up) << shift) |\
+            ((table & down) >> shift)
+
+    best = None
+    permuted = bitset
+    current = list(range(n))
+    for permutation in itertools.permutations(range(n)):
+        # Reach the next permutation with adjacent swaps
+        for k in range(n):
+            j = current.index(permutation[k])
+            while j > k:
+                permuted = swap(permuted, j - 1)
+                current[j - 1], current[j] = current[j], current[j - 1]
+                j -= 1
+        # Go through all negations in gray code order
+        table = permuted
+        negations = 0
+        for i in range(1 << n):
+            if i:
+                v = (i & -i).bit_length() - 1
+                table = negate(table, v)
+                negations ^= 1 << v
+            for output_negation, candidate in ((False, table),
+                                               (True, table ^ full)):
+                if best is None or candidate < best[0]:
+                    best = (candidate,
+                            (permutation, negations, output_negation))
+    return best
+
+
+def npn_transform(bitset, n, transform):
+    """
+    Returns a truth table with n inputs transformed by an NPN transform.
+
+    The transform is a tuple (permutation, negations, output_negation). The
+    result is TRUE for minterm m if the bitset is TRUE for minterm p, where
+    bit i of m is bit permutation[i] of p after m is XORed with negations,
+    XORed with output_negation.
+    """
+    permutation, negations, output_negation = transform
+    result = 0
+    for m in range(1 << n):
+        x = m ^ negations
+        p = 0
+        for i in range(n):
+            if x >> i & 1:
+                p |= 1 << permutation[i]
+        if (bitset >> p & 1) != output_negation:
+            result |= 1 << m
+    return result
+
+
 class BooleanAlgebra:
 
     """
@@ -0,0 +1,271 @@
+"""
+Equivalence Checking
+
+This module proves that two combinational circuit boards compute the same
+outputs, or finds a vector of inputs for which they do not, without
+enumerating all vectors, so it works for boards that are far too large for
+truth tables.
+
+Both boards are compiled into one AIG with shared inputs, the miter, whose
+outputs are the XORs of the outputs of the boards that are compared. The
+boards are the same if no miter output can be TRUE. The miter is simulated
+on random vectors first, which finds most differences at once and groups the
+nodes that might be equivalent by their simulated values. Then the nodes are
+swept in order: a node that simulates like an earlier node is proven to be
+equivalent by a SAT solver and merged with it, so later proofs only have to
+reason about the part of the circuit that is different, or the solver finds
+a vector that tells them apart and the groups are split by simulating it.
+This is SAT sweeping, the result is also called a functionally reduced AIG.
+"""
+import random
+
+from aig import AIG, FALSE, TRUE
+from netlist import Netlist
+from sat import Solver
+
+# The number of random vectors simulated before sweeping
+SIMULATION_WIDTH = 1024
+# Proofs of internal nodes give up after this many conflicts, proofs of the
+# outputs never give up
+CONFLICT_LIMIT = 1000
+
+
+class _Sweeper:
+
+    """
+    Builds the functionally reduced AIG of a miter node by node.
+
+    literals maps the nodes of the miter to literals of the reduced AIG, the
+    variables of the solver are the nodes of the reduced AIG.
+    """
+
+    def __init__(self, miter, conflict_limit, seed):
+        self.miter = miter
+        self.conflict_limit = conflict_limit
+        self.reduced = AIG()
+        self.solver = Solver()
+        # Node 0 is FALSE
+        self.solver.add_clause([TRUE])
+        self.encoded = 1
+        self.literals = [None] * len(miter)
+        self.literals[0] = FALSE
+        for node in miter.inputs:
+            self.literals[node] = self.reduced.add_input()
+
+        r = random.Random(seed)
+        self.full = (1 << SIMULATION_WIDTH) - 1
+        self.signatures = miter.run_vectors(
+            [r.getrandbits(SIMULATION_WIDTH) for _ in miter.inputs],
+            SIMULATION_WIDTH)
+
+    def signature(self, literal):
+        """
+        Returns the simulated values of a literal of the miter.
+        """
+        value = self.signatures[literal >> 1]
+        return value ^ self.full if literal & 1 else value
+
+    def simulated_counterexample(self, literal):
+        """
+        Returns a simulated vector for which a literal of the miter is TRUE
+        or None.
+        """
+        bits = self.signature(literal)
+        if not bits:
+            return None
+        bit = (bits & -bits).bit_length() - 1
+        return tuple(bool(self.signatures[node] >> bit & 1)
+                     for node in self.miter.inputs)
+
+    def _key(self, node):
+        """
+        Returns the signature of a node or of its complement, whichever is
+        FALSE for the first vector, so complemented nodes are grouped too.
+        """
+        value = self.signatures[node]
+        return value ^ self.full if value & 1 else value
+
+    def _edge(self, literal):
+        return self.literals[literal >> 1] ^ (literal & 1)
+
+    def _encode(self):
+        """
+        Adds the clauses of the AND nodes of the reduced AIG that are new.
+        """
+        fanins = self.reduced.fanins
+        for node in range(self.encoded, len(fanins)):
+            if fanins[node] is None:
+                continue
+            a, b = fanins[node]
+            output = 2 * node
+            self.solver.add_clause([output ^ 1, a])
+            self.solver.add_clause([output ^ 1, b])
+            self.solver.add_clause([output, a ^ 1, b ^ 1])
+        self.encoded = len(fanins)
+
+    def prove(self, a, b, conflict_limit):
+        """
+        Returns True if two literals of the reduced AIG are equivalent, a
+        vector of the inputs for which they are different if they are not
+        and None if the solver gave up.
+        """
+        if a == b:
+            return True
+        self._encode()
+        for assumptions in ((a, b ^ 1), (a ^ 1, b)):
+            result = self.solver.solve(assumptions, conflict_limit)
+            if result is None:
+                return None
+            if result:
+                return tuple(bool(self.solver.value(2 * node))
+                             for node in self.reduced.inputs)
+        # Knowing that they are equal helps later proofs
+        self.solver.add_clause([a ^ 1, b])
+        self.solver.add_clause([a, b ^ 1])
+        return True
+
+    def _refine(self, vector):
+        """
+        Adds a vector to the signatures.
+        """
+        values = self.miter.run_vectors([int(v) for v in vector], 1)
+        self.signatures = [s << 1 | v
+                           for s, v in zip(self.signatures, values)]
+        self.full = self.full << 1 | 1
+
+    def sweep(self, nodes):
+        """
+        Adds AND nodes of the miter, in order, to the reduced AIG and merges
+        them with earlier nodes that they are proven to be equivalent to.
+        """
+        fanins = self.miter.fanins
+        processed = [0] + self.miter.inputs
+        # Maps keys to the first node that has them
+        groups = {}
+        for node in processed:
+            groups.setdefault(self._key(node), node)
+        for node in nodes:
+            a, b = fanins[node]
+            literal = self.reduced.AND(self._edge(a), self._edge(b))
+            self.literals[node] = literal
+            while True:
+                key = self._key(node)
+                representative = groups.get(key)
+                if representative is None:
+                    groups[key] = node
+                    break
+                complemented = (self.signatures[node] ^
+                                self.signatures[representative]) & 1
+                target = self.literals[representative] ^ complemented
+                result = self.prove(literal, target, self.conflict_limit)
+                if result is True:
+                    self.literals[node] = target
+                    break
+                if result is None:
+                    break
+                self._refine(result)
+                groups = {}
+                for n in processed:
+                    groups.setdefault(self._key(n), n)
+            processed.append(node)
+
+    def check(self, literal):
+        """
+        Returns None if a literal of the miter is always FALSE, otherwise a
+        vector for which it is TRUE.
+        """
+        result = self.prove(self._edge(literal), FALSE, None)
+        return None if result is True else result
+
+
+def _pairs(a, b, mapping, kind):
+    """
+    Returns the indices in b of the components of a.
+    """
+    if mapping is None:
+        if len(a) != len(b):
+            raise ValueError("The boards have {} and {} {}"
+                             .format(len(a), len(b), kind))
+        return list(range(len(b)))
+    positions = {c: i for i, c in enumerate(b)}
+    indices = []
+    for c in a:
+        if c not in mapping:
+            raise ValueError("{!r} is not mapped".format(c))
+        if mapping[c] not in positions:
+            raise ValueError("{!r} is not one of the {} of the other board"
+                             .format(mapping[c], kind))
+        indices.append(positions[mapping[c]])
+    if len(set(indices)) != len(indices):
+        raise ValueError("Two {} are mapped to the same component"
+                         .format(kind))
+    return indices
+
+
+def miter(board_a, board_b, mapping=None):
+    """
+    Returns the miter of two circuit boards as an AIG.
+
+    The inputs of the miter are the inputs of board_a and its outputs are
+    the XORs of every output of board_a and the output of board_b it is
+    compared to. mapping maps the Inputs and Outputs of board_a to the ones
+    of board_b, if it is None they are paired in the order they are on the
+    boards. Every input of board_b has to be paired.
+    """
+    compiled_a = board_a.compile()
+    compiled_b = board_b.compile()
+    input_pairs = _pairs(compiled_a.inputs, compiled_b.inputs, mapping,
+                         "inputs")
+    if len(compiled_a.inputs) != len(compiled_b.inputs):
+        raise ValueError("The boards have {} and {} inputs"
+                         .format(len(compiled_a.inputs),
+                                 len(compiled_b.inputs)))
+    output_pairs = _pairs(compiled_a.outputs, compiled_b.outputs, mapping,
+                          "outputs")
+
+    aig = AIG()
+    inputs = [aig.add_input() for _ in compiled_a.inputs]
+    inputs_b = [None] * len(inputs)
+    for i, j in enumerate(input_pairs):
+        inputs_b[j] = inputs[i]
+    outputs_a = aig.add_netlist(Netlist.from_compiled(compiled_a), inputs)
+    outputs_b = aig.add_netlist(Netlist.from_compiled(compiled_b), inputs_b)
+    for output, j in zip(outputs_a, output_pairs):
+        aig.add_output(aig.XOR(output, outputs_b[j]))
+    return aig
+
+
+def equivalent(board_a, board_b, mapping=None, conflict_limit=CONFLICT_LIMIT,
+               seed=0):
+    """
+    Returns (True, None) if two combinational circuit boards have the same
+    outputs for all inputs and (False, vector) otherwise.
+
+    vector holds the outputs of the inputs of board_a, in the order they are
+    on the board, for which an output is different. See miter for mapping.
+    conflict_limit limits how hard the solver tries to prove that two
+    internal nodes are equivalent, it does not change the result.
+    """
+    aig = miter(board_a, board_b, mapping)
+    sweeper = _Sweeper(aig, conflict_limit, seed)
+    for output in aig.outputs:
+        vector = sweeper.simulated_counterexample(output)
+        if vector is not None:
+            return False, vector
+
+    # Only the nodes the outputs depend on are swept
+    needed = set()
+    stack = [output >> 1 for output in aig.outputs]
+    while stack:
+        node = stack.pop()
+        if node in needed or not aig.is_and(node):
+            continue
+        needed.add(node)
+        stack.extend(literal >> 1 for literal in aig.fanins[node])
+    sweeper.sweep(sorted(needed))
+
+    for output in aig.outputs:
+        vector = sweeper.check(output)
+        if vector is not None:
+            return False, vector
+    return True, None
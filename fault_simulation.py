@@ -0,0 +1,253 @@
+"""
+Fault Simulation
+
+This module grades test vectors by the stuck-at faults they detect. A stuck-at
+fault makes a signal always output FALSE or TRUE. It is detected by a vector
+if an output of the faulty circuit is different from the output of the good
+circuit.
+
+Circuits are netlist.Netlist objects, circuit boards are converted, so the
+faults are on nodes of the netlist, which are the nodes of
+CompiledBoard.node. A fault is a tuple (node, fanin, value), where fanin is
+None for a fault on the output of the node and otherwise the index of the
+fanin of the node the fault is on, which is only different from a fault on
+the output of the fanin if the fanin is read more than once.
+
+Many vectors are simulated at once by storing one vector per bit of an int,
+like CompiledBoard.run_vectors. The good circuit is simulated once for every
+word of vectors, then every fault is injected on its own and only the nodes
+it changes are evaluated again. Faults that are detected are dropped and not
+simulated again.
+"""
+import heapq
+
+from logic_circuit import (OP_NONE, OP_FALSE, OP_TRUE, OP_NOT,
+                           OP_AND, OP_OR, OP_NAND, OP_NOR, OP_BUF)
+import logic_circuit
+from netlist import Netlist, evaluate_word
+
+# The number of vectors that are simulated at once
+WORD_SIZE = 256
+
+# For gates where a fault on an input is equivalent to a fault on the output
+# the value of the input fault maps to the value of the output fault
+_EQUIVALENT_FAULTS = {OP_AND: {False: False},
+                      OP_NAND: {False: True},
+                      OP_OR: {True: True},
+                      OP_NOR: {True: False},
+                      OP_NOT: {False: True, True: False},
+                      OP_BUF: {False: False, True: True}}
+
+
+def _netlist(circuit):
+    if isinstance(circuit, logic_circuit.CircuitBoard):
+        return Netlist.from_board(circuit)
+    return circuit
+
+
+def _fanout_counts(netlist):
+    """
+    Returns how often every node is read, being an output counts as well.
+    """
+    counts = [0] * len(netlist)
+    for node in netlist.fanin_ids:
+        counts[node] += 1
+    for node in netlist.outputs:
+        counts[node] += 1
+    return counts
+
+
+def fault_list(circuit, collapse=True):
+    """
+    Returns the stuck-at faults of a netlist or a circuit board.
+
+    There are faults on the output of every node that is not a constant and
+    on every fanin of a node that is read more than once. If collapse is True
+    only one fault of every group of equivalent faults is kept, faults on the
+    inputs of gates that are detected by the same vectors as a fault on the
+    output are left out. The faults are sorted by node.
+    """
+    netlist = _netlist(circuit)
+    types = netlist.types
+    counts = _fanout_counts(netlist)
+
+    def has_faults(node):
+        return types[node] not in (OP_NONE, OP_FALSE, OP_TRUE)
+
+    def line_fault(node, index, fanin, value):
+        # A line that is not a branch is the output of the fanin
+        if counts[fanin] == 1:
+            return (fanin, None, value)
+        return (node, index, value)
+
+    faults = []
+    for node in range(len(netlist)):
+        if not has_faults(node):
+            continue
+        for index, fanin in enumerate(netlist.fanins(node)):
+            if has_faults(fanin) and counts[fanin] > 1:
+                faults.append((node, index, False))
+                faults.append((node, index, True))
+        faults.append((node, None, False))
+        faults.append((node, None, True))
+    if not collapse:
+        return faults
+
+    # Union find, every fault points towards the fault representing it
+    parents = {fault: fault for fault in faults}
+
+    def find(fault):
+        while parents[fault] != fault:
+            parents[fault] = parents[parents[fault]]
+            fault = parents[fault]
+        return fault
+
+    for node in range(len(netlist)):
+        equivalent = _EQUIVALENT_FAULTS.get(types[node])
+        if equivalent is None or not has_faults(node):
+            continue
+        for index, fanin in enumerate(netlist.fanins(node)):
+            if not has_faults(fanin):
+                continue
+            for value, output_value in equivalent.items():
+                parents[find(line_fault(node, index, fanin, value))] =\
+                    find((node, None, output_value))
+    return [fault for fault in faults if find(fault) == fault]
+
+
+class FaultSimulator:
+
+    """
+    Simulates stuck-at faults of a netlist or a circuit board.
+
+    faults defaults to the collapsed fault_list. detected maps the detected
+    faults to the index of the first vector that detected them.
+    """
+
+    def __init__(self, circuit, faults=None, word_size=WORD_SIZE):
+        self.netlist = _netlist(circuit)
+        self.faults = fault_list(self.netlist) if faults is None\
+            else list(faults)
+        self.word_size = word_size
+        self.detected = {}
+        self.vectors = 0
+        netlist = self.netlist
+        self._fanins = [tuple(netlist.fanins(node))
+                        for node in range(len(netlist))]
+        self._fanouts = [[] for _ in range(len(netlist))]
+        for node, fanins in enumerate(self._fanins):
+            for fanin in dict.fromkeys(fanins):
+                self._fanouts[fanin].append(node)
+        self._outputs = set(netlist.outputs)
+
+    @property
+    def undetected(self):
+        return [fault for fault in self.faults if fault not in self.detected]
+
+    @property
+    def coverage(self):
+        """
+        The fraction of the faults that have been detected.
+        """
+        if not self.faults:
+            return 1.0
+        return len(self.detected) / len(self.faults)
+
+    def simulate(self, vectors):
+        """
+        Simulates vectors and returns the faults they detected first.
+
+        Every vector is a sequence of the values of the inputs of the
+        netlist.
+        """
+        detected = {}
+        word = []
+        for vector in vectors:
+            if len(vector) != len(self.netlist.inputs):
+                raise ValueError("Expected {} inputs but got {}"
+                                 .format(len(self.netlist.inputs),
+                                         len(vector)))
+            word.append(vector)
+            if len(word) == self.word_size:
+                detected.update(self._simulate_word(word))
+                word = []
+        if word:
+            detected.update(self._simulate_word(word))
+        return detected
+
+    def _simulate_word(self, word):
+        inputs = [0] * len(self.netlist.inputs)
+        for bit, vector in enumerate(word):
+            for i, value in enumerate(vector):
+                if value:
+                    inputs[i] |= 1 << bit
+        full = (1 << len(word)) - 1
+        good = self.netlist.run_vectors(inputs, len(word))
+        detected = {}
+        for fault in self.faults:
+            if fault in self.detected:
+                continue
+            bits = self.detect(fault, good, full)
+            if bits:
+                # The index of the lowest bit that is set
+                index = self.vectors + (bits & -bits).bit_length() - 1
+                self.detected[fault] = index
+                detected[fault] = index
+        self.vectors += len(word)
+        return detected
+
+    def detect(self, fault, good, full):
+        """
+        Returns the vectors of a word that detect a fault as the bits of an
+        int.
+
+        good are the values of all nodes in the good circuit, as returned by
+        Netlist.run_vectors for words of full.
+        """
+        node, index, value = fault
+        types = self.netlist.types
+        fanins = self._fanins
+        fanouts = self._fanouts
+        outputs = self._outputs
+        stuck = full if value else 0
+        if index is None:
+            faulty_value = stuck
+        else:
+            values = [good[f] for f in fanins[node]]
+            values[index] = stuck
+            faulty_value = evaluate_word(types[node], values, full)
+        if good[node] is None or faulty_value is None or\
+                faulty_value == good[node]:
+            return 0
+
+        faulty = {node: faulty_value}
+        detected = faulty_value ^ good[node] if node in outputs else 0
+        queue = list(fanouts[node])
+        heapq.heapify(queue)
+        queued = set(queue)
+        # Nodes are evaluated in order, so the fanins are always final
+        while queue:
+            n = heapq.heappop(queue)
+            value = evaluate_word(types[n],
+                                  [faulty.get(f, good[f]) for f in fanins[n]],
+                                  full)
+            if value is None or good[n] is None or value == good[n]:
+                continue
+            faulty[n] = value
+            if n in outputs:
+                detected |= value ^ good[n]
+            for reader in fanouts[n]:
+                if reader not in queued:
+                    queued.add(reader)
+                    heapq.heappush(queue, reader)
+        return detected
+
+
+def fault_coverage(circuit, vectors, faults=None):
+    """
+    Returns the fraction of the faults of a netlist or a circuit board that
+    are detected by vectors.
+    """
+    simulator = FaultSimulator(circuit, faults)
+    simulator.simulate(vectors)
+    return simulator.coverage
@@ -60,22 +60,53 @@ class Component:
 
         This does not change the output of the components.
         """
-        for c in board.copy():
-            while self in c:
-                index = tuple(c.inputs.values()).index(self)
-                key = tuple(c.inputs.keys())[index]
-                c.inputs[key] = None
+        _disconnect_readers(self, board)
         # fixes possible memory leak
         self.inputs = {k: None for k, v in self.inputs.items()}
 
 
+# Gates with more inputs than this are evaluated with subs instead of a table
+LOOKUP_TABLE_MAX_INPUTS = 16
+
+
+def _disconnect_readers(component, board):
+    """
+    Disconnects all inputs of the components in the board that read from a
+    component.
+
+    A CircuitBoard knows the readers of a component, so only they are looked
+    at, otherwise every component in the board is. Readers whose inputs were
+    changed directly are indexed again first, see CircuitBoard.check_index.
+    """
+    if isinstance(board, CircuitBoard):
+        readers = board.readers(component)
+        for c in readers:
+            if board._is_stale(c):
+                board._index_rewire(c)
+        connect = board.connect
+    else:
+        readers = board
+
+        def connect(c, key, driver):
+            c.inputs[key] = driver
+    for c in readers:
+        for key in [k for k, v in c.inputs.items() if v is component]:
+            connect(c, key, None)
+
+
 class Gate(Component):
 
     """
     Base class for all logic gates.
 
     Logic gates contain expressions which are evaluated on inputs. 
+
+    The expression is compiled into a truth table the first time the gate is
+    updated, so updating does not create any expressions. The table only
+    depends on the expression, so inputs can be rewired freely.
     """
+    # (symbols, truth table) of the expression, see lookup_table
+    _lookup_table = None
 
     def __init__(self,
                  expression=None,
@@ -95,7 +126,8 @@ class Gate(Component):
             for symbol in (s for s in expression.symbols.copy()):
                            # if s.obj != None):
                 new_symbol = boolean.Symbol(None)
-                expression = expression.subs({symbol: new_symbol})
+                expression = expression.subs({symbol: new_symbol},
+                                             eval=False)
                 if input_dict.get(symbol) is not None:
                     new_input_dict[new_symbol] = input_dict[symbol]
                 elif input_dict.get(str(symbol)) is not None:
@@ -127,17 +159,94 @@ class Gate(Component):
     def expression(self):
         return self._expression
 
-    def update(self):
-        inputs = self.inputs
+    @property
+    def lookup_table(self):
+        """
+        Returns the symbols of the expression and its truth table.
+
+        Bit i of the truth table is the output when the outputs of the inputs
+        of the symbols, read as a binary number with the first symbol as the
+        most significant bit, are i. The table is None if the gate has more
+        than LOOKUP_TABLE_MAX_INPUTS inputs.
+        """
+        if self._lookup_table is None:
+            symbols = tuple(self.expression.symbols)
+            if len(symbols) > LOOKUP_TABLE_MAX_INPUTS:
+                table = None
+            else:
+                table = boolean.to_bitset(self.expression, symbols)
+            self._lookup_table = (symbols, table)
+        return self._lookup_table
+
+    def evaluate(self, outputs=None, ternary=False):
+        """
+        Returns what the output of the gate would be after updating it.
 
-        # If not any values in the dictionary are None
-        if not any(True for v in inputs.values()
-                   if v is None or v.output is None):
-            subs_dict = {k: v.output for k, v in inputs.items()
+        outputs maps components to their outputs and can be used to evaluate
+        the gate on other outputs than the current ones of its inputs.
+
+        Normally the output is None if the output of any input is None. If
+        ternary is True None is an unknown output instead, and the output is
+        only None if it depends on the unknown outputs, so a NOR gate with a
+        TRUE input outputs FALSE. Inputs that are not connected still make
+        the output None.
+        """
+        inputs = self.inputs
+        unknown = False
+        # If any input or its output is None
+        for v in inputs.values():
+            if v is None:
+                return None
+            if (v.output if outputs is None else outputs[v]) is None:
+                if not ternary:
+                    return None
+                unknown = True
+        symbols, table = self.lookup_table
+        if unknown:
+            if table is None:
+                return None
+            return self._evaluate_unknown(outputs, symbols, table)
+        if table is None:
+            subs_dict = {k: v.output if outputs is None else outputs[v]
+                         for k, v in inputs.items()
                          if k in self.expression.symbols}
-            self._output = bool(self.expression.subs(subs_dict))
+            return bool(self.expression.subs(subs_dict))
+        index = 0
+        if outputs is None:
+            for s in symbols:
+                index = index << 1 | inputs[s].output
         else:
-            self._output = None
+            for s in symbols:
+                index = index << 1 | outputs[inputs[s]]
+        return bool(table >> index & 1)
+
+    def _evaluate_unknown(self, outputs, symbols, table):
+        """
+        Returns the output if it is the same for all values of the unknown
+        outputs of the inputs, otherwise None.
+        """
+        index = 0
+        unknown_bits = []
+        for i, s in enumerate(symbols):
+            v = self.inputs[s]
+            output = v.output if outputs is None else outputs[v]
+            if output is None:
+                unknown_bits.append(len(symbols) - 1 - i)
+                output = False
+            index = index << 1 | output
+        results = set()
+        for values in range(1 << len(unknown_bits)):
+            i = index
+            for j, bit in enumerate(unknown_bits):
+                if values >> j & 1:
+                    i |= 1 << bit
+            results.add(table >> i & 1)
+            if len(results) == 2:
+                return None
+        return bool(results.pop())
+
+    def update(self):
+        self._output = self.evaluate()
 
 
 # The following classes are just for ease of programming
@@ -196,6 +305,28 @@ class Nor(Gate):
                       anonymous_symbols=anonymous_symbols)
 
 
+class Xor(Gate):
+
+    def __init__(self,
+                 inputs=(None, None),
+                 anonymous_symbols=True):
+        Gate.__init__(self,
+                      expression="A⊕B",
+                      input_dict={"A": inputs[0], "B": inputs[1]},
+                      anonymous_symbols=anonymous_symbols)
+
+
+class Xnor(Gate):
+
+    def __init__(self,
+                 inputs=(None, None),
+                 anonymous_symbols=True):
+        Gate.__init__(self,
+                      expression="A⊙B",
+                      input_dict={"A": inputs[0], "B": inputs[1]},
+                      anonymous_symbols=anonymous_symbols)
+
+
 # A wire is just a repeater gate
 # Each wire contributes to the propagation delay
 class Wire(Gate):
@@ -269,11 +400,7 @@ class Input(Component):
 
     def remove(self, board):
         # inputs = {} for all Inputs
-        for c in board.copy():
-            if self in c:
-                index = tuple(c.inputs.values()).index(self)
-                key = tuple(c.inputs.keys())[index]
-                c.inputs[key] = None
+        _disconnect_readers(self, board)
 
 
 class Switch(Input):
@@ -320,10 +447,15 @@ class CircuitBoard(list):
 
     Splices of circuit boards should only be read from and not updated.
     """
+    # Maps components to the components that read from them, see reindex
+    _fanout = None
+    # Records what every update does if it is set, see activity.py
+    profiler = None
 
     def __init__(self,
                  component_list=[]):
         super().__init__(component_list)
+        self._fanout = None
 
     def update(self):
         """
@@ -347,15 +479,373 @@ class CircuitBoard(list):
             if isinstance(component, Output):
                 return 4
             return 3
-        for c in sorted(self, key=sort_key):
-
+        components = sorted(self, key=sort_key)
+        profiler = self.profiler
+        if profiler is None:
+            for c in components:
+                c.update()
+            return
+        for c in components:
             c.update()
+        # Inputs are not simulated, they are set from outside
+        components = [c for c in components if not isinstance(c, Input)]
+        profiler.tick(components, components)
+
+    def reindex(self):
+        """
+        Rebuilds the index of which components read from which components.
+
+        The index is kept up to date when components are added to or removed
+        from the board and when they are rewired with connect and disconnect.
+        Inputs of components that are already on the board that are changed
+        directly, like with Wire.input, are only found by check_index or by
+        rebuilding the index, one of which has to be called before the board
+        is settled or components are removed from it.
+        """
+        self._fanout = {}
+        # The drivers every component was indexed with
+        self._indexed = {}
+        self._board_inputs = {}
+        # Outputs of the inputs when the board was last settled
+        self._settled_outputs = {}
+        # Components that have to be updated by the next settle
+        self._pending = {}
+        for c in self:
+            self._index_add(c)
+
+    def _index_add(self, component):
+        self._index_drivers(component)
+        if isinstance(component, Input):
+            self._board_inputs[component] = None
+        else:
+            self._pending[component] = None
+
+    def _index_drivers(self, component):
+        fanout = self._fanout
+        drivers = tuple(v for v in component.inputs.values() if v is not None)
+        for v in drivers:
+            # Counts how many inputs of the reader are connected to v
+            readers = fanout.setdefault(v, {})
+            readers[component] = readers.get(component, 0) + 1
+        self._indexed[component] = drivers
+
+    def _index_discard(self, component):
+        # The drivers the component was indexed with, its inputs might have
+        # been changed since
+        for v in self._indexed.pop(component, ()):
+            self._index_disconnect(component, v)
+        self._board_inputs.pop(component, None)
+        self._settled_outputs.pop(component, None)
+        self._pending.pop(component, None)
+
+    def _index_disconnect(self, component, driver):
+        readers = self._fanout[driver]
+        readers[component] -= 1
+        if not readers[component]:
+            del readers[component]
+            if not readers:
+                del self._fanout[driver]
+
+    def _index_rewire(self, component):
+        for v in self._indexed.pop(component, ()):
+            self._index_disconnect(component, v)
+        self._index_drivers(component)
+        if not isinstance(component, Input):
+            self._pending[component] = None
+
+    def check_index(self):
+        """
+        Finds the components on the board whose inputs were changed without
+        connect and updates the index for them, so they are updated by the
+        next settle. Returns the number of components that were found.
+
+        This looks at every input on the board.
+        """
+        if self._fanout is None:
+            self.reindex()
+            return 0
+        stale = [c for c in self if self._is_stale(c)]
+        for c in stale:
+            self._index_rewire(c)
+        return len(stale)
+
+    def _is_stale(self, component):
+        """
+        Returns if the inputs of a component are not the ones it was indexed
+        with.
+        """
+        drivers = self._indexed.get(component, ())
+        n = 0
+        for v in component.inputs.values():
+            if v is not None:
+                if n == len(drivers) or drivers[n] is not v:
+                    return True
+                n += 1
+        return n != len(drivers)
+
+    def readers(self, component):
+        """
+        Returns the components on the board that read from a component.
+        """
+        if self._fanout is None:
+            self.reindex()
+        return tuple(self._fanout.get(component, ()))
+
+    def drivers(self, component):
+        """
+        Returns the components that a component reads from.
+        """
+        return tuple(dict.fromkeys(v for v in component.inputs.values()
+                                   if v is not None))
+
+    def connect(self, component, key, driver):
+        """
+        Connects the input key of a component on the board to a driver.
+
+        Connecting to None disconnects the input.
+        """
+        old = component.inputs.get(key)
+        component.inputs[key] = driver
+        if self._fanout is None or old is driver:
+            return
+        self._index_rewire(component)
+
+    def disconnect(self, component, key):
+        """
+        Disconnects the input key of a component on the board.
+        """
+        self.connect(component, key, None)
 
+    def settle(self, max_iterations=None):
+        """
+        Updates components until no output changes anymore.
+
+        Returns the number of iterations this took, where every iteration
+        updates all components that read from a component whose output changed
+        in the previous one. The first time every component is updated, after
+        that only the inputs whose output changed since the last call and
+        components that were added or rewired start the propagation, so
+        toggling one switch only updates the components that depend on it.
+
+        A board that never settles, like a NOT gate reading its own output,
+        would update forever, max_iterations limits the number of iterations.
+        If the limit is reached, the components the next iteration would have
+        updated stay pending and the next call continues with them, so
+        settled is False until a call finishes.
+        """
+        if self._fanout is None:
+            self.reindex()
+        fanout = self._fanout
+        pending = self._pending
+        self._pending = {}
+        settled_outputs = self._settled_outputs
+        for c in self._board_inputs:
+            if c.output != settled_outputs.get(c):
+                pending.update(dict.fromkeys(fanout.get(c, ())))
+                settled_outputs[c] = c.output
+
+        profiler = self.profiler
+        iterations = 0
+        while pending and (max_iterations is None or
+                           iterations < max_iterations):
+            iterations += 1
+            changed = []
+            for c in pending:
+                output = c.output
+                c.update()
+                if c.output != output:
+                    changed.append(c)
+            if profiler is not None:
+                profiler.tick(pending, changed)
+            pending = {}
+            for c in changed:
+                pending.update(dict.fromkeys(fanout.get(c, ())))
+        # Work that was cut off by max_iterations is done by the next call
+        self._pending.update(pending)
+        return iterations
+
+    @property
+    def settled(self):
+        """
+        Returns False if the last call of settle stopped at max_iterations
+        before every output stopped changing, or if components were added or
+        rewired since.
+        """
+        if self._fanout is None:
+            return False
+        return not self._pending
+
+    # Replacing components drops the index, it is rebuilt when it is needed
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._fanout = None
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._fanout = None
+
+    def clear(self):
+        super().clear()
+        self._fanout = None
+
+    def __iadd__(self, other):
+        other = list(other)
+        super().__iadd__(other)
+        if self._fanout is not None:
+            for c in other:
+                self._index_add(c)
+        return self
+
+    def append(self, value):
+        super().append(value)
+        if self._fanout is not None:
+            self._index_add(value)
+
+    def extend(self, values):
+        values = list(values)
+        super().extend(values)
+        if self._fanout is not None:
+            for c in values:
+                self._index_add(c)
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        if self._fanout is not None:
+            self._index_add(value)
+
+    def pop(self, index=-1):
+        value = super().pop(index)
+        if self._fanout is not None:
+            self._index_discard(value)
+        return value
 
     def remove(self, value):
         super().remove(value)
+        # The index has to forget the inputs of value before they are cleared
+        if self._fanout is not None:
+            self._index_discard(value)
         value.remove(self)
 
+    def strongly_connected_components(self):
+        """
+        Returns the strongly connected components of the board.
+
+        A strongly connected component is a tuple of components that can all
+        reach each other through their inputs, like the gates of a latch. The
+        tuples are in topological order, so a tuple only reads from components
+        in tuples before it or in itself. Components that are not part of a
+        feedback loop are a tuple on their own.
+
+        This uses Tarjan's algorithm without recursion, so deep boards work.
+        """
+        on_board = set(self)
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root in self:
+            if root in index:
+                continue
+            # (component, iterator over the components it reads from)
+            work = [(root, iter(self.drivers(root)))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                c, drivers = work[-1]
+                for driver in drivers:
+                    if driver not in on_board:
+                        continue
+                    if driver not in index:
+                        index[driver] = lowlink[driver] = len(index)
+                        stack.append(driver)
+                        on_stack.add(driver)
+                        work.append((driver, iter(self.drivers(driver))))
+                        break
+                    elif driver in on_stack:
+                        lowlink[c] = min(lowlink[c], index[driver])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[c])
+                    if lowlink[c] == index[c]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member is c:
+                                break
+                        components.append(tuple(reversed(component)))
+        return components
+
+    def solve(self, max_iterations=100):
+        """
+        Settles the board, including feedback loops like latches.
+
+        The strongly connected components are updated in topological order.
+        Components that are not in a feedback loop are updated once. The
+        components of a feedback loop are updated again and again until their
+        outputs do not change anymore. Gates are evaluated with unknown None
+        outputs, see Gate.evaluate, so a latch that has not been set yet can
+        be set.
+
+        Returns the number of updates. Raises OscillationError if a feedback
+        loop gets back to outputs it had before or does not settle within
+        max_iterations.
+        """
+        def update(c):
+            if isinstance(c, Gate):
+                c._output = c.evaluate(ternary=True)
+            else:
+                c.update()
+
+        profiler = self.profiler
+        # Every update, in order, if there is a profiler
+        updated = []
+        updates = 0
+        for component in self.strongly_connected_components():
+            c = component[0]
+            if len(component) == 1 and c not in self.drivers(c):
+                update(c)
+                updates += 1
+                if profiler is not None and not isinstance(c, Input):
+                    updated.append(c)
+                continue
+            state = tuple(c.output for c in component)
+            seen = set()
+            for _ in range(max_iterations):
+                seen.add(state)
+                for c in component:
+                    update(c)
+                updates += len(component)
+                if profiler is not None:
+                    updated.extend(component)
+                new_state = tuple(c.output for c in component)
+                if new_state == state:
+                    break
+                if new_state in seen:
+                    raise OscillationError("The feedback loop oscillates",
+                                           component)
+                state = new_state
+            else:
+                raise OscillationError(
+                    "The feedback loop did not settle within {} iterations"
+                    .format(max_iterations), component)
+        if profiler is not None:
+            profiler.tick(updated, updated)
+        return updates
+
+    def compile(self):
+        """
+        Returns a CompiledBoard of the board.
+
+        This raises RecursionError if any component is self referencing.
+        """
+        return CompiledBoard(self)
+
 
 # TODO: Make this accept the component in question
 class RecursionError(Exception):
@@ -366,54 +856,421 @@ class RecursionError(Exception):
     pass
 
 
-def expression(component, anonymous_symbols=False):
+# Opcodes of the nodes of a compiled board
+OP_INPUT = 0
+OP_NONE = 1
+OP_FALSE = 2
+OP_TRUE = 3
+OP_NOT = 4
+OP_AND = 5
+OP_OR = 6
+OP_NAND = 7
+OP_NOR = 8
+OP_XOR = 9
+OP_XNOR = 10
+# Buffers are never created by compiling, wires are collapsed instead
+OP_BUF = 11
+
+
+class CompiledBoard:
+
+    """
+    A circuit board compiled into a levelized netlist.
+
+    Every node has an integer id, an opcode and a tuple of the ids of its
+    fanins. Nodes are sorted by level, so the fanins of a node always have a
+    smaller id and a single pass over the nodes settles the whole circuit.
+    The inputs are the first nodes. Wires are collapsed into the component
+    that drives them and the expressions of gates are split into one node per
+    operation. Components that would output None, because one of the inputs
+    they depend on is not connected, are OP_NONE nodes.
+
+    The compiled board does not change when the circuit board is changed.
+    """
+
+    def __init__(self, board):
+        # Temporary nodes as (opcode, fanins), sorted by level later on
+        nodes = []
+        levels = []
+
+        def add(opcode, fanins=()):
+            nodes.append((opcode, tuple(fanins)))
+            levels.append(1 + max((levels[i] for i in fanins), default=-1))
+            return len(nodes) - 1
+
+        none_node = add(OP_NONE)
+        constant_nodes = {boolean.FALSE: add(OP_FALSE),
+                          boolean.TRUE: add(OP_TRUE)}
+        inputs = [c for c in board if isinstance(c, Input)]
+        component_nodes = {c: add(OP_INPUT) for c in inputs}
+
+        # Opcodes of operations and of their complements
+        operations = ((boolean.AND, OP_AND, OP_NAND),
+                      (boolean.OR, OP_OR, OP_NOR),
+                      (boolean.XOR, OP_XOR, OP_XNOR),
+                      (boolean.XNOR, OP_XNOR, OP_XOR))
+
+        def add_expression(e, symbol_nodes):
+            """
+            Adds a node for every operation in an expression.
+            """
+            if isinstance(e, boolean.Symbol):
+                return symbol_nodes[e]
+            elif isinstance(e, boolean.BaseElement):
+                return constant_nodes[e]
+            inverted = False
+            if isinstance(e, boolean.NOT):
+                if not any(True for operation, _, _ in operations
+                           if isinstance(e.args[0], operation)):
+                    return add(OP_NOT, (add_expression(e.args[0],
+                                                       symbol_nodes),))
+                # NAND and NOR are a single node
+                e = e.args[0]
+                inverted = True
+            for operation, opcode, inverted_opcode in operations:
+                if isinstance(e, operation):
+                    fanins = [add_expression(arg, symbol_nodes)
+                              for arg in e.args]
+                    return add(inverted_opcode if inverted else opcode,
+                               fanins)
+            raise TypeError("Cannot compile expression of type {}"
+                            .format(e.__class__))
+
+        for component in board:
+            # Depth first search without recursion, so deep boards work
+            stack = [(component, False)]
+            visiting = set()
+            while stack:
+                c, expanded = stack.pop()
+                if c in component_nodes:
+                    continue
+                if not isinstance(c, Gate):
+                    if isinstance(c, Input):
+                        inputs.append(c)
+                        component_nodes[c] = add(OP_INPUT)
+                    else:
+                        component_nodes[c] = none_node
+                elif not expanded:
+                    if c in visiting:
+                        raise RecursionError(
+                            "The logic circuit is self referencing and cannot be compiled")
+                    visiting.add(c)
+                    stack.append((c, True))
+                    for v in c.inputs.values():
+                        if v is not None and v not in component_nodes:
+                            stack.append((v, False))
+                else:
+                    visiting.discard(c)
+                    drivers = c.inputs
+                    if any(True for v in drivers.values()
+                           if v is None or component_nodes[v] == none_node):
+                        component_nodes[c] = none_node
+                    else:
+                        symbol_nodes = {k: component_nodes[v]
+                                        for k, v in drivers.items()}
+                        component_nodes[c] = add_expression(c.expression,
+                                                            symbol_nodes)
+
+        # Sort the nodes by level, with the inputs first
+        order = sorted(range(len(nodes)),
+                       key=lambda i: (levels[i], nodes[i][0] != OP_INPUT))
+        new_ids = {old: new for new, old in enumerate(order)}
+        self.opcodes = tuple(nodes[i][0] for i in order)
+        self.fanins = tuple(tuple(new_ids[j] for j in nodes[i][1])
+                            for i in order)
+        self.levels = tuple(levels[i] for i in order)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(c for c in board if isinstance(c, Output))
+        self._nodes = {c: new_ids[i] for c, i in component_nodes.items()}
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def node(self, component):
+        """
+        Returns the id of the node that has the output of a component.
+        """
+        return self._nodes[component]
+
+    def run(self, inputs=None):
+        """
+        Returns the outputs of all nodes.
+
+        The inputs are the outputs of self.inputs, in the same order. If they
+        are not given the current outputs of the inputs are used.
+        """
+        if inputs is None:
+            inputs = [c.output for c in self.inputs]
+        elif len(inputs) != len(self.inputs):
+            raise ValueError("Expected {} inputs but got {}"
+                             .format(len(self.inputs), len(inputs)))
+        values = [bool(v) for v in inputs]
+        values.extend([None] * (len(self.opcodes) - len(values)))
+        fanins = self.fanins
+        for node in range(len(self.inputs), len(self.opcodes)):
+            opcode = self.opcodes[node]
+            if opcode == OP_AND:
+                value = all(values[i] for i in fanins[node])
+            elif opcode == OP_OR:
+                value = any(values[i] for i in fanins[node])
+            elif opcode == OP_NOT:
+                value = not values[fanins[node][0]]
+            elif opcode == OP_BUF:
+                value = values[fanins[node][0]]
+            elif opcode == OP_NAND:
+                value = not all(values[i] for i in fanins[node])
+            elif opcode == OP_NOR:
+                value = not any(values[i] for i in fanins[node])
+            elif opcode == OP_XOR:
+                value = sum(values[i] for i in fanins[node]) % 2 == 1
+            elif opcode == OP_XNOR:
+                value = sum(values[i] for i in fanins[node]) % 2 == 0
+            elif opcode == OP_TRUE:
+                value = True
+            elif opcode == OP_FALSE:
+                value = False
+            else:
+                value = None
+            values[node] = value
+        return values
+
+    def output_values(self, inputs=None):
+        """
+        Returns the outputs of self.outputs for the given inputs.
+        """
+        values = self.run(inputs)
+        return tuple(values[self._nodes[c]] for c in self.outputs)
+
+    def run_vectors(self, inputs, width):
+        """
+        Returns the outputs of all nodes for many input vectors at once.
+
+        Every input is an int that holds one input vector per bit, bit i of
+        all inputs is vector i, and there are width vectors. Every node is
+        evaluated for all vectors with a single bitwise operation. The outputs
+        are ints in the same way or None.
+        """
+        if len(inputs) != len(self.inputs):
+            raise ValueError("Expected {} inputs but got {}"
+                             .format(len(self.inputs), len(inputs)))
+        full = (1 << width) - 1
+        values = [v & full for v in inputs]
+        values.extend([None] * (len(self.opcodes) - len(values)))
+        fanins = self.fanins
+        for node in range(len(self.inputs), len(self.opcodes)):
+            opcode = self.opcodes[node]
+            f = fanins[node]
+            if opcode == OP_AND or opcode == OP_NAND:
+                value = values[f[0]]
+                for i in f[1:]:
+                    value &= values[i]
+            elif opcode == OP_OR or opcode == OP_NOR:
+                value = values[f[0]]
+                for i in f[1:]:
+                    value |= values[i]
+            elif opcode == OP_XOR or opcode == OP_XNOR:
+                value = values[f[0]]
+                for i in f[1:]:
+                    value ^= values[i]
+            elif opcode == OP_NOT:
+                value = values[f[0]] ^ full
+            elif opcode == OP_BUF:
+                value = values[f[0]]
+            elif opcode == OP_TRUE:
+                value = full
+            elif opcode == OP_FALSE:
+                value = 0
+            else:
+                value = None
+            if opcode in (OP_NAND, OP_NOR, OP_XNOR):
+                value ^= full
+            values[node] = value
+        return values
+
+    def truth_tables(self, chunk_inputs=16):
+        """
+        Returns the truth tables of the outputs of self.outputs.
+
+        Every truth table is an int like boolean.to_bitset returns, bit i is
+        the output when the inputs, read as a binary number with the first
+        input as the most significant bit, are i. It is None for outputs that
+        are None. All input vectors are simulated in chunks of
+        2 ** chunk_inputs vectors with run_vectors.
+        """
+        n = len(self.inputs)
+        chunk = min(n, chunk_inputs)
+        width = 1 << chunk
+        full = (1 << width) - 1
+        masks = boolean.variable_bitsets(chunk)
+        output_nodes = [self._nodes[c] for c in self.outputs]
+        tables = [0] * len(output_nodes)
+        for chunk_index in range(1 << (n - chunk)):
+            inputs = []
+            for i in range(n):
+                v = n - 1 - i
+                if v < chunk:
+                    inputs.append(masks[v])
+                else:
+                    inputs.append(full if chunk_index >> (v - chunk) & 1
+                                  else 0)
+            values = self.run_vectors(inputs, width)
+            for j, node in enumerate(output_nodes):
+                if values[node] is None:
+                    tables[j] = None
+                else:
+                    tables[j] |= values[node] << (chunk_index * width)
+        return tuple(tables)
+
+
+class OscillationError(Exception):
+
+    """
+    This is thrown when a feedback loop does not settle.
+
+    The components of the feedback loop are in the components attribute.
+    """
+
+    def __init__(self, message, components=()):
+        super().__init__(message)
+        self.components = tuple(components)
+
+
+class ExpressionSizeError(Exception):
+
+    """
+    This is thrown when an expression would be larger than allowed.
+    """
+    pass
+
+
+def expression(component,
+               anonymous_symbols=False,
+               let=False,
+               max_size=None):
     """
     Takes a component and converts it into an expression.
 
+    A gate that is read from more than once is only converted once, its
+    expression is the same object everywhere it is used, so the expression is
+    a DAG that is as large as the circuit. Printing or evaluating it still
+    visits every use.
+
+    If let is True a tuple of (bindings, expression) is returned instead,
+    where bindings is a list of (symbol, expression) for every gate that is
+    read from more than once. The expressions only use the symbols of the
+    bindings before them and the returned expression can use all of them. If
+    the symbols are not anonymous they are called t1, t2, ...
+
+    max_size is the largest number of operations and symbols the expression
+    may have when it is written out, or with let, the bindings and the
+    expression together. ExpressionSizeError is raised for larger ones.
+
     This function raises RecursionError if any component is self referencing.
     """
-    # <x> in set() is faster than list
-    seen = set()
-    # An input can output into multiple components
-    # This maps inputs -> symbols
-    component_dict = {}
-
-    def recursive_expression(c):
+    def driver(c):
         """
-        Recursively creates an expression from a component.
+        Returns the component a component gets its output from.
 
-        his function raises RecursionError if any component is self referencing.
+        Wires don't matter.
         """
-        if c in (None, True, False):
-            # The component is not connected to anything
-            # Act as if they are connected to an input
-            return boolean.Symbol(None)
-        elif c in seen:
+        wires = set()
+        while isinstance(c, Wire):
+            if c in wires:
+                raise RecursionError(
+                    "The logic circuit is self referencing and cannot be converted into a boolean expression")
+            wires.add(c)
+            c = c.input
+        return c
+
+    def drivers(c):
+        if not isinstance(c, Gate):
+            return {}
+        return {k: driver(v) for k, v in c.inputs.items()
+                if v is not None}
+
+    # Depth first search without recursion, every component after the
+    # components it reads from
+    root = driver(component)
+    order = []
+    # The number of times every gate is read from
+    references = {}
+    done = set()
+    on_path = set()
+    stack = [(root, False)]
+    while stack:
+        c, expanded = stack.pop()
+        if expanded:
+            on_path.discard(c)
+            done.add(c)
+            order.append(c)
+            continue
+        if c is None or c in done:
+            continue
+        if c in on_path:
             raise RecursionError(
                 "The logic circuit is self referencing and cannot be converted into a boolean expression")
-
-        if not isinstance(c, Input):
-            # Inputs can appear twice in the circuit
-            seen.add(c)
-
+        on_path.add(c)
+        stack.append((c, True))
+        for v in reversed(list(drivers(c).values())):
+            references[v] = references.get(v, 0) + 1
+            if v not in done:
+                stack.append((v, False))
+
+    def expression_size(e, sizes):
+        """
+        Returns the size of an expression where symbols have sizes.
+        """
+        if isinstance(e, boolean.Symbol):
+            return sizes.get(e, 1)
+        elif e.args is None:
+            return 1
+        return 1 + sum(expression_size(arg, sizes) for arg in e.args)
+
+    # Maps components to their expressions and sizes
+    expressions = {}
+    sizes = {}
+    bindings = []
+    total_size = 0
+    for c in order:
         if isinstance(c, Input):
-            if c in component_dict.keys():
-                return component_dict[c]
-            else:
-                component_dict[c] = boolean.Symbol(None)
-                return component_dict[c]
-        elif isinstance(c, (Output, Wire)):
-            # Wires don't matter
-            return recursive_expression(c.input)
+            e = boolean.Symbol(None)
+            size = 1
         elif isinstance(c, Gate):
             subs_dict = {}
-            for k, v in c.inputs.items():
-                subs_dict[k] = recursive_expression(v)
-            return c.expression.subs(subs_dict, eval=False)
-
-    if anonymous_symbols:
-        return recursive_expression(component)
+            symbol_sizes = {}
+            c_drivers = drivers(c)
+            for k in c.inputs:
+                if k in c_drivers:
+                    subs_dict[k] = expressions[c_drivers[k]]
+                    symbol_sizes[k] = sizes[c_drivers[k]]
+                else:
+                    # The component is not connected to anything
+                    # Act as if they are connected to an input
+                    subs_dict[k] = boolean.Symbol(None)
+            e = c.expression.subs(subs_dict, eval=False)
+            size = expression_size(c.expression, symbol_sizes)
+        else:
+            e = boolean.Symbol(None)
+            size = 1
+        if let and isinstance(c, Gate) and references.get(c, 0) > 1 and\
+                c is not root:
+            total_size += size
+            symbol = boolean.Symbol(None)
+            bindings.append((symbol, e))
+            e = symbol
+            size = 1
+        if max_size is not None and total_size + size > max_size:
+            raise ExpressionSizeError(
+                "The expression has more than {} operations and symbols"
+                .format(max_size))
+        expressions[c] = e
+        sizes[c] = size
+    if root is None:
+        result = boolean.Symbol(None)
     else:
+        result = expressions[root]
+
+    if not anonymous_symbols:
         def letters_generator():
             """
             Returns a generator that outputs A^n->Z^n for n->inf.
@@ -426,18 +1283,55 @@ def expression(component, anonymous_symbols=False):
             letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
             return multiletters(letters)
 
-        expression = recursive_expression(component)
-        subs_dict = {}
+        bound = {symbol: boolean.Symbol("t{}".format(i + 1))
+                 for i, (symbol, _) in enumerate(bindings)}
+        subs_dict = dict(bound)
         g = letters_generator()
-        for s in expression.symbols:
-            subs_dict[s] = boolean.Symbol(g.__next__())
+        renamed = {}
+
+        def rename(e):
+            """
+            Returns an expression with the symbols renamed.
+
+            Letters are given in the order the symbols appear so the result
+            does not depend on hashes. Every subexpression is only renamed
+            once, so the result is a DAG again.
+            """
+            stack = [(e, False)]
+            while stack:
+                e, expanded = stack.pop()
+                if id(e) in renamed:
+                    continue
+                if isinstance(e, boolean.Symbol):
+                    if e not in subs_dict:
+                        subs_dict[e] = boolean.Symbol(g.__next__())
+                    renamed[id(e)] = subs_dict[e]
+                elif e.args is None:
+                    renamed[id(e)] = e
+                elif expanded:
+                    renamed[id(e)] = e.__class__(
+                        *(renamed[id(arg)] for arg in e.args), eval=False)
+                else:
+                    stack.append((e, True))
+                    for arg in reversed(e.args):
+                        stack.append((arg, False))
+            return renamed[id(e)]
 
-        return expression.subs(subs_dict, eval=False)
+        bindings = [(bound[symbol], rename(e)) for symbol, e in bindings]
+        result = rename(result)
 
+    if let:
+        return bindings, result
+    return result
 
-def circuit_board(expression, bulb=True, eval=False):
+
+def circuit_board(expression, bulb=True, eval=False, structural_hashing=True):
     """
     Takes an expression and converts it into a circuit board.
+
+    With structural hashing a subexpression that appears more than once is
+    only converted once and its gate is read from everywhere it is used, so
+    the board is as large as the expression written as a DAG.
     """
     if isinstance(expression, str):
         expression = boolean.parse(expression, eval=eval)
@@ -450,16 +1344,21 @@ def circuit_board(expression, bulb=True, eval=False):
     b = CircuitBoard()
     # A symbol can exist multiple times in an expression
     symbol_dict = {}
+    # Maps subexpressions to the components that output them
+    component_dict = {}
 
     def recursive_gate(e):
         """
         Recursively adds components to the circuit board.
         """
+        if structural_hashing and e in component_dict:
+            return component_dict[e]
         if isinstance(e, boolean.BaseElement):
-            # TODO: Either make the the same or create a constant component.
-            s = Switch()
-            b.append(s)
-            return s
+            # A gate without inputs always outputs the constant
+            g = Gate(e)
+            b.append(g)
+            component_dict[e] = g
+            return g
         elif isinstance(e, boolean.Symbol):
             if e in symbol_dict.keys():
                 return symbol_dict[e]
@@ -470,31 +1369,29 @@ def circuit_board(expression, bulb=True, eval=False):
                 return s
         elif isinstance(e, boolean.Function):
             # All gates are of type Gate instead of And, Or and Not
-            if e.order == (1, 1):
-                pre = recursive_gate(e.args[0])
+            operands = e.args
+            if isinstance(e, boolean.NOT) and\
+                    isinstance(e.args[0], boolean.DualBase):
+                # NAND and NOR are a single gate
+                operands = e.args[0].args
+            input_dict = {}
+            subs_dict = {}
+            # An operand that is used twice only needs to be built once
+            for arg in dict.fromkeys(operands):
+                pre = recursive_gate(arg)
                 w = Wire(pre)
                 b.append(w)
 
                 s = boolean.Symbol(None)
-                g = Gate(e.subs({e.args[0]: s}),
-                         {s: w})
-                b.append(g)
-                return g
-            else:
-                input_dict = {}
-                expr = e
-                for arg in e.args:
-                    pre = recursive_gate(arg)
-                    w = Wire(pre)
-                    b.append(w)
-
-                    s = boolean.Symbol(None)
-                    expr = expr.subs({arg: s})
-                    input_dict[s] = w
-                g = Gate(expr,
-                         input_dict)
-                b.append(g)
-                return g
+                subs_dict[arg] = s
+                input_dict[s] = w
+            # All operands are substituted at once, otherwise a symbol that is
+            # an operand would also be substituted inside of other operands
+            g = Gate(e.subs(subs_dict, eval=False),
+                     input_dict)
+            b.append(g)
+            component_dict[e] = g
+            return g
     recursive_gate(expression)
     if bulb:
         # Due to the nature of recursive_gate, the last component is last in the list
@@ -503,3 +1400,18 @@ def circuit_board(expression, bulb=True, eval=False):
         b.append(w)
         b.append(o)
     return b
+
+
+def equivalent(board_a, board_b, mapping=None):
+    """
+    Returns (True, None) if two combinational circuit boards have the same
+    outputs for all inputs and (False, vector) otherwise, where vector holds
+    the outputs of the inputs of board_a for which they differ.
+
+    mapping maps the Inputs and Outputs of board_a to the ones of board_b,
+    if it is None they are paired in the order they are on the boards. This
+    uses SAT sweeping instead of truth tables, see equivalence.py.
+    """
+    # equivalence.py builds on this module
+    import equivalence
+    return equivalence.equivalent(board_a, board_b, mapping)
@@ -66,6 +66,19 @@ def load_surfaces(path="images"):
         s = load_file_to_surface(path + "\\" + f + ".png")
         SURFACE[f] = s
 
+    # There are no images for xor and xnor, they are the images of or and nor
+    # with the extra curve drawn in front of the inputs
+    for f in ("xor", "xnor"):
+        s = SURFACE[f[1:]].copy()
+        rect = s.get_rect()
+        pygame.draw.arc(s,
+                        COLOR_DICT[None],
+                        pygame.rect.Rect(-rect.h // 4, 0, rect.h // 2, rect.h),
+                        -math.pi / 2,
+                        math.pi / 2,
+                        max(1, rect.h // 30))
+        SURFACE[f] = s
+
     # 0.825/30.939 is the ratio of the height of the and surface to the radius
     # of the circle
     SELECT_RADIUS = int(4 * SURFACE["and"].get_rect().h * 0.0266654 )  # 0.825/30.939
@@ -309,6 +322,28 @@ class Nor(DualBaseGate):
         super().__init__(pos, dual_expression, hidden, anonymous_symbols)
 
 
+class Xor(DualBaseGate):
+
+    def __init__(self,
+                 pos,
+                 hidden=False,
+                 anonymous_symbols=True):
+        dual_expression = boolean.XOR(
+            boolean.Symbol(None), boolean.Symbol(None))
+        super().__init__(pos, dual_expression, hidden, anonymous_symbols)
+
+
+class Xnor(DualBaseGate):
+
+    def __init__(self,
+                 pos,
+                 hidden=False,
+                 anonymous_symbols=True):
+        dual_expression = boolean.XNOR(
+            boolean.Symbol(None), boolean.Symbol(None))
+        super().__init__(pos, dual_expression, hidden, anonymous_symbols)
+
+
 # Not only has 1 input
 class Not(IRenderableComponent):
 
@@ -695,7 +730,8 @@ class CircuitBoard(interfaces.IContainer):
     """
     GATE_CLASSES = (Switch, Bulb,
                     And, Or, Not,
-                    Nand, Nor)
+                    Nand, Nor,
+                    Xor, Xnor)
 
     def __init__(self,
                  hitbox,
@@ -801,9 +837,13 @@ def expression(renderable_component, anonymous_symbols=False):
 # Rendreable components need the correct class names for them to know
 # which surface to use
 # Other than that it is very similar to the one in logic_circuit
-def renderable_components(expression, pos=(0, 0), bulb=True):
+def renderable_components(expression, pos=(0, 0), bulb=True,
+                          structural_hashing=True):
     """
     Returns an list of renderable components when given an expression.
+
+    With structural hashing a subexpression that appears more than once is
+    only created once and its output is wired to every place it is used.
     """
     if isinstance(expression, str):
         expression = boolean.parse(expression, eval=False)
@@ -814,6 +854,8 @@ def renderable_components(expression, pos=(0, 0), bulb=True):
 
     r = [Bulb(pos)]
     symbol_dict = {}
+    # Maps subexpressions to the components that output them
+    component_dict = {}
 
     def recursive_components(e):
         # This function can be used if there is ever the want to attempt to make the
@@ -821,6 +863,10 @@ def renderable_components(expression, pos=(0, 0), bulb=True):
         def append(r_comp):
             r.append(r_comp)
 
+        key = e
+        if structural_hashing and key in component_dict:
+            return component_dict[key]
+
         if isinstance(e, boolean.BaseElement):
             rc = Switch(pos)
         elif isinstance(e, boolean.Symbol):
@@ -829,33 +875,51 @@ def renderable_components(expression, pos=(0, 0), bulb=True):
             else:
                 rc = Switch(pos)
                 symbol_dict[e] = rc
-        elif isinstance(e, boolean.NOT):
+        elif isinstance(e, boolean.NOT) and\
+                not isinstance(e.args[0], boolean.DualBase):
             pre = recursive_components(e.args[0])
             w = Wire(pos, pos, pre.component)
             append(w)
 
             rc = Not(pos, w.component)
-        elif isinstance(e, boolean.DualBase):
+        elif isinstance(e, (boolean.NOT, boolean.DualBase,
+                            boolean.ParityBase)):
+            # NOT(AND) and NOT(OR) are created as a Nand or Nor
+            negated = isinstance(e, boolean.NOT)
+            if negated:
+                e = e.args[0]
             if len(e.args) != 2:
-                new_expr = e.__class__(e.args[0], e.args[1])
-                for i in range(2, len(e.args)):
-                    new_expr = e.__class__(new_expr, e.args[i], eval=False)
-                e = new_expr
+                # XNOR of more than two inputs is the XNOR of an XOR
+                fold = boolean.XOR if isinstance(e, boolean.XNOR) else\
+                    e.__class__
+                new_expr = fold(e.args[0], e.args[1], eval=False)
+                for i in range(2, len(e.args) - 1):
+                    new_expr = fold(new_expr, e.args[i], eval=False)
+                e = e.__class__(new_expr, e.args[-1], eval=False)
             pre0 = recursive_components(e.args[0])
-            pre1 = recursive_components(e.args[1])
+            # Nand(A, A) is used as an inverter, A is only created once
+            if e.args[1] is e.args[0]:
+                pre1 = pre0
+            else:
+                pre1 = recursive_components(e.args[1])
             w0 = Wire(pos, pos, pre0.component)
             w1 = Wire(pos, pos, pre1.component)
             append(w0)
             append(w1)
 
             if isinstance(e, boolean.AND):
-                rc = And(pos)
+                rc = Nand(pos) if negated else And(pos)
             elif isinstance(e, boolean.OR):
-                rc = Or(pos)
+                rc = Nor(pos) if negated else Or(pos)
+            elif isinstance(e, boolean.XOR):
+                rc = Xor(pos)
+            elif isinstance(e, boolean.XNOR):
+                rc = Xnor(pos)
             c = rc.component
             c.inputs[c.empty_input_keys[0]] = w0.component
             c.inputs[c.empty_input_keys[0]] = w1.component
         append(rc)
+        component_dict[key] = rc
         return rc
 
     recursive_components(expression)
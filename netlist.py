@@ -0,0 +1,326 @@
+"""
+Netlist
+
+This module stores logic circuits as a struct of arrays. Components in a
+logic_circuit.CircuitBoard are objects with an expression and a dict of
+inputs each, which takes a lot of memory for large circuits. A Netlist instead
+keeps every property of its nodes in its own array from the array module:
+
+    types          the opcode of every node, see logic_circuit.OP_INPUT
+    fanin_offsets  the fanins of node i are
+                   fanin_ids[fanin_offsets[i]:fanin_offsets[i + 1]]
+    fanin_ids      the ids of the fanins of all nodes one after another
+    values         the value of every node, 0, 1 or UNKNOWN
+
+so a gate takes a few bytes. The fanins of a node always have a smaller id,
+so a single pass over the arrays evaluates the whole circuit.
+"""
+import array
+
+import boolean
+import logic_circuit
+from logic_circuit import (OP_INPUT, OP_NONE, OP_FALSE, OP_TRUE, OP_NOT,
+                           OP_AND, OP_OR, OP_NAND, OP_NOR, OP_XOR, OP_XNOR,
+                           OP_BUF)
+
+# The value of nodes that would output None
+UNKNOWN = -1
+
+# The expressions of gates with n inputs as functions of their symbols
+_EXPRESSIONS = {
+    OP_AND: lambda s: boolean.AND(*s, eval=False),
+    OP_OR: lambda s: boolean.OR(*s, eval=False),
+    OP_NAND: lambda s: boolean.NOT(boolean.AND(*s, eval=False), eval=False),
+    OP_NOR: lambda s: boolean.NOT(boolean.OR(*s, eval=False), eval=False),
+    OP_XOR: lambda s: boolean.XOR(*s, eval=False),
+    OP_XNOR: lambda s: boolean.XNOR(*s, eval=False),
+}
+
+
+def evaluate_word(opcode, values, full):
+    """
+    Returns the value of a node for a word of vectors, like
+    Netlist.run_vectors, from the values of its fanins, or None.
+
+    This is for evaluating single nodes. Netlist.run_vectors and
+    CompiledBoard.run_vectors evaluate whole circuits with the same rules
+    inline, which saves a call for every node.
+    """
+    if None in values:
+        return None
+    if opcode == OP_AND or opcode == OP_NAND:
+        value = full
+        for v in values:
+            value &= v
+    elif opcode == OP_OR or opcode == OP_NOR:
+        value = 0
+        for v in values:
+            value |= v
+    elif opcode == OP_XOR or opcode == OP_XNOR:
+        value = 0
+        for v in values:
+            value ^= v
+    elif opcode == OP_NOT:
+        value = values[0] ^ full
+    elif opcode == OP_BUF:
+        value = values[0]
+    elif opcode == OP_TRUE:
+        return full
+    elif opcode == OP_FALSE:
+        return 0
+    else:
+        return None
+    if opcode == OP_NAND or opcode == OP_NOR or opcode == OP_XNOR:
+        value ^= full
+    return value
+
+
+class Netlist:
+
+    """
+    A logic circuit stored as parallel arrays.
+
+    Nodes are added with add and have consecutive ids starting at 0. inputs
+    and outputs are arrays of the ids of the input nodes and the nodes that
+    are read as outputs, an output can be any node. names maps the ids of
+    nodes that have a name to it.
+    """
+
+    def __init__(self):
+        self.types = array.array("B")
+        self.fanin_offsets = array.array("I", (0,))
+        self.fanin_ids = array.array("I")
+        self.values = array.array("b")
+        self.inputs = array.array("I")
+        self.outputs = array.array("I")
+        self.names = {}
+
+    def __len__(self):
+        return len(self.types)
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes used by the arrays.
+        """
+        return sum(a.itemsize * len(a)
+                   for a in (self.types, self.fanin_offsets, self.fanin_ids,
+                             self.values, self.inputs, self.outputs))
+
+    def add(self, type, fanins=(), name=None):
+        """
+        Adds a node and returns its id.
+
+        All fanins have to be added before the node.
+        """
+        node = len(self.types)
+        for fanin in fanins:
+            if not 0 <= fanin < node:
+                raise ValueError("Fanin {} of node {} has not been added"
+                                 .format(fanin, node))
+        self.types.append(type)
+        self.fanin_ids.extend(fanins)
+        self.fanin_offsets.append(len(self.fanin_ids))
+        self.values.append(UNKNOWN)
+        if type == OP_INPUT:
+            self.inputs.append(node)
+        if name is not None:
+            self.names[node] = name
+        return node
+
+    def fanins(self, node):
+        """
+        Returns the ids of the fanins of a node.
+        """
+        return self.fanin_ids[self.fanin_offsets[node]:
+                              self.fanin_offsets[node + 1]]
+
+    def evaluate(self, inputs=None):
+        """
+        Sets the values of all nodes and returns the outputs.
+
+        The inputs are the values of self.inputs in the same order, if they
+        are not given the current values are kept. Like the output of a
+        gate, a node is UNKNOWN if any of its fanins is. The outputs are
+        True, False or None.
+        """
+        values = self.values
+        if inputs is not None:
+            if len(inputs) != len(self.inputs):
+                raise ValueError("Expected {} inputs but got {}"
+                                 .format(len(self.inputs), len(inputs)))
+            for node, value in zip(self.inputs, inputs):
+                values[node] = UNKNOWN if value is None else bool(value)
+        types = self.types
+        offsets = self.fanin_offsets
+        ids = self.fanin_ids
+        for node in range(len(types)):
+            opcode = types[node]
+            if opcode == OP_INPUT:
+                continue
+            start = offsets[node]
+            end = offsets[node + 1]
+            if opcode <= OP_TRUE:
+                value = UNKNOWN if opcode == OP_NONE else opcode - OP_FALSE
+            elif opcode == OP_AND or opcode == OP_NAND:
+                value = 1
+                for i in range(start, end):
+                    v = values[ids[i]]
+                    if v < 0:
+                        value = UNKNOWN
+                        break
+                    value &= v
+            elif opcode == OP_OR or opcode == OP_NOR:
+                value = 0
+                for i in range(start, end):
+                    v = values[ids[i]]
+                    if v < 0:
+                        value = UNKNOWN
+                        break
+                    value |= v
+            elif opcode == OP_XOR or opcode == OP_XNOR:
+                value = 0
+                for i in range(start, end):
+                    v = values[ids[i]]
+                    if v < 0:
+                        value = UNKNOWN
+                        break
+                    value ^= v
+            elif opcode == OP_NOT:
+                value = values[ids[start]]
+                if value >= 0:
+                    value ^= 1
+            elif opcode == OP_BUF:
+                value = values[ids[start]]
+            else:
+                raise ValueError("Node {} has the unknown type {}"
+                                 .format(node, opcode))
+            if value >= 0 and (opcode == OP_NAND or opcode == OP_NOR or
+                               opcode == OP_XNOR):
+                value ^= 1
+            values[node] = value
+        return self.output_values()
+
+    def output_values(self):
+        """
+        Returns the values of self.outputs as True, False or None.
+        """
+        values = self.values
+        return tuple(None if values[node] < 0 else bool(values[node])
+                     for node in self.outputs)
+
+    def run_vectors(self, inputs, width):
+        """
+        Returns the values of all nodes for many input vectors at once.
+
+        This works like CompiledBoard.run_vectors, bit i of every input is
+        its value in vector i. Nodes that depend on an UNKNOWN node are None.
+        self.values does not change.
+        """
+        if len(inputs) != len(self.inputs):
+            raise ValueError("Expected {} inputs but got {}"
+                             .format(len(self.inputs), len(inputs)))
+        full = (1 << width) - 1
+        values = [None] * len(self.types)
+        for node, value in zip(self.inputs, inputs):
+            values[node] = value & full
+        types = self.types
+        offsets = self.fanin_offsets
+        ids = self.fanin_ids
+        for node in range(len(types)):
+            opcode = types[node]
+            if opcode == OP_INPUT:
+                continue
+            fanin_values = [values[ids[i]]
+                            for i in range(offsets[node], offsets[node + 1])]
+            if None in fanin_values or opcode == OP_NONE:
+                continue
+            if opcode == OP_FALSE:
+                value = 0
+            elif opcode == OP_TRUE:
+                value = full
+            elif opcode == OP_AND or opcode == OP_NAND:
+                value = full
+                for v in fanin_values:
+                    value &= v
+            elif opcode == OP_OR or opcode == OP_NOR:
+                value = 0
+                for v in fanin_values:
+                    value |= v
+            elif opcode == OP_XOR or opcode == OP_XNOR:
+                value = 0
+                for v in fanin_values:
+                    value ^= v
+            elif opcode == OP_NOT:
+                value = fanin_values[0] ^ full
+            else:
+                value = fanin_values[0]
+            if opcode == OP_NAND or opcode == OP_NOR or opcode == OP_XNOR:
+                value ^= full
+            values[node] = value
+        return values
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Returns the netlist of a circuit board.
+
+        The board is compiled first, see CompiledBoard, so wires are collapsed
+        and gates are split into one node per operation. The inputs and the
+        outputs are in the same order as on the board and the values are the
+        current outputs of the inputs of the board.
+        """
+        return cls.from_compiled(board.compile())
+
+    @classmethod
+    def from_compiled(cls, compiled):
+        """
+        Returns the netlist of a compiled board, see from_board.
+        """
+        netlist = cls()
+        for opcode, fanins in zip(compiled.opcodes, compiled.fanins):
+            netlist.add(opcode, fanins)
+        netlist.outputs.extend(compiled.node(c) for c in compiled.outputs)
+        netlist.evaluate([c.output for c in compiled.inputs])
+        return netlist
+
+    def to_board(self):
+        """
+        Returns a settled circuit board of the netlist.
+
+        Every input becomes a Switch with its value, every output a Bulb and
+        every other node a gate that reads from the gates of its fanins.
+        """
+        board = logic_circuit.CircuitBoard()
+        components = []
+        types = self.types
+        values = self.values
+        for node in range(len(types)):
+            opcode = types[node]
+            drivers = [components[i] for i in self.fanins(node)]
+            if opcode == OP_INPUT:
+                c = logic_circuit.Switch(values[node] == 1)
+            elif opcode == OP_NONE:
+                c = logic_circuit.Wire()
+            elif opcode == OP_FALSE:
+                c = logic_circuit.Gate(boolean.FALSE)
+            elif opcode == OP_TRUE:
+                c = logic_circuit.Gate(boolean.TRUE)
+            elif opcode == OP_NOT or len(drivers) == 1 and\
+                    opcode in (OP_NAND, OP_NOR, OP_XNOR):
+                c = logic_circuit.Not(drivers[0])
+            elif opcode == OP_BUF or len(drivers) == 1:
+                c = logic_circuit.Wire(drivers[0])
+            elif opcode in _EXPRESSIONS:
+                symbols = [boolean.Symbol(None) for _ in drivers]
+                c = logic_circuit.Gate(_EXPRESSIONS[opcode](symbols),
+                                       dict(zip(symbols, drivers)))
+            else:
+                raise ValueError("Node {} has the unknown type {}"
+                                 .format(node, opcode))
+            components.append(c)
+            board.append(c)
+        board.extend(logic_circuit.Bulb(components[node])
+                     for node in self.outputs)
+        board.settle()
+        return board
@@ -0,0 +1,549 @@
+"""
+Netlist Formats
+
+This module reads and writes netlists in the formats that benchmark circuits
+are distributed in:
+
+    .bench  ISCAS-85 and ISCAS-89, "G10 = NAND(G1, G3)"
+    .blif   the Berkeley Logic Interchange Format, gates as .names covers
+    .v      structural Verilog with the gate primitives and assign
+
+Readers take any iterable of lines, like an open file, and return a
+netlist.Netlist, which can be turned into a circuit board with to_board.
+Lines are processed one at a time, so a definition may come before the
+signals it reads from: it waits until all of them are defined. Flip-flops
+and latches are cut, the flip-flop becomes an input and the signal it reads
+becomes an output after the real outputs, so sequential circuits are read as
+their combinational part.
+
+Writers take a Netlist or a CircuitBoard and write the nodes that the
+outputs depend on line by line into a file. Nodes that do not have a name are
+given one.
+"""
+import os
+import re
+
+import logic_circuit
+from logic_circuit import (OP_INPUT, OP_NONE, OP_FALSE, OP_TRUE, OP_NOT,
+                           OP_AND, OP_OR, OP_NAND, OP_NOR, OP_XOR, OP_XNOR,
+                           OP_BUF)
+from netlist import Netlist
+
+
+class ParseError(Exception):
+
+    """
+    This is thrown when a netlist file cannot be read.
+    """
+    pass
+
+
+class _Builder:
+
+    """
+    Adds definitions of named signals to a netlist in an order where every
+    signal is added after the signals it reads from.
+    """
+
+    def __init__(self):
+        self.netlist = Netlist()
+        # Maps names to the ids of their nodes
+        self.nodes = {}
+        # Maps names that are not defined yet to the definitions waiting for
+        # them, a definition is [name, fanins, build, missing]
+        self.waiting = {}
+        self.outputs = []
+
+    def define(self, name, fanins, build):
+        """
+        Adds a signal once all of its fanins are defined.
+
+        build is called with the netlist and the ids of the fanins and
+        returns the id of the node of the signal.
+        """
+        missing = {f for f in fanins if f not in self.nodes}
+        if not missing:
+            self._build(name, fanins, build)
+            return
+        definition = [name, fanins, build, len(missing)]
+        for fanin in missing:
+            self.waiting.setdefault(fanin, []).append(definition)
+
+    def _build(self, name, fanins, build):
+        stack = [(name, fanins, build)]
+        while stack:
+            name, fanins, build = stack.pop()
+            if name in self.nodes:
+                raise ParseError("{} is defined more than once".format(name))
+            node = build(self.netlist, [self.nodes[f] for f in fanins])
+            self.netlist.names[node] = name
+            self.nodes[name] = node
+            for definition in self.waiting.pop(name, ()):
+                definition[3] -= 1
+                if definition[3] == 0:
+                    stack.append(tuple(definition[:3]))
+
+    def input(self, name):
+        self.define(name, (), _add_input)
+
+    def finish(self):
+        """
+        Returns the netlist after all definitions have been read.
+        """
+        if self.waiting:
+            raise ParseError("Signals are not defined or in a loop: {}"
+                             .format(", ".join(sorted(self.waiting)[:10])))
+        for name in self.outputs:
+            if name not in self.nodes:
+                raise ParseError("Output {} is not defined".format(name))
+            self.netlist.outputs.append(self.nodes[name])
+        return self.netlist
+
+
+def _add_input(netlist, fanins):
+    return netlist.add(OP_INPUT)
+
+
+def _gate(opcode):
+    """
+    Returns a build function that adds a node of an opcode.
+    """
+    def build(netlist, fanins):
+        return netlist.add(opcode, fanins)
+    return build
+
+
+_BENCH_OPCODES = {"AND": OP_AND, "OR": OP_OR, "NAND": OP_NAND, "NOR": OP_NOR,
+                  "XOR": OP_XOR, "XNOR": OP_XNOR, "NOT": OP_NOT,
+                  "BUF": OP_BUF, "BUFF": OP_BUF}
+_BENCH_NAMES = {OP_AND: "AND", OP_OR: "OR", OP_NAND: "NAND", OP_NOR: "NOR",
+                OP_XOR: "XOR", OP_XNOR: "XNOR", OP_NOT: "NOT", OP_BUF: "BUFF"}
+_BENCH_PORT = re.compile(r"(INPUT|OUTPUT)\s*\(\s*([^\s()]+)\s*\)$",
+                         re.IGNORECASE)
+_BENCH_GATE = re.compile(r"([^\s=]+)\s*=\s*(\w+)\s*\((.*)\)$")
+
+
+def read_bench(lines):
+    """
+    Reads an ISCAS .bench netlist.
+    """
+    builder = _Builder()
+    latches = []
+    for number, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        match = _BENCH_PORT.match(line)
+        if match:
+            if match.group(1).upper() == "INPUT":
+                builder.input(match.group(2))
+            else:
+                builder.outputs.append(match.group(2))
+            continue
+        match = _BENCH_GATE.match(line)
+        if not match:
+            raise ParseError("Line {}: cannot read {!r}".format(number, line))
+        name, gate, fanins = match.groups()
+        fanins = tuple(f.strip() for f in fanins.split(",") if f.strip())
+        gate = gate.upper()
+        if gate == "DFF" and len(fanins) == 1:
+            builder.input(name)
+            latches.append(fanins[0])
+        elif gate in _BENCH_OPCODES and fanins:
+            builder.define(name, fanins, _gate(_BENCH_OPCODES[gate]))
+        else:
+            raise ParseError("Line {}: unknown gate {}".format(number, gate))
+    builder.outputs.extend(latches)
+    return builder.finish()
+
+
+def _blif_cover(cubes):
+    """
+    Returns a build function for the single output cover of a .names block.
+    """
+    def build(netlist, fanins):
+        if not cubes:
+            return netlist.add(OP_FALSE)
+        onset = cubes[0][1] == "1"
+        terms = []
+        for literals, _ in cubes:
+            term = []
+            for fanin, literal in zip(fanins, literals):
+                if literal == "1":
+                    term.append(fanin)
+                elif literal == "0":
+                    term.append(netlist.add(OP_NOT, (fanin,)))
+            if not term:
+                # A cube without literals is always true
+                return netlist.add(OP_TRUE if onset else OP_FALSE)
+            terms.append(term[0] if len(term) == 1
+                         else netlist.add(OP_AND, term))
+        if len(terms) == 1:
+            return netlist.add(OP_BUF if onset else OP_NOT, terms)
+        return netlist.add(OP_OR if onset else OP_NOR, terms)
+    return build
+
+
+def read_blif(lines):
+    """
+    Reads a BLIF netlist.
+
+    Only the first model is read and it cannot contain subcircuits.
+    """
+    builder = _Builder()
+    latches = []
+    # The .names block that is being read as (name, fanins, cubes)
+    names = None
+    continued = ""
+    for number, line in enumerate(lines, 1):
+        line = continued + line.split("#", 1)[0].strip()
+        if line.endswith("\\"):
+            continued = line[:-1] + " "
+            continue
+        continued = ""
+        if not line:
+            continue
+        words = line.split()
+        if not words[0].startswith("."):
+            if names is None:
+                raise ParseError("Line {}: cube outside of .names"
+                                 .format(number))
+            if len(words) == 1 and not names[1]:
+                words = ("", words[0])
+            if len(words) != 2 or len(words[0]) != len(names[1]) or\
+                    words[1] not in ("0", "1") or\
+                    names[2] and names[2][0][1] != words[1]:
+                raise ParseError("Line {}: cannot read cube {!r}"
+                                 .format(number, line))
+            names[2].append(tuple(words))
+            continue
+        if names is not None:
+            builder.define(names[0], names[1], _blif_cover(names[2]))
+            names = None
+        command = words[0]
+        if command == ".model":
+            if builder.nodes or builder.waiting:
+                break
+        elif command == ".inputs":
+            for name in words[1:]:
+                builder.input(name)
+        elif command == ".outputs":
+            builder.outputs.extend(words[1:])
+        elif command == ".names" and len(words) >= 2:
+            names = (words[-1], tuple(words[1:-1]), [])
+        elif command == ".latch" and len(words) >= 3:
+            builder.input(words[2])
+            latches.append(words[1])
+        elif command == ".end":
+            break
+        else:
+            raise ParseError("Line {}: cannot read {}".format(number, command))
+    if names is not None:
+        builder.define(names[0], names[1], _blif_cover(names[2]))
+    builder.outputs.extend(latches)
+    return builder.finish()
+
+
+_VERILOG_OPCODES = {"and": OP_AND, "or": OP_OR, "nand": OP_NAND,
+                    "nor": OP_NOR, "xor": OP_XOR, "xnor": OP_XNOR,
+                    "not": OP_NOT, "buf": OP_BUF}
+_VERILOG_NAMES = {v: k for k, v in _VERILOG_OPCODES.items()}
+_VERILOG_KEYWORDS = {"module", "endmodule", "input", "output", "wire",
+                     "assign"} | set(_VERILOG_OPCODES)
+_VERILOG_TOKEN = re.compile(r"\\(\S+)|([A-Za-z_][\w$]*|\d+'[bB][01]|\S)")
+_VERILOG_IDENTIFIER = re.compile(r"[A-Za-z_][\w$]*$")
+
+
+def _verilog_statements(lines):
+    """
+    Yields the line number and the tokens of every statement.
+    """
+    tokens = []
+    comment = False
+    for number, line in enumerate(lines, 1):
+        if comment:
+            if "*/" not in line:
+                continue
+            line = line.split("*/", 1)[1]
+            comment = False
+        line = re.sub(r"/\*.*?\*/", " ", line)
+        if "/*" in line:
+            line, _ = line.split("/*", 1)
+            comment = True
+        line = line.split("//", 1)[0]
+        for match in _VERILOG_TOKEN.finditer(line):
+            escaped, token = match.groups()
+            if escaped is not None:
+                # Escaped identifiers are kept as names, not as symbols
+                tokens.append(("name", escaped))
+            elif token == ";":
+                yield number, tokens
+                tokens = []
+            elif token == "endmodule":
+                yield number, [token]
+                return
+            else:
+                tokens.append(token)
+    if tokens:
+        yield number, tokens
+
+
+def _verilog_names(tokens, number):
+    """
+    Returns the names in a list of tokens that are separated by commas.
+    """
+    names = []
+    for token in tokens:
+        if isinstance(token, tuple):
+            names.append(token[1])
+        elif _VERILOG_IDENTIFIER.match(token):
+            names.append(token)
+        elif token not in (",", "(", ")"):
+            raise ParseError("Line {}: cannot read {}".format(number, token))
+    return names
+
+
+def read_verilog(lines):
+    """
+    Reads a structural Verilog module.
+
+    The module can only contain input, output and wire declarations without
+    ranges, instances of the primitives and, or, nand, nor, xor, xnor, not and
+    buf, and assign statements that copy a signal, its negation or a constant.
+    Only the first module is read.
+    """
+    builder = _Builder()
+    for number, tokens in _verilog_statements(lines):
+        if not tokens:
+            continue
+        keyword = tokens[0]
+        if keyword in ("module", "wire", "endmodule"):
+            continue
+        elif keyword == "input":
+            for name in _verilog_names(tokens[1:], number):
+                builder.input(name)
+        elif keyword == "output":
+            builder.outputs.extend(_verilog_names(tokens[1:], number))
+        elif keyword in _VERILOG_OPCODES:
+            start = tokens.index("(") if "(" in tokens else len(tokens)
+            terminals = _verilog_names(tokens[start:], number)
+            if len(terminals) < 2:
+                raise ParseError("Line {}: {} needs an output and an input"
+                                 .format(number, keyword))
+            builder.define(terminals[0], tuple(terminals[1:]),
+                           _gate(_VERILOG_OPCODES[keyword]))
+        elif keyword == "assign" and len(tokens) >= 4 and tokens[2] == "=":
+            name = _verilog_names(tokens[1:2], number)[0]
+            value = tokens[3:]
+            if value == ["1'b0"] or value == ["1'B0"]:
+                builder.define(name, (), _gate(OP_FALSE))
+            elif value == ["1'b1"] or value == ["1'B1"]:
+                builder.define(name, (), _gate(OP_TRUE))
+            elif len(value) == 1:
+                builder.define(name, tuple(_verilog_names(value, number)),
+                               _gate(OP_BUF))
+            elif len(value) == 2 and value[0] == "~":
+                builder.define(name, tuple(_verilog_names(value[1:], number)),
+                               _gate(OP_NOT))
+            else:
+                raise ParseError("Line {}: cannot read assign".format(number))
+        else:
+            raise ParseError("Line {}: cannot read {}".format(number, keyword))
+    return builder.finish()
+
+
+def _used_nodes(netlist):
+    """
+    Returns the ids of the inputs and the nodes the outputs depend on.
+    """
+    used = bytearray(len(netlist))
+    for node in netlist.outputs:
+        used[node] = 1
+    for node in netlist.inputs:
+        used[node] = 1
+    for node in range(len(netlist) - 1, -1, -1):
+        if used[node]:
+            for fanin in netlist.fanins(node):
+                used[fanin] = 1
+    return [node for node in range(len(netlist)) if used[node]]
+
+
+def _node_names(netlist, nodes):
+    """
+    Returns a dict of unique names for some nodes.
+    """
+    taken = set(netlist.names.values())
+    names = {}
+    for node in nodes:
+        name = netlist.names.get(node)
+        if name is None:
+            name = "n{}".format(node)
+            while name in taken:
+                name = "_" + name
+            taken.add(name)
+        names[node] = name
+    return names
+
+
+def _prepare(netlist):
+    if isinstance(netlist, logic_circuit.CircuitBoard):
+        netlist = Netlist.from_board(netlist)
+    nodes = _used_nodes(netlist)
+    types = netlist.types
+    for node in nodes:
+        if types[node] == OP_NONE:
+            raise ValueError("Output {} depends on a component that is not "
+                             "connected".format(node))
+    return netlist, nodes, _node_names(netlist, nodes)
+
+
+def write_bench(netlist, file):
+    """
+    Writes a netlist or a circuit board in the .bench format.
+
+    The format has no constants, so the outputs cannot depend on them.
+    """
+    netlist, nodes, names = _prepare(netlist)
+    for node in netlist.inputs:
+        file.write("INPUT({})\n".format(names[node]))
+    for node in netlist.outputs:
+        file.write("OUTPUT({})\n".format(names[node]))
+    for node in nodes:
+        opcode = netlist.types[node]
+        if opcode == OP_INPUT:
+            continue
+        if opcode not in _BENCH_NAMES:
+            raise ValueError("Node {} is a constant, which cannot be written "
+                             "as .bench".format(node))
+        file.write("{} = {}({})\n".format(
+            names[node], _BENCH_NAMES[opcode],
+            ", ".join(names[f] for f in netlist.fanins(node))))
+
+
+def _blif_cubes(opcode, n):
+    """
+    Yields the cubes of the cover of a gate with n inputs.
+    """
+    if opcode == OP_TRUE:
+        yield "1"
+    elif opcode == OP_AND or opcode == OP_BUF:
+        yield "1" * n + " 1"
+    elif opcode == OP_NAND:
+        yield "1" * n + " 0"
+    elif opcode == OP_NOR or opcode == OP_NOT:
+        yield "0" * n + " 1"
+    elif opcode == OP_OR:
+        for i in range(n):
+            yield "-" * i + "1" + "-" * (n - i - 1) + " 1"
+    elif opcode == OP_XOR or opcode == OP_XNOR:
+        parity = opcode == OP_XOR
+        for i in range(1 << n):
+            if bin(i).count("1") % 2 == parity:
+                yield format(i, "0{}b".format(n)) + " 1"
+
+
+def write_blif(netlist, file, model="top"):
+    """
+    Writes a netlist or a circuit board in the BLIF format.
+    """
+    netlist, nodes, names = _prepare(netlist)
+    file.write(".model {}\n".format(model))
+    file.write(".inputs {}\n".format(" ".join(names[n]
+                                                for n in netlist.inputs)))
+    file.write(".outputs {}\n".format(" ".join(names[n]
+                                                 for n in netlist.outputs)))
+    for node in nodes:
+        opcode = netlist.types[node]
+        if opcode == OP_INPUT:
+            continue
+        fanins = [names[f] for f in netlist.fanins(node)]
+        file.write(".names {}\n".format(" ".join(fanins + [names[node]])))
+        for cube in _blif_cubes(opcode, len(fanins)):
+            file.write(cube + "\n")
+    file.write(".end\n")
+
+
+def _verilog_name(name):
+    if _VERILOG_IDENTIFIER.match(name) and name not in _VERILOG_KEYWORDS:
+        return name
+    return "\\" + name + " "
+
+
+def write_verilog(netlist, file, module="top"):
+    """
+    Writes a netlist or a circuit board as a structural Verilog module.
+
+    Outputs that are inputs or that are written more than once are copied
+    into new signals with buf, as a port cannot be both.
+    """
+    netlist, nodes, names = _prepare(netlist)
+    taken = set(names.values())
+    inputs = set(netlist.inputs)
+    output_names = []
+    copies = []
+    for node in netlist.outputs:
+        name = names[node]
+        if node in inputs or name in output_names:
+            copy = name + "_out"
+            while copy in taken:
+                copy = "_" + copy
+            taken.add(copy)
+            copies.append((copy, name))
+            name = copy
+        output_names.append(name)
+    outputs = set(output_names)
+    v = {name: _verilog_name(name) for name in taken}
+
+    ports = [names[n] for n in netlist.inputs] + output_names
+    file.write("module {} ({});\n".format(module,
+                                           ", ".join(v[p] for p in ports)))
+    for node in netlist.inputs:
+        file.write("  input {};\n".format(v[names[node]]))
+    for name in output_names:
+        file.write("  output {};\n".format(v[name]))
+    for node in nodes:
+        if node not in inputs and names[node] not in outputs:
+            file.write("  wire {};\n".format(v[names[node]]))
+    for node in nodes:
+        opcode = netlist.types[node]
+        name = v[names[node]]
+        if opcode == OP_INPUT:
+            continue
+        elif opcode == OP_FALSE or opcode == OP_TRUE:
+            file.write("  assign {} = 1'b{};\n".format(
+                name, int(opcode == OP_TRUE)))
+        else:
+            file.write("  {} ({});\n".format(
+                _VERILOG_NAMES[opcode],
+                ", ".join([name] + [v[names[f]]
+                                    for f in netlist.fanins(node)])))
+    for copy, name in copies:
+        file.write("  buf ({}, {});\n".format(v[copy], v[name]))
+    file.write("endmodule\n")
+
+
+_READERS = {".bench": read_bench, ".blif": read_blif, ".v": read_verilog}
+_WRITERS = {".bench": write_bench, ".blif": write_blif, ".v": write_verilog}
+
+
+def read(path):
+    """
+    Reads a netlist from a file in the format of its extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _READERS:
+        raise ValueError("Unknown netlist format {}".format(extension))
+    with open(path) as file:
+        return _READERS[extension](file)
+
+
+def write(netlist, path):
+    """
+    Writes a netlist or a circuit board into a file in the format of its
+    extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _WRITERS:
+        raise ValueError("Unknown netlist format {}".format(extension))
+    with open(path, "w") as file:
+        _WRITERS[extension](netlist, file)
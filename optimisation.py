@@ -0,0 +1,234 @@
+"""
+Circuit Board Optimisation
+
+This module makes circuit boards smaller without changing what their outputs
+compute. Every pass is a function that changes a board in place:
+
+    collapse_wires       Wires only repeat their input, their readers read the
+                         input of the wire instead.
+    propagate_constants  Gates that read constants are simplified, gates that
+                         become constant are replaced by a gate without inputs.
+    remove_dead_gates    Components that no Output reads from, directly or
+                         through other components, are removed. Inputs are
+                         always kept.
+    merge_duplicates     Gates that compute the same function of the same
+                         drivers are merged into one.
+
+Outputs are never removed or replaced, so the outputs a board had are still
+its outputs. Removing wires removes their delay, so a board that depends on
+the order in which components update, like an unclocked latch, can behave
+differently.
+
+Components that replace other components output None until they are updated,
+settle the board after optimising it.
+"""
+import boolean
+from logic_circuit import (Gate, Wire, Input, Output,
+                           LOOKUP_TABLE_MAX_INPUTS)
+
+
+def _is_constant(component):
+    """
+    Returns if a component is a gate that always outputs the same.
+    """
+    return isinstance(component, Gate) and\
+        isinstance(component.expression, boolean.BaseElement)
+
+
+def _replace(board, component, replacement):
+    """
+    Rewires the readers of a component to a replacement and disconnects the
+    component, so it does not read from anything on the board.
+    """
+    for reader in board.readers(component):
+        for key, driver in list(reader.inputs.items()):
+            if driver is component:
+                board.connect(reader, key, replacement)
+    for key in list(component.inputs):
+        board.disconnect(component, key)
+
+
+def _rebuild(board, replaced):
+    """
+    Puts new components where the components they replace were and drops the
+    components that were removed.
+
+    replaced maps components to the component that takes their place on the
+    board, or None if they are removed.
+    """
+    components = []
+    seen = set()
+    for c in board:
+        while c in replaced:
+            c = replaced[c]
+        if c is not None and c not in seen:
+            seen.add(c)
+            components.append(c)
+    board[:] = components
+    for c in replaced:
+        c.inputs = {k: None for k in c.inputs}
+
+
+def collapse_wires(board):
+    """
+    Connects the readers of every wire that is not an Output to the input of
+    the wire and removes the wire.
+    """
+    replaced = {}
+    for c in list(board):
+        if not isinstance(c, Wire) or isinstance(c, Output):
+            continue
+        driver = c.input
+        if driver is c:
+            # A wire reading from itself only outputs None
+            continue
+        _replace(board, c, driver)
+        replaced[c] = None
+    if replaced:
+        _rebuild(board, replaced)
+
+
+def propagate_constants(board):
+    """
+    Substitutes the outputs of constant gates into the gates that read them.
+
+    A gate whose expression becomes a constant is replaced by a gate without
+    inputs, which is substituted in turn, and a gate whose expression becomes
+    a symbol is replaced by a wire. Constants are not propagated into Outputs.
+    """
+    replaced = {}
+    queue = [c for c in board if _is_constant(c)]
+    while queue:
+        constant = queue.pop()
+        for reader in board.readers(constant):
+            if not isinstance(reader, Gate) or isinstance(reader, Output) or\
+                    reader in replaced:
+                continue
+            subs_dict = {k: v.expression for k, v in reader.inputs.items()
+                         if _is_constant(v)}
+            expression = reader.expression.subs(subs_dict)
+            inputs = {k: v for k, v in reader.inputs.items()
+                      if k in expression.symbols}
+            if isinstance(expression, boolean.Symbol):
+                replacement = Wire(inputs[expression])
+            else:
+                replacement = Gate(expression, inputs)
+            board.append(replacement)
+            _replace(board, reader, replacement)
+            replaced[reader] = replacement
+            if _is_constant(replacement):
+                queue.append(replacement)
+    if replaced:
+        _rebuild(board, replaced)
+
+
+def remove_dead_gates(board):
+    """
+    Removes the components that no Output depends on, except for Inputs.
+    """
+    on_board = set(board)
+    live = set()
+    stack = [c for c in board if isinstance(c, Output)]
+    while stack:
+        c = stack.pop()
+        if c in live:
+            continue
+        live.add(c)
+        stack.extend(d for d in board.drivers(c) if d in on_board)
+    replaced = {c: None for c in board
+                if c not in live and not isinstance(c, Input)}
+    if replaced:
+        _rebuild(board, replaced)
+
+
+def merge_duplicates(board):
+    """
+    Merges gates that compute the same function of the same drivers.
+
+    The functions are compared as truth tables, so an AND gate and a gate
+    with the expression B*A are the same, but gates with more than
+    LOOKUP_TABLE_MAX_INPUTS inputs are never merged. Gates in feedback loops
+    are not merged either.
+    """
+    position = {c: i for i, c in enumerate(board)}
+    replaced = {}
+    # Maps (truth table, drivers) to the gate that is kept
+    gates = {}
+    # Drivers come first, so the readers of merged gates can merge as well
+    for component in board.strongly_connected_components():
+        c = component[0]
+        if len(component) > 1 or not isinstance(c, Gate) or\
+                isinstance(c, Output) or c in c.inputs.values():
+            continue
+        symbols = c.lookup_table[0]
+        if len(symbols) > LOOKUP_TABLE_MAX_INPUTS or\
+                any(c.inputs.get(s) is None for s in symbols):
+            continue
+        symbols = sorted(symbols,
+                         key=lambda s: position.get(c.inputs[s], -1))
+        key = (boolean.to_bitset(c.expression, symbols),
+               tuple(c.inputs[s] for s in symbols))
+        kept = gates.setdefault(key, c)
+        if kept is not c:
+            _replace(board, c, kept)
+            replaced[c] = None
+    if replaced:
+        _rebuild(board, replaced)
+
+
+DEFAULT_PASSES = (collapse_wires, propagate_constants, remove_dead_gates,
+                  merge_duplicates)
+
+
+class PassManager:
+
+    """
+    Runs optimisation passes on circuit boards.
+
+    A pass is a function that changes a board in place. The passes are run in
+    order, again and again until a round of all passes does not make the
+    board any smaller or max_rounds rounds have been run.
+    """
+
+    def __init__(self, passes=DEFAULT_PASSES, max_rounds=10):
+        self.passes = list(passes)
+        self.max_rounds = max_rounds
+
+    def run(self, board):
+        """
+        Optimises a board and returns a report of what every pass did.
+
+        The report is a list of (pass name, components before, components
+        after) in the order the passes were run.
+        """
+        report = []
+        for _ in range(self.max_rounds):
+            size = len(board)
+            for optimisation_pass in self.passes:
+                before = len(board)
+                optimisation_pass(board)
+                report.append((optimisation_pass.__name__, before,
+                               len(board)))
+            if len(board) == size:
+                break
+        return report
+
+
+def optimise(board, passes=DEFAULT_PASSES):
+    """
+    Optimises a board with the passes and returns the report of PassManager.
+    """
+    return PassManager(passes).run(board)
+
+
+def format_report(report):
+    """
+    Returns a report as a table with one line for every pass.
+    """
+    width = max([len("pass")] + [len(name) for name, _, _ in report])
+    lines = ["{:<{}}  {:>7}  {:>7}  {:>7}".format(
+        "pass", width, "before", "after", "removed")]
+    for name, before, after in report:
+        lines.append("{:<{}}  {:>7}  {:>7}  {:>7}".format(
+            name, width, before, after, before - after))
+    return "\n".join(lines)
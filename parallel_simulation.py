@@ -0,0 +1,371 @@
+"""
+Parallel Simulation
+
+This module simulates netlists on many processes at once, in two ways.
+
+Vector batches: run_batches splits the input vectors into one batch per
+process and simulates the whole netlist for every batch, see
+Netlist.run_vectors. The processes do not need to talk to each other, so
+this is the fastest way to simulate many vectors.
+
+Partitioned: PartitionedSimulator splits the nodes of a netlist that is too
+large to simulate on one process into clusters, one per process. Nodes are
+assigned level by level, every cluster gets about the same number of nodes
+of every level, so the processes have the same amount of work between two
+levels, and a node goes to the cluster most of its fanins are in, so few
+edges are cut. The values of nodes that are read by other clusters, the
+boundary, are exchanged through shared memory. The processes only wait for
+each other before a level that reads a boundary value that might not have
+been written yet.
+
+Circuit boards are converted to netlists first and results are the values
+of the outputs of the netlist, ints that hold one vector per bit like
+Netlist.run_vectors, or None for outputs that depend on components that are
+not connected.
+"""
+import array
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import os
+
+import logic_circuit
+from logic_circuit import OP_INPUT, OP_NONE
+from netlist import Netlist, evaluate_word
+
+# Every cluster can have this many more nodes of a level than the average
+BALANCE_SLACK = 0.1
+
+
+def _netlist(circuit):
+    if isinstance(circuit, logic_circuit.CircuitBoard):
+        return Netlist.from_board(circuit)
+    return circuit
+
+
+def _processes(processes):
+    if processes is None:
+        return os.cpu_count() or 1
+    if processes < 1:
+        raise ValueError("At least 1 process is needed but got {}"
+                         .format(processes))
+    return processes
+
+
+def levels(netlist):
+    """
+    Returns the level of every node, nodes without fanins are on level 0 and
+    every other node is one level above its highest fanin.
+    """
+    result = array.array("I", [0]) * len(netlist)
+    for node in range(len(netlist)):
+        fanins = netlist.fanins(node)
+        if len(fanins):
+            result[node] = 1 + max(result[f] for f in fanins)
+    return result
+
+
+def partition(circuit, clusters):
+    """
+    Returns the cluster of every node of a netlist, see PartitionedSimulator.
+
+    Nodes without fanins, the inputs and constants, are in cluster 0 but
+    belong to every cluster.
+    """
+    netlist = _netlist(circuit)
+    node_levels = levels(netlist)
+    by_level = {}
+    for node in range(len(netlist)):
+        if node_levels[node]:
+            by_level.setdefault(node_levels[node], []).append(node)
+    assignment = array.array("I", [0]) * len(netlist)
+    for level in sorted(by_level):
+        nodes = by_level[level]
+        capacity = max(1, int(len(nodes) / clusters * (1 + BALANCE_SLACK)
+                              + 0.999))
+        counts = [0] * clusters
+        for node in nodes:
+            votes = [0] * clusters
+            for f in netlist.fanins(node):
+                if node_levels[f]:
+                    votes[assignment[f]] += 1
+            # The most votes, then the fewest nodes on this level
+            cluster = max((c for c in range(clusters)
+                           if counts[c] < capacity),
+                          key=lambda c: (votes[c], -counts[c]))
+            assignment[node] = cluster
+            counts[cluster] += 1
+    return assignment
+
+
+def cut_edges(circuit, assignment):
+    """
+    Returns the number of fanin edges between nodes of different clusters,
+    edges from nodes without fanins do not count.
+    """
+    netlist = _netlist(circuit)
+    cut = 0
+    for node in range(len(netlist)):
+        for f in netlist.fanins(node):
+            if assignment[f] != assignment[node] and\
+                    len(netlist.fanins(f)):
+                cut += 1
+    return cut
+
+
+def _run_stages(stages, sources, slots, buffer, size, full):
+    """
+    Simulates the nodes of a cluster, see _cluster_worker.
+    """
+    values = {}
+    for node, opcode in sources:
+        values[node] = evaluate_word(opcode, (), full)
+    for stage, nodes in enumerate(stages):
+        if stage:
+            yield
+        for node, opcode, fanins, shared in nodes:
+            fanin_values = []
+            for f in fanins:
+                if f in values:
+                    fanin_values.append(values[f])
+                else:
+                    offset = slots[f] * size
+                    fanin_values.append(int.from_bytes(
+                        buffer[offset:offset + size], "little"))
+            value = evaluate_word(opcode, fanin_values, full)
+            values[node] = value
+            if shared:
+                offset = slots[node] * size
+                buffer[offset:offset + size] = value.to_bytes(size, "little")
+
+
+def _cluster_worker(stages, sources, slots, barrier, connection):
+    """
+    Simulates one cluster for every request sent through connection, a
+    (shared memory name, width) tuple, until it receives None.
+    """
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        name, width = request
+        memory = shared_memory.SharedMemory(name)
+        try:
+            size = max(1, (width + 7) // 8)
+            for _ in _run_stages(stages, sources, slots, memory.buf, size,
+                                 (1 << width) - 1):
+                barrier.wait()
+        finally:
+            memory.close()
+        connection.send(True)
+    connection.close()
+
+
+class PartitionedSimulator:
+
+    """
+    Simulates a netlist or a circuit board with one process per cluster of
+    nodes.
+
+    The processes are started once and simulate every call of run_vectors
+    until close is called, the simulator can be used in a with statement.
+    assignment defaults to partition(circuit, processes).
+    """
+
+    def __init__(self, circuit, processes=None, assignment=None):
+        netlist = _netlist(circuit)
+        self.netlist = netlist
+        clusters = _processes(processes)
+        if assignment is None:
+            assignment = partition(netlist, clusters)
+        elif max(assignment, default=0) >= clusters:
+            raise ValueError("Nodes are assigned to {} clusters but there "
+                             "are {} processes"
+                             .format(max(assignment) + 1, clusters))
+        self.assignment = assignment
+        types = netlist.types
+        node_levels = levels(netlist)
+
+        # Nodes that depend on components that are not connected never have
+        # a value
+        unknown = set()
+        for node in range(len(netlist)):
+            if types[node] == OP_NONE or\
+                    any(f in unknown for f in netlist.fanins(node)):
+                unknown.add(node)
+        self.unknown = unknown
+
+        # Shared memory has a slot for every input, boundary node and output
+        shared = set(netlist.inputs)
+        shared.update(n for n in netlist.outputs
+                      if n not in unknown and node_levels[n])
+        # The levels before which the processes wait for each other, a level
+        # starts a new stage if it reads a node of another cluster that is in
+        # the current stage
+        stage_levels = [1]
+        for node in sorted(range(len(netlist)), key=node_levels.__getitem__):
+            level = node_levels[node]
+            if level == 0 or node in unknown:
+                continue
+            for f in netlist.fanins(node):
+                if node_levels[f] and assignment[f] != assignment[node]:
+                    shared.add(f)
+                    if node_levels[f] >= stage_levels[-1]:
+                        stage_levels.append(level)
+        self.slots = {node: slot for slot, node in enumerate(sorted(shared))}
+        self.stages = len(stage_levels)
+
+        # The program of every cluster, see _run_stages
+        stage_of_level = {}
+        stage = 0
+        for level in range(max(node_levels, default=0) + 1):
+            if stage + 1 < len(stage_levels) and\
+                    level >= stage_levels[stage + 1]:
+                stage += 1
+            stage_of_level[level] = stage
+        programs = [[[] for _ in stage_levels] for _ in range(clusters)]
+        sources = [[] for _ in range(clusters)]
+        for node in range(len(netlist)):
+            if node in unknown:
+                continue
+            fanins = tuple(netlist.fanins(node))
+            if not fanins:
+                if types[node] != OP_INPUT:
+                    # Every cluster computes the constants it reads
+                    for cluster in range(clusters):
+                        sources[cluster].append((node, types[node]))
+                continue
+            programs[assignment[node]][stage_of_level[node_levels[node]]]\
+                .append((node, types[node], fanins, node in shared))
+
+        # The processes have to share the tracker of the shared memory, or
+        # they would report it as leaked
+        resource_tracker.ensure_running()
+        self._barrier = multiprocessing.Barrier(clusters)
+        self._connections = []
+        self._processes = []
+        for cluster in range(clusters):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_cluster_worker,
+                args=(programs[cluster], sources[cluster], self.slots,
+                      self._barrier, child),
+                daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Stops the processes.
+        """
+        for connection in self._connections:
+            connection.send(None)
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def run_vectors(self, inputs, width):
+        """
+        Returns the values of the outputs of the netlist for many input
+        vectors at once, like Netlist.run_vectors.
+        """
+        netlist = self.netlist
+        if len(inputs) != len(netlist.inputs):
+            raise ValueError("Expected {} inputs but got {}"
+                             .format(len(netlist.inputs), len(inputs)))
+        if not self._processes:
+            raise ValueError("The simulator has been closed")
+        size = max(1, (width + 7) // 8)
+        full = (1 << width) - 1
+        memory = shared_memory.SharedMemory(
+            create=True, size=max(1, size * len(self.slots)))
+        try:
+            buffer = memory.buf
+            for node, value in zip(netlist.inputs, inputs):
+                offset = self.slots[node] * size
+                buffer[offset:offset + size] = (value & full).to_bytes(
+                    size, "little")
+            for connection in self._connections:
+                connection.send((memory.name, width))
+            for connection in self._connections:
+                connection.recv()
+            outputs = []
+            for node in netlist.outputs:
+                if node in self.unknown:
+                    outputs.append(None)
+                elif node not in self.slots:
+                    # A constant
+                    outputs.append(evaluate_word(netlist.types[node], (),
+                                                 full))
+                else:
+                    offset = self.slots[node] * size
+                    outputs.append(int.from_bytes(
+                        buffer[offset:offset + size], "little"))
+            del buffer
+        finally:
+            memory.close()
+            memory.unlink()
+        return outputs
+
+
+# The netlist of the processes of run_batches
+_batch_netlist = None
+
+
+def _initialize_batch(netlist):
+    global _batch_netlist
+    _batch_netlist = netlist
+
+
+def _run_batch(batch):
+    inputs, width = batch
+    values = _batch_netlist.run_vectors(inputs, width)
+    return [values[node] for node in _batch_netlist.outputs]
+
+
+def run_batches(circuit, inputs, width, processes=None):
+    """
+    Returns the values of the outputs of a netlist or a circuit board for
+    many input vectors at once, like Netlist.run_vectors, with the vectors
+    split into one batch per process.
+    """
+    netlist = _netlist(circuit)
+    if len(inputs) != len(netlist.inputs):
+        raise ValueError("Expected {} inputs but got {}"
+                         .format(len(netlist.inputs), len(inputs)))
+    processes = min(_processes(processes), max(1, width))
+    # Batches of whole bytes, so the vectors are split cheaply
+    batch_width = -(-width // processes)
+    batch_width += -batch_width % 8
+    batches = []
+    for start in range(0, width, batch_width):
+        end = min(width, start + batch_width)
+        mask = (1 << (end - start)) - 1
+        batches.append(([value >> start & mask for value in inputs],
+                        end - start))
+    if len(batches) == 1:
+        values = netlist.run_vectors(inputs, width)
+        return [values[node] for node in netlist.outputs]
+    with multiprocessing.Pool(len(batches), _initialize_batch,
+                              (netlist,)) as pool:
+        results = pool.map(_run_batch, batches, chunksize=1)
+    outputs = []
+    for i in range(len(netlist.outputs)):
+        if any(result[i] is None for result in results):
+            outputs.append(None)
+            continue
+        value = 0
+        for (_, batch), result in zip(reversed(batches), reversed(results)):
+            value = value << batch | result[i]
+        outputs.append(value)
+    return outputs
+
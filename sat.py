@@ -0,0 +1,303 @@
+"""
+SAT Solving
+
+This module decides if a boolean formula in conjunctive normal form can be
+satisfied. It is a conflict driven clause learning solver with two watched
+literals, activity based decisions, saved phases and restarts, which is
+enough for the formulas of circuits with thousands of gates.
+
+Variables are numbered from 0 and literals are numbered like the literals of
+aig.py, 2 * variable if it is positive and 2 * variable + 1 if it is
+negated, so the variables of a formula can be the nodes of a circuit. A
+clause is a sequence of literals, at least one of which has to be TRUE.
+"""
+import heapq
+
+# Conflicts before the first restart, every restart waits longer
+RESTART_INTERVAL = 100
+RESTART_GROWTH = 1.5
+# Activities are multiplied by this after every conflict, by making the
+# increment larger instead
+ACTIVITY_DECAY = 0.95
+
+
+class Solver:
+
+    """
+    An incremental SAT solver.
+
+    Clauses can be added between calls to solve, which can assume literals
+    to be TRUE for one call only. After solve returned True, value returns
+    the values of the satisfying assignment.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        # Clauses watching a literal, they are looked at when it turns FALSE
+        self.watches = []
+        # The value, decision level and reason clause of every variable
+        self.values = []
+        self.levels = []
+        self.reasons = []
+        self.activity = []
+        self.phases = []
+        self.trail = []
+        # Where every decision level starts on the trail
+        self.trail_limits = []
+        self.propagated = 0
+        self.increment = 1.0
+        self.heap = []
+        self.model = None
+        # False once the clauses cannot be satisfied at all
+        self.ok = True
+        self.conflicts = 0
+
+    def _ensure_variable(self, variable):
+        while len(self.values) <= variable:
+            self.watches.append([])
+            self.watches.append([])
+            self.values.append(None)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+            heapq.heappush(self.heap, (0.0, len(self.values) - 1))
+
+    def _value(self, literal):
+        value = self.values[literal >> 1]
+        if value is None:
+            return None
+        return value != bool(literal & 1)
+
+    def value(self, literal):
+        """
+        Returns the value of a literal in the last satisfying assignment.
+        """
+        if literal >> 1 >= len(self.model):
+            return None
+        value = self.model[literal >> 1]
+        if value is None:
+            return None
+        return value != bool(literal & 1)
+
+    def add_clause(self, literals):
+        """
+        Adds a clause. Returns False if the clauses cannot be satisfied
+        anymore.
+        """
+        if not self.ok:
+            return False
+        self._cancel(0)
+        clause = []
+        for literal in dict.fromkeys(literals):
+            self._ensure_variable(literal >> 1)
+            value = self._value(literal)
+            if value is True or literal ^ 1 in clause:
+                # Satisfied forever
+                return True
+            if value is None:
+                clause.append(literal)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._attach(clause)
+        return self.ok
+
+    def _attach(self, clause):
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def _assign(self, literal, reason):
+        variable = literal >> 1
+        self.values[variable] = not literal & 1
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def _propagate(self):
+        """
+        Assigns the literals that are implied by the assignment. Returns a
+        clause that is FALSE or None.
+        """
+        clauses = self.clauses
+        watches = self.watches
+        values = self.values
+        trail = self.trail
+        while self.propagated < len(trail):
+            false_literal = trail[self.propagated] ^ 1
+            self.propagated += 1
+            watching = watches[false_literal]
+            kept = []
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                i += 1
+                clause = clauses[index]
+                # The FALSE literal is always the second one
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                value = values[first >> 1]
+                if value is not None and value != bool(first & 1):
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = values[literal >> 1]
+                    if value is None or value != bool(literal & 1):
+                        clause[1], clause[k] = literal, false_literal
+                        watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if values[first >> 1] is not None:
+                        # Every literal is FALSE
+                        kept.extend(watching[i:])
+                        watches[false_literal] = kept
+                        return index
+                    self._assign(first, index)
+            watches[false_literal] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Returns the clause learnt from a conflict, with the literal that
+        becomes TRUE after backtracking first, and the level to backtrack to.
+        """
+        levels = self.levels
+        level = len(self.trail_limits)
+        seen = set()
+        learnt = [None]
+        count = 0
+        literal = None
+        i = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                variable = q >> 1
+                if variable not in seen and levels[variable] > 0:
+                    seen.add(variable)
+                    self._bump(variable)
+                    if levels[variable] == level:
+                        count += 1
+                    else:
+                        learnt.append(q)
+            while self.trail[i] >> 1 not in seen:
+                i -= 1
+            literal = self.trail[i]
+            i -= 1
+            count -= 1
+            if count == 0:
+                break
+            clause = self.clauses[self.reasons[literal >> 1]]
+        learnt[0] = literal ^ 1
+        backtrack_level = 0
+        if len(learnt) > 1:
+            # The literal of the highest level is watched as well
+            k = max(range(1, len(learnt)),
+                    key=lambda k: levels[learnt[k] >> 1])
+            learnt[1], learnt[k] = learnt[k], learnt[1]
+            backtrack_level = levels[learnt[1] >> 1]
+        return learnt, backtrack_level
+
+    def _bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-a, v) for v, a in enumerate(self.activity)
+                         if self.values[v] is None]
+            heapq.heapify(self.heap)
+        elif self.values[variable] is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def _cancel(self, level):
+        """
+        Undoes the assignments of the decision levels above level.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = literal >> 1
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.propagated = start
+
+    def _decide(self):
+        """
+        Returns the unassigned variable with the highest activity or None.
+        """
+        heap = self.heap
+        while heap:
+            _, variable = heapq.heappop(heap)
+            if self.values[variable] is None:
+                return variable
+        return None
+
+    def solve(self, assumptions=(), conflict_limit=None):
+        """
+        Returns True if the clauses and the assumptions can be satisfied,
+        False if they cannot and None if more than conflict_limit conflicts
+        happened before either was found.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self._cancel(0)
+        for literal in assumptions:
+            self._ensure_variable(literal >> 1)
+        conflicts = 0
+        interval = RESTART_INTERVAL
+        restart = interval
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                conflicts += 1
+                self.conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learnt, level = self._analyze(conflict)
+                self._cancel(level)
+                if len(learnt) == 1:
+                    self._assign(learnt[0], None)
+                else:
+                    self._assign(learnt[0], self._attach(learnt))
+                self.increment /= ACTIVITY_DECAY
+                continue
+            if conflict_limit is not None and conflicts >= conflict_limit:
+                self._cancel(0)
+                return None
+            if conflicts >= restart:
+                interval *= RESTART_GROWTH
+                restart = conflicts + interval
+                self._cancel(0)
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self._value(literal)
+                self.trail_limits.append(len(self.trail))
+                if value is False:
+                    self._cancel(0)
+                    return False
+                if value is None:
+                    self._assign(literal, None)
+                continue
+            variable = self._decide()
+            if variable is None:
+                self.model = list(self.values)
+                self._cancel(0)
+                return True
+            self.trail_limits.append(len(self.trail))
+            self._assign(2 * variable + (not self.phases[variable]), None)
@@ -0,0 +1,389 @@
+"""
+Simulation Service
+
+This module runs a local server that keeps netlists in memory and evaluates
+input vectors on them for other processes, so they do not have to read and
+build their own circuit boards. It uses asyncio and listens on a TCP port of
+localhost or on a Unix socket.
+
+Requests and responses are JSON objects, one per line. Every request has an
+"id" that is copied into its response and an "op":
+
+    {"op": "evaluate", "board": name, "vectors": [[0, 1, ...], ...]}
+        Returns {"outputs": [[0, 1, ...], ...]}, the outputs of the netlist
+        for every vector, null for outputs that are not connected.
+    {"op": "load", "board": name, "path": path}
+        Reads a netlist file, see netlist_formats.read, and returns {}.
+    {"op": "boards"}
+        Returns {"boards": {name: [inputs, outputs], ...}}.
+    {"op": "metrics"}
+        Returns {"metrics": Metrics.snapshot()}.
+
+Failed requests return {"error": message}. Responses can come in a different
+order than the requests were sent in.
+
+Evaluate requests for the same board that arrive within batch_delay of each
+other are coalesced into one batch, whose vectors are simulated at once with
+Netlist.run_vectors, one vector per bit.
+"""
+import asyncio
+import collections
+import json
+import time
+
+import logic_circuit
+import netlist_formats
+from netlist import Netlist
+
+# Seconds to wait for more requests before a batch is simulated
+BATCH_DELAY = 0.002
+# A batch with this many vectors is simulated without waiting
+MAX_BATCH = 4096
+# The number of latencies the percentiles are computed from
+LATENCY_WINDOW = 10000
+# The longest line a request can be
+LINE_LIMIT = 1 << 26
+
+
+class ServiceError(Exception):
+
+    """
+    Raised by the client when the server could not handle a request.
+    """
+    pass
+
+
+class Metrics:
+
+    """
+    Counts the requests and batches of a server and their latencies.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.vectors = 0
+        self.batches = 0
+        self.errors = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self):
+        """
+        Returns the counts, the vectors per second since the server started,
+        the mean number of requests and vectors per batch and the 50th, 95th
+        and 99th percentiles and the maximum of the latencies of the last
+        LATENCY_WINDOW requests in seconds.
+        """
+        elapsed = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1,
+                                 int(p / 100 * len(latencies)))]
+
+        return {"requests": self.requests,
+                "vectors": self.vectors,
+                "batches": self.batches,
+                "errors": self.errors,
+                "uptime": elapsed,
+                "vectors_per_second": self.vectors / elapsed if elapsed
+                else 0.0,
+                "requests_per_batch": self.requests / self.batches
+                if self.batches else 0.0,
+                "vectors_per_batch": self.vectors / self.batches
+                if self.batches else 0.0,
+                "latency_p50": percentile(50),
+                "latency_p95": percentile(95),
+                "latency_p99": percentile(99),
+                "latency_max": latencies[-1] if latencies else None}
+
+
+class SimulationServer:
+
+    """
+    Evaluates vectors on netlists for clients.
+
+    boards maps names to netlists, circuit boards or paths of netlist files.
+    """
+
+    def __init__(self,
+                 boards={},
+                 batch_delay=BATCH_DELAY,
+                 max_batch=MAX_BATCH):
+        self.batch_delay = batch_delay
+        self.max_batch = max_batch
+        self.netlists = {}
+        self.metrics = Metrics()
+        # Requests waiting to be simulated by board, as the netlist they were
+        # checked against and a list of (vectors, future)
+        self._pending = {}
+        self._pending_vectors = {}
+        self._timers = {}
+        self._server = None
+        for name, circuit in boards.items():
+            self.add_board(name, circuit)
+
+    def add_board(self, name, circuit):
+        """
+        Adds or replaces a netlist, a circuit board or a netlist file.
+        """
+        if isinstance(circuit, str):
+            circuit = netlist_formats.read(circuit)
+        elif isinstance(circuit, logic_circuit.CircuitBoard):
+            circuit = Netlist.from_board(circuit)
+        self.netlists[name] = circuit
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Starts listening on a TCP port, 0 picks a free one, or on a Unix
+        socket if path is given. Returns the address that is listened on.
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle, path, limit=LINE_LIMIT)
+            return path
+        self._server = await asyncio.start_server(
+            self._handle, host, port, limit=LINE_LIMIT)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def evaluate(self, name, vectors):
+        """
+        Returns the outputs of a netlist for vectors of its inputs.
+
+        The vectors are simulated together with the vectors of other
+        requests for the same netlist.
+        """
+        if name not in self.netlists:
+            raise ValueError("There is no board named {}".format(name))
+        netlist = self.netlists[name]
+        vectors = list(vectors)
+        for vector in vectors:
+            if len(vector) != len(netlist.inputs):
+                raise ValueError("Expected {} inputs but got {}"
+                                 .format(len(netlist.inputs), len(vector)))
+        if not vectors:
+            return []
+        if name in self._pending and self._pending[name][0] is not netlist:
+            # The board was replaced, the waiting requests are for the old one
+            self._flush(name)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(name, (netlist, []))[1].append(
+            (vectors, future))
+        count = self._pending_vectors.get(name, 0) + len(vectors)
+        self._pending_vectors[name] = count
+        if count >= self.max_batch:
+            self._flush(name)
+        elif name not in self._timers:
+            self._timers[name] = asyncio.get_running_loop().call_later(
+                self.batch_delay, self._flush, name)
+        return await future
+
+    def _flush(self, name):
+        """
+        Simulates all waiting requests for a board as one batch.
+        """
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        netlist, requests = self._pending.pop(name, (None, []))
+        self._pending_vectors.pop(name, None)
+        if not requests:
+            return
+        try:
+            width = sum(len(vectors) for vectors, _ in requests)
+            inputs = [0] * len(netlist.inputs)
+            bit = 0
+            for vectors, _ in requests:
+                for vector in vectors:
+                    for i, value in enumerate(vector):
+                        if value:
+                            inputs[i] |= 1 << bit
+                    bit += 1
+            values = netlist.run_vectors(inputs, width)
+        except Exception as e:
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        outputs = [values[node] for node in netlist.outputs]
+        self.metrics.batches += 1
+        bit = 0
+        for vectors, future in requests:
+            result = []
+            for _ in vectors:
+                result.append([None if value is None else value >> bit & 1
+                               for value in outputs])
+                bit += 1
+            if not future.done():
+                future.set_result(result)
+
+    async def _respond(self, request, writer):
+        started = time.monotonic()
+        response = {"id": request.get("id")}
+        try:
+            op = request.get("op")
+            if op == "evaluate":
+                vectors = request["vectors"]
+                response["outputs"] = await self.evaluate(request["board"],
+                                                          vectors)
+                self.metrics.requests += 1
+                self.metrics.vectors += len(vectors)
+                self.metrics.latencies.append(time.monotonic() - started)
+            elif op == "load":
+                self.add_board(request["board"], request["path"])
+            elif op == "boards":
+                response["boards"] = {
+                    name: [len(n.inputs), len(n.outputs)]
+                    for name, n in self.netlists.items()}
+            elif op == "metrics":
+                response["metrics"] = self.metrics.snapshot()
+            else:
+                raise ValueError("Unknown op {!r}".format(op))
+        except Exception as e:
+            self.metrics.errors += 1
+            response = {"id": request.get("id"),
+                        "error": "{}: {}".format(e.__class__.__name__, e)}
+        if not writer.is_closing():
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def _handle(self, reader, writer):
+        """
+        Handles the requests of a connection, every request on its own so
+        requests of one connection can be batched together.
+        """
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be an object")
+                except ValueError as e:
+                    self.metrics.errors += 1
+                    writer.write(json.dumps({"id": None, "error": str(e)})
+                                 .encode() + b"\n")
+                    continue
+                task = asyncio.create_task(self._respond(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class SimulationClient:
+
+    """
+    A connection to a SimulationServer.
+
+    Requests can be sent concurrently over one connection, they are matched
+    with their responses by their ids.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._futures = {}
+        self._next_id = 0
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=None, path=None):
+        """
+        Connects to a server on a TCP port of a host or on a Unix socket.
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(
+                path, limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(
+                host, port, limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._receiver
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._futures.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except ConnectionError:
+            pass
+        finally:
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(
+                        ServiceError("The connection was closed"))
+            self._futures = {}
+
+    async def request(self, request):
+        """
+        Sends a request and returns its response. Raises ServiceError if
+        the response is an error.
+        """
+        self._next_id += 1
+        request = dict(request, id=self._next_id)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[self._next_id] = future
+        self._writer.write(json.dumps(request).encode() + b"\n")
+        await self._writer.drain()
+        response = await future
+        if "error" in response:
+            raise ServiceError(response["error"])
+        return response
+
+    async def evaluate(self, board, vectors):
+        """
+        Returns the outputs of a board for every vector, as lists of bools.
+        """
+        vectors = [[int(bool(v)) for v in vector] for vector in vectors]
+        response = await self.request({"op": "evaluate", "board": board,
+                                       "vectors": vectors})
+        return [[None if v is None else bool(v) for v in outputs]
+                for outputs in response["outputs"]]
+
+    async def load(self, board, path):
+        await self.request({"op": "load", "board": board, "path": path})
+
+    async def boards(self):
+        response = await self.request({"op": "boards"})
+        return {name: tuple(sizes)
+                for name, sizes in response["boards"].items()}
+
+    async def metrics(self):
+        return (await self.request({"op": "metrics"}))["metrics"]
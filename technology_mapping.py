@@ -0,0 +1,233 @@
+"""
+Technology Mapping
+
+This module maps boolean expressions onto networks built only from NAND gates,
+only from NOR gates or from a mix of both. The result is again an expression,
+where a NAND gate is written as NOT(AND(A, B)) and a NOR gate as NOT(OR(A, B)),
+so it can be given to logic_circuit.circuit_board or
+logic_circuit_gui.renderable_components which turn these into single gates.
+
+The expression is first decomposed into an and-inverter graph, see aig. For
+every node all cuts of at most 3 leaves are enumerated and the function of the
+node over the leaves of each cut is looked up in a small library. The library
+holds a minimum size formula for every function of up to 3 inputs and is
+computed the first time it is used.
+"""
+import aig
+import boolean
+
+# The gate libraries that can be mapped to
+LIBRARIES = ("nand", "nor", "mixed")
+
+# The maximum number of leaves of a cut
+CUT_SIZE = 3
+# The maximum number of cuts that are kept for every node
+CUT_LIMIT = 12
+
+# Truth tables of the leaves of a cut for 1, 2 and 3 leaves
+_LEAF_TABLES = {1: (0b10,),
+                2: (0b1010, 0b1100),
+                3: (0b10101010, 0b11001100, 0b11110000)}
+
+# Caches libraries by (library, number of inputs)
+_library_cache = {}
+
+
+def library(name, inputs):
+    """
+    Returns the gate library for the given number of inputs.
+
+    The library maps every truth table of the inputs to a tuple of the number
+    of gates and the formula. A formula is either the index of an input or a
+    tuple of (operation, formula, formula), where operation is boolean.AND for
+    NAND and boolean.OR for NOR.
+    """
+    if name not in LIBRARIES:
+        raise ValueError("Library must be one of {} but is {}"
+                         .format(LIBRARIES, name))
+    key = (name, inputs)
+    if key in _library_cache:
+        return _library_cache[key]
+
+    full = (1 << (1 << inputs)) - 1
+    operations = []
+    if name in ("nand", "mixed"):
+        operations.append((boolean.AND, lambda a, b: ~(a & b) & full))
+    if name in ("nor", "mixed"):
+        operations.append((boolean.OR, lambda a, b: ~(a | b) & full))
+
+    best = {}
+    for i, table in enumerate(_LEAF_TABLES[inputs]):
+        best[table] = (0, i)
+    # Keep combining the best formulas found so far until nothing improves,
+    # there are at most 256 functions so this converges quickly.
+    changed = True
+    while changed:
+        changed = False
+        found = list(best.items())
+        for i, (table_a, (cost_a, _)) in enumerate(found):
+            for table_b, (cost_b, _) in found[i:]:
+                # NAND(A, A) is an inverter that only needs A once
+                if table_a == table_b:
+                    cost = cost_a + 1
+                else:
+                    cost = cost_a + cost_b + 1
+                for operation, function in operations:
+                    table = function(table_a, table_b)
+                    if table not in best or cost < best[table][0]:
+                        best[table] = (cost,
+                                       (operation, best[table_a][1],
+                                        best[table_b][1]))
+                        changed = True
+    _library_cache[key] = best
+    return best
+
+
+def map_expression(expression, library_name="nand"):
+    """
+    Returns an equivalent expression that only uses the gates of a library.
+
+    The library can be "nand", "nor" or "mixed". Subexpressions that are used
+    more than once are the same object in the returned expression.
+    """
+    if isinstance(expression, str):
+        expression = boolean.parse(expression, eval=False)
+    if not isinstance(expression, boolean.Expression):
+        raise TypeError("Argument must be str or Expression but it is {}"
+                        .format(expression.__class__))
+    if library_name not in LIBRARIES:
+        raise ValueError("Library must be one of {} but is {}"
+                         .format(LIBRARIES, library_name))
+
+    graph = aig.AIG()
+    root = graph.add_expression(expression)
+    if root >> 1 == 0:
+        return boolean.TRUE if root & 1 else boolean.FALSE
+    symbols = dict(zip(graph.inputs, graph.input_names))
+
+    fanins = graph.fanins
+    size = len(fanins)
+    fanout = [0] * size
+    for node in range(size):
+        if graph.is_and(node):
+            for literal in fanins[node]:
+                fanout[literal >> 1] += 1
+    fanout[root >> 1] += 1
+
+    def expand(table, cut, leaves):
+        """
+        Returns the truth table of a function of the leaves of a cut over the
+        leaves of a larger cut.
+        """
+        positions = [leaves.index(leaf) for leaf in cut]
+        result = 0
+        for m in range(1 << len(leaves)):
+            index = 0
+            for i, position in enumerate(positions):
+                index |= (m >> position & 1) << i
+            result |= (table >> index & 1) << m
+        return result
+
+    # Cut enumeration and choosing the cut with the smallest area flow, in one
+    # pass over the nodes, which are in topological order. cuts maps the cuts
+    # of every node to the truth table of the node over their leaves.
+    cuts = [None] * size
+    flow = [0.0] * size
+    choice = [None] * size
+
+    def flow_key(cut):
+        return sum(flow[leaf] for leaf in cut)
+
+    for node in range(1, size):
+        if not graph.is_and(node):
+            cuts[node] = {(node,): _LEAF_TABLES[1][0]}
+            continue
+        a, b = fanins[node]
+        node_cuts = {}
+        for cut_a, table_a in cuts[a >> 1].items():
+            for cut_b, table_b in cuts[b >> 1].items():
+                cut = tuple(sorted(set(cut_a) | set(cut_b)))
+                if len(cut) > CUT_SIZE or cut in node_cuts:
+                    continue
+                full = (1 << (1 << len(cut))) - 1
+                node_cuts[cut] =\
+                    (expand(table_a, cut_a, cut) ^ (full if a & 1 else 0)) &\
+                    (expand(table_b, cut_b, cut) ^ (full if b & 1 else 0))
+        best = None
+        for cut, table in node_cuts.items():
+            cost, _ = library(library_name, len(cut))[table]
+            cost += flow_key(cut)
+            if best is None or cost < best[0]:
+                best = (cost, cut)
+        flow[node] = best[0] / max(fanout[node], 1)
+        choice[node] = (best[1], node_cuts[best[1]])
+        # Keep the smallest cuts, the trivial cut is always kept
+        kept = sorted(node_cuts, key=lambda c: (len(c), flow_key(c)))
+        cuts[node] = {cut: node_cuts[cut] for cut in kept[:CUT_LIMIT - 1]}
+        cuts[node][(node,)] = _LEAF_TABLES[1][0]
+
+    # Covering from the output, both polarities of a node can be needed. The
+    # polarities that are needed are found from the output backwards, then
+    # they are built from the inputs forwards.
+    needed = [set() for _ in range(size)]
+    stack = [(root >> 1, root & 1)]
+    while stack:
+        node, complement = stack.pop()
+        if complement in needed[node]:
+            continue
+        needed[node].add(complement)
+        if graph.is_and(node):
+            stack.extend((leaf, 0) for leaf in choice[node][0])
+        elif complement:
+            # An inverter reads the input
+            stack.append((node, 0))
+
+    def instantiate(formula, leaves, instances):
+        if isinstance(formula, int):
+            return leaves[formula]
+        if formula not in instances:
+            operation, a, b = formula
+            instances[formula] = boolean.NOT(
+                operation(instantiate(a, leaves, instances),
+                          instantiate(b, leaves, instances),
+                          eval=False),
+                eval=False)
+        return instances[formula]
+
+    mapped = {}
+    for node in range(1, size):
+        for complement in sorted(needed[node]):
+            if not graph.is_and(node):
+                if not complement:
+                    mapped[node, complement] = symbols[node]
+                    continue
+                leaves = (node,)
+                table = 0b01
+            else:
+                leaves, table = choice[node]
+                full = (1 << (1 << len(leaves))) - 1
+                table ^= full if complement else 0
+            _, formula = library(library_name, len(leaves))[table]
+            mapped[node, complement] = instantiate(
+                formula, [mapped[leaf, 0] for leaf in leaves], {})
+    return mapped[root >> 1, root & 1]
+
+
+def gate_count(expression):
+    """
+    Returns the number of distinct gates in a mapped expression.
+
+    NAND and NOR count as a single gate.
+    """
+    seen = set()
+    stack = [expression]
+    while stack:
+        e = stack.pop()
+        if id(e) in seen or e.args is None:
+            continue
+        seen.add(id(e))
+        if isinstance(e, boolean.NOT) and\
+                isinstance(e.args[0], boolean.DualBase):
+            e = e.args[0]
+        stack.extend(e.args)
+    return len(seen)
@@ -0,0 +1,61 @@
+"""
+Circuits that are used by more than one test module.
+"""
+import sys
+sys.path.append("..")
+
+import random
+import logic_circuit as lc
+import netlist as nl
+
+# The smallest of the ISCAS-85 benchmark circuits
+C17_BENCH = """\
+# c17
+INPUT(1)
+INPUT(2)
+INPUT(3)
+INPUT(6)
+INPUT(7)
+OUTPUT(22)
+OUTPUT(23)
+22 = NAND(10, 16)
+23 = NAND(16, 19)
+10 = NAND(1, 3)
+11 = NAND(3, 6)
+16 = NAND(2, 11)
+19 = NAND(11, 7)
+"""
+
+
+def random_netlist(seed, inputs=6, gates=40):
+    """
+    Returns a random netlist with the outputs of the last gates as outputs.
+    """
+    r = random.Random(seed)
+    netlist = nl.Netlist()
+    for _ in range(inputs):
+        netlist.add(lc.OP_INPUT)
+    opcodes = (lc.OP_AND, lc.OP_OR, lc.OP_NAND, lc.OP_NOR, lc.OP_XOR,
+               lc.OP_XNOR, lc.OP_NOT, lc.OP_BUF)
+    for _ in range(gates):
+        opcode = r.choice(opcodes)
+        n = 1 if opcode in (lc.OP_NOT, lc.OP_BUF) else r.randint(2, 3)
+        netlist.add(opcode, [r.randrange(len(netlist)) for _ in range(n)])
+    netlist.outputs.extend(range(len(netlist) - 4, len(netlist)))
+    return netlist
+
+
+def hazard_board():
+    """
+    Returns A*B+~A*C, which has a static hazard when A changes and B and C
+    are TRUE.
+    """
+    a, b, c = lc.Switch(True), lc.Switch(True), lc.Switch(True)
+    n = lc.Not(a)
+    g1 = lc.And((a, b))
+    g2 = lc.And((n, c))
+    o = lc.Or((g1, g2))
+    bulb = lc.Bulb(o)
+    board = lc.CircuitBoard([a, b, c, n, g1, g2, o, bulb])
+    board.settle()
+    return board, a, bulb
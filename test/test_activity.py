@@ -0,0 +1,83 @@
+import sys
+sys.path.append("..")
+
+import unittest
+import logic_circuit as lc
+import activity
+
+
+class ActivityTestCase(unittest.TestCase):
+
+    def test_settle(self):
+        board = lc.circuit_board("(A*B)+(C*D)")
+        switches = [c for c in board if isinstance(c, lc.Switch)]
+        a, b, c, d = switches
+        board.settle()
+        with activity.ActivityProfiler(board) as profiler:
+            self.assertIs(board.profiler, profiler)
+            for _ in range(3):
+                a.press()
+                board.settle()
+            b.press()
+            board.settle()
+        self.assertIsNone(board.profiler)
+
+        # B was FALSE, so the AND only toggled when B was pressed
+        self.assertEqual(profiler.total_evaluations, sum(profiler.ticks))
+        and_ab = board.readers(board.readers(a)[0])[0]
+        self.assertEqual(profiler.evaluations[and_ab], 4)
+        self.assertEqual(profiler.toggles[and_ab], 1)
+        self.assertEqual(profiler.toggles[board.readers(a)[0]], 3)
+        self.assertNotIn(a, profiler.evaluations)
+
+        # The wire of A is the hottest and C*D never toggled
+        self.assertIs(profiler.report(1)[0][0], board.readers(a)[0])
+        cones = profiler.idle_cones()
+        and_cd = board.readers(board.readers(c)[0])[0]
+        self.assertIn(and_cd, cones[0])
+        # The AND, the wires of C and D and the wire to the OR
+        self.assertEqual(len(cones[0]), 4)
+        report = profiler.format_report()
+        self.assertIn("idle cones", report)
+        # Components are named by their position on the board
+        wire_a = board.readers(a)[0]
+        self.assertIn("Wire{}".format(board.index(wire_a)), report)
+        self.assertIn("wire of A", profiler.format_report(
+            names={wire_a: "wire of A"}))
+
+        # Nothing is recorded after stopping
+        ticks = len(profiler.ticks)
+        a.press()
+        board.settle()
+        self.assertEqual(len(profiler.ticks), ticks)
+
+    def test_first_settle(self):
+        # Outputs that were None do not toggle
+        board = lc.circuit_board("A+~B")
+        profiler = activity.ActivityProfiler(board)
+        board.settle()
+        self.assertEqual(profiler.total_toggles, 0)
+        self.assertEqual(set(profiler.evaluations),
+                         {c for c in board if not isinstance(c, lc.Input)})
+        profiler.reset()
+        self.assertEqual(profiler.ticks, [])
+
+    def test_update_and_solve(self):
+        board = lc.circuit_board("~A")
+        board.settle()
+        profiler = activity.ActivityProfiler(board)
+        board[0].press()
+        board.update()
+        # The Input is not counted
+        simulated = [c for c in board if not isinstance(c, lc.Input)]
+        self.assertEqual(profiler.ticks, [len(simulated)])
+        board.solve()
+        self.assertEqual(profiler.ticks, [len(simulated)] * 2)
+        self.assertNotIn(board[0], profiler.evaluations)
+        self.assertNotIn(board[0], profiler.toggles)
+        self.assertEqual(profiler.total_toggles, len(simulated))
+        profiler.stop()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+import sys
+sys.path.append("..")
+
+import io
+import itertools
+import unittest
+import boolean
+import logic_circuit as lc
+import aig as ag
+
+
+def truth_tables(aig):
+    """
+    Returns the truth tables of the outputs of an AIG.
+    """
+    n = len(aig.inputs)
+    masks = boolean.variable_bitsets(n)
+    full = (1 << (1 << n)) - 1
+    values = aig.run_vectors([masks[n - 1 - i] for i in range(n)], 1 << n)
+    return tuple(values[o >> 1] ^ (full if o & 1 else 0) for o in aig.outputs)
+
+
+class AIGTestCase(unittest.TestCase):
+
+    def test_literals(self):
+        self.assertEqual(ag.literal(3), 6)
+        self.assertEqual(ag.literal(3, True), 7)
+        self.assertEqual(ag.literal_node(7), 3)
+        self.assertTrue(ag.is_complemented(7))
+        self.assertEqual(ag.negate(ag.FALSE), ag.TRUE)
+
+    def test_and(self):
+        aig = ag.AIG()
+        a = aig.add_input("a")
+        b = aig.add_input("b")
+        self.assertEqual(aig.AND(a, ag.FALSE), ag.FALSE)
+        self.assertEqual(aig.AND(a, ag.TRUE), a)
+        self.assertEqual(aig.AND(a, a), a)
+        self.assertEqual(aig.AND(a, a ^ 1), ag.FALSE)
+        # Structural hashing
+        self.assertEqual(aig.AND(a, b), aig.AND(b, a))
+        self.assertEqual(aig.and_count, 1)
+        x = aig.XOR(a, b)
+        m = aig.MUX(a, b, b ^ 1)
+        aig.add_output(x)
+        aig.add_output(m)
+        for values in itertools.product((False, True), repeat=2):
+            self.assertEqual(aig.output_values(values),
+                             (values[0] != values[1],
+                              values[1] if values[0] else not values[1]))
+
+    def test_expression(self):
+        expression = boolean.parse("(A⊕B)*~(C+D)+~(A*C)", eval=False)
+        aig = ag.AIG.from_expression(expression)
+        self.assertEqual([str(s) for s in aig.input_names],
+                         ["A", "B", "C", "D"])
+        output, = aig.expressions()
+        symbols = aig.input_names
+        self.assertEqual(boolean.to_bitset(output, symbols),
+                         boolean.to_bitset(expression, symbols))
+        self.assertEqual(ag.AIG.from_expression("A*~A").outputs, [ag.FALSE])
+        self.assertEqual(ag.AIG.from_expression("1").expressions(),
+                         (boolean.TRUE,))
+
+    def test_board(self):
+        board = lc.circuit_board("(A⊕B⊕C)*~(C+D)+~(A*C)")
+        compiled = board.compile()
+        aig = ag.AIG.from_board(board)
+        self.assertEqual(truth_tables(aig), compiled.truth_tables())
+        self.assertEqual(aig.to_board().compile().truth_tables(),
+                         compiled.truth_tables())
+
+        # Outputs cannot depend on gates that are not connected
+        g = lc.And()
+        self.assertRaises(ValueError, ag.AIG.from_board,
+                          lc.CircuitBoard([g, lc.Bulb(g)]))
+
+    def test_aiger(self):
+        aig = ag.AIG()
+        a, b, c = (aig.add_input(name) for name in "abc")
+        x = aig.AND(aig.XOR(a, b), c ^ 1)
+        aig.add_output(x, "x")
+        aig.add_output(ag.TRUE)
+        # An input added after the ANDs is moved to the front
+        d = aig.add_input("d")
+        aig.add_output(aig.AND(d, x) ^ 1, "y")
+
+        file = io.BytesIO()
+        ag.write_aiger(aig, file)
+        data = file.getvalue()
+        self.assertTrue(data.startswith(b"aig 9 4 0 3 5\n"))
+        file.seek(0)
+        read = ag.read_aiger(file)
+        self.assertEqual(read.input_names, ["a", "b", "c", "d"])
+        self.assertEqual(read.output_names, ["x", None, "y"])
+        self.assertEqual(read.and_count, 5)
+        self.assertEqual(truth_tables(read), truth_tables(aig))
+
+    def test_aiger_example(self):
+        # The AND gate and the toggle flip-flop from the AIGER specification
+        read = ag.read_aiger(io.BytesIO(b"aig 3 2 0 1 1\n6\n\x02\x02"))
+        self.assertEqual(truth_tables(read), (0b1000,))
+        read = ag.read_aiger(io.BytesIO(b"aig 1 0 1 2 0\n3\n2\n3\n"
+                                        b"l0 toggle\nc\ncomment\n"))
+        self.assertEqual(read.input_names, ["toggle"])
+        self.assertEqual(read.output_values((False,)), (False, True, True))
+
+        self.assertRaises(ag.ParseError, ag.read_aiger,
+                          io.BytesIO(b"aag 3 2 0 1 1\n"))
+        self.assertRaises(ag.ParseError, ag.read_aiger,
+                          io.BytesIO(b"aig 3 2 0 1 1\n6\n\x02"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
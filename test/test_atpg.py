@@ -0,0 +1,83 @@
+import sys
+sys.path.append("..")
+
+import io
+import itertools
+import unittest
+import logic_circuit as lc
+import netlist as nl
+import netlist_formats as nf
+import fault_simulation as fs
+import atpg
+from circuits import C17_BENCH, random_netlist
+
+
+class ATPGTestCase(unittest.TestCase):
+
+    def test_c17(self):
+        netlist = nf.read_bench(io.StringIO(C17_BENCH))
+        generator = atpg.TestGenerator(netlist)
+        vectors = generator.run(random_words=0)
+        self.assertEqual(generator.coverage, 1.0)
+        self.assertEqual(generator.untestable, [])
+        self.assertLessEqual(len(vectors), 6)
+        self.assertEqual(fs.fault_coverage(netlist, vectors), 1.0)
+
+    def test_podem(self):
+        netlist = nf.read_bench(io.StringIO(C17_BENCH))
+        generator = atpg.TestGenerator(netlist)
+        simulator = fs.FaultSimulator(netlist)
+        for fault in simulator.faults:
+            result, cube = generator.podem(fault)
+            self.assertEqual(result, "detected")
+            # Every way of filling the cube detects the fault
+            free = [i for i, v in enumerate(cube) if v is None]
+            for values in itertools.product((False, True), repeat=len(free)):
+                vector = list(cube)
+                for i, v in zip(free, values):
+                    vector[i] = v
+                single = fs.FaultSimulator(netlist, [fault])
+                self.assertEqual(single.simulate([vector]), {fault: 0})
+
+    def test_redundant(self):
+        # A + A*B does not depend on the AND gate being FALSE
+        netlist = nl.Netlist()
+        a = netlist.add(lc.OP_INPUT)
+        b = netlist.add(lc.OP_INPUT)
+        g = netlist.add(lc.OP_AND, (a, b))
+        netlist.outputs.append(netlist.add(lc.OP_OR, (a, g)))
+        generator = atpg.TestGenerator(netlist)
+        self.assertEqual(generator.podem((g, None, False)),
+                         ("untestable", None))
+        generator.run(random_words=0)
+        self.assertIn((g, None, False), generator.untestable)
+
+    def test_exhaustive(self):
+        # The same faults are detected as by all vectors
+        for seed in range(3):
+            netlist = random_netlist(seed, inputs=8, gates=40)
+            netlist.outputs.extend(range(20, 40, 5))
+            exhaustive = fs.FaultSimulator(netlist)
+            exhaustive.simulate(itertools.product((False, True), repeat=8))
+            generator = atpg.TestGenerator(netlist, seed=seed)
+            vectors = generator.run(random_words=1)
+            self.assertEqual(generator.coverage, exhaustive.coverage)
+            self.assertTrue(set(generator.untestable) <=
+                            set(exhaustive.undetected))
+            self.assertEqual(fs.fault_coverage(netlist, vectors),
+                             exhaustive.coverage)
+            self.assertLess(len(vectors), 256)
+
+    def test_board(self):
+        # B and D do not matter, the expression is ~(A*C)
+        board = lc.circuit_board("(A⊕B)*~(C+D)+~(A*C)")
+        vectors = atpg.generate_tests(board)
+        exhaustive = fs.fault_coverage(
+            board, itertools.product((False, True), repeat=4))
+        self.assertLess(exhaustive, 1.0)
+        self.assertEqual(fs.fault_coverage(board, vectors), exhaustive)
+        self.assertTrue(all(len(v) == 4 for v in vectors))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -1,6 +1,7 @@
 import sys
 sys.path.append("..")
 
+import itertools
 import unittest
 import boolean
 
@@ -370,6 +371,191 @@ class DualBaseTestCase(unittest.TestCase):
                         "AND(OR(Symbol('a'), Symbol('b')), Symbol('c'))")
 
 
+class ParityBaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.a, self.b, self.c = boolean.symbols("a", "b", "c")
+
+    def test_init(self):
+        self.assertRaises(TypeError, boolean.XOR, "a")
+        self.assertTrue(isinstance(self.a ^ self.b, boolean.XOR))
+        self.assertTrue(boolean.XOR.getcomplement() is boolean.XNOR)
+        self.assertTrue(boolean.XNOR.getcomplement() is boolean.XOR)
+
+    def test_eval(self):
+        a, b, c = self.a, self.b, self.c
+        XOR, XNOR = boolean.XOR, boolean.XNOR
+        # Self cancellation
+        self.assertTrue(XOR(a, a) is boolean.FALSE)
+        self.assertTrue(XNOR(a, a) is boolean.TRUE)
+        self.assertEqual(XOR(a, b, a), b)
+        # Identity and constants
+        self.assertEqual(XOR(a, boolean.FALSE), a)
+        self.assertEqual(XOR(a, boolean.TRUE), ~a)
+        self.assertEqual(XOR(a, b, boolean.TRUE), XNOR(a, b))
+        # Associativity
+        self.assertEqual(XOR(XOR(a, b), c), XOR(a, b, c))
+        self.assertEqual(XOR(XNOR(a, b), c), XNOR(a, b, c))
+        # NOTs are moved into the parity
+        self.assertEqual(XOR(~a, b), XNOR(a, b))
+        self.assertEqual(~XOR(a, b), XNOR(a, b))
+        self.assertEqual(~XNOR(a, b), XOR(a, b))
+        # Complementation in AND and OR
+        self.assertTrue(XOR(a, b) * XNOR(a, b) is boolean.FALSE)
+        self.assertTrue(XOR(a, b) + XNOR(a, b) is boolean.TRUE)
+
+    def test_equal(self):
+        a, b = self.a, self.b
+        XOR = boolean.XOR
+        self.assertEqual(XOR(a, b, eval=False), XOR(b, a, eval=False))
+        self.assertNotEqual(XOR(a, b, a, eval=False), XOR(a, b, eval=False))
+
+    def test_expand(self):
+        a, b, c = self.a, self.b, self.c
+        self.assertEqual(boolean.XOR(a, b, eval=False).expand().eval(),
+                         (a * ~b) + (~a * b))
+        self.assertEqual(boolean.XNOR(a, b, eval=False).expand().eval(),
+                         (a * b) + (~a * ~b))
+        self.assertEqual(len(boolean.XOR(a, b, c).expand().args), 4)
+        self.assertEqual(
+            boolean.AND(*boolean.normalize(boolean.AND,
+                                           boolean.XOR(a, b))),
+            (a + b) * (~a + ~b))
+
+    def test_printing(self):
+        parse = lambda x: boolean.parse(x, eval=False)
+        self.assertEqual(str(parse("a⊕b")), "a⊕b")
+        self.assertEqual(str(parse("(a⊕b)*c")), "(a⊕b)∙c")
+        self.assertEqual(repr(parse("a⊙b")),
+                         "XNOR(Symbol('a'), Symbol('b'))")
+        a, b, c = boolean.symbols("a", "b", "c")
+        self.assertEqual(str(boolean.XNOR(a, b, c)), "~(a⊕b⊕c)")
+
+    def test_printing_round_trip(self):
+        symbols = boolean.symbols("a", "b", "c", "d")
+        XOR, XNOR = boolean.XOR, boolean.XNOR
+        for n in range(2, 5):
+            args = symbols[:n]
+            expressions = [XOR(*args, eval=False), XNOR(*args, eval=False),
+                           XNOR(*args[:-1], ~args[-1], eval=False)]
+            if n > 2:
+                expressions += [XNOR(XOR(*args[:2], eval=False), *args[2:],
+                                     eval=False),
+                                XOR(XNOR(*args[:2], eval=False), *args[2:],
+                                    eval=False)]
+            expressions += [e.eval() for e in expressions]
+            for expr in expressions:
+                self.assertEqual(boolean.parse(str(expr)), expr.eval(),
+                                 str(expr))
+
+
+class SymbolTableTestCase(unittest.TestCase):
+
+    def test_intern(self):
+        table = boolean.SymbolTable(("a", "b"))
+        self.assertEqual(len(table), 2)
+        a = table.symbol("a")
+        self.assertTrue(table.symbol("a") is a)
+        self.assertTrue(table.symbol(boolean.Symbol("a")) is a)
+        self.assertTrue(table[0] is a)
+        self.assertEqual(a, boolean.Symbol("a"))
+        self.assertNotEqual(a, table.symbol("b"))
+        self.assertTrue("a" in table)
+        self.assertTrue(boolean.Symbol("b") in table)
+        self.assertFalse("c" in table)
+        self.assertRaises(ValueError, table.symbol, None)
+        self.assertRaises(ValueError, table.symbol, boolean.Symbol())
+
+    def test_id(self):
+        table = boolean.SymbolTable()
+        a, b, c = boolean.symbols("a", "b", "c", symbol_table=table)
+        self.assertEqual([table.id(s) for s in (a, b, c)], [0, 1, 2])
+        self.assertEqual(table.id("d"), 3)
+        self.assertEqual(table.mask((a, c)), 0b101)
+        self.assertEqual(table.symbols(0b110), (b, c))
+
+    def test_parse(self):
+        table = boolean.SymbolTable()
+        expr = boolean.parse("a*b+~a", eval=False, symbol_table=table)
+        self.assertEqual(len(table), 2)
+        self.assertTrue(expr.args[0].args[0] is table.symbol("a"))
+        self.assertTrue(expr.args[1].args[0] is table.symbol("a"))
+        self.assertEqual(expr, boolean.parse("a*b+~a", eval=False))
+        # Without a table the same name is still the same object
+        expr = boolean.parse("a*a", eval=False)
+        self.assertTrue(expr.args[0] is expr.args[1])
+        self.assertEqual(boolean.to_bitset("a*~b", table), 0b0100)
+
+
+class BitsetTestCase(unittest.TestCase):
+
+    def test_to_bitset(self):
+        symbols = boolean.symbols("a", "b", "c")
+        self.assertEqual(boolean.to_bitset("a", symbols), 0b11110000)
+        self.assertEqual(boolean.to_bitset("c", symbols), 0b10101010)
+        self.assertEqual(boolean.to_bitset("a⊕b⊕c", symbols), 0b10010110)
+        self.assertEqual(boolean.to_bitset("a*b+~c", symbols), 0b11010101)
+        self.assertEqual(boolean.from_bitset(0b11010101, symbols),
+                         boolean.parse("(a*b)+~c", eval=False))
+        self.assertRaises(ValueError, boolean.to_bitset, "d", symbols)
+
+    def test_esop(self):
+        symbols = boolean.symbols("a", "b", "c", "d")
+        a, b, c, d = symbols
+        self.assertEqual(boolean.esop("(a*~b)+(~a*b)"), boolean.XOR(a, b))
+        parity = boolean.parse("a⊕b⊕c⊕d").expand()
+        self.assertEqual(len(parity.args), 8)
+        self.assertEqual(boolean.esop(parity, symbols),
+                         boolean.XOR(a, b, c, d))
+        self.assertTrue(boolean.esop("a*~a") is boolean.FALSE)
+        for expr_str in ("a*b+c*d", "~a*(b+~c)", "a+b+c+d"):
+            self.assertEqual(
+                boolean.to_bitset(boolean.esop(expr_str, symbols), symbols),
+                boolean.to_bitset(expr_str, symbols))
+
+
+class NPNTestCase(unittest.TestCase):
+
+    def test_classes(self):
+        # The number of NPN classes of functions of 1, 2 and 3 inputs
+        for n, count in ((1, 2), (2, 4), (3, 14)):
+            classes = {boolean.npn_canonical(bitset, n)[0]
+                       for bitset in range(1 << (1 << n))}
+            self.assertEqual(len(classes), count)
+
+    def test_equivalent(self):
+        symbols = boolean.symbols("a", "b", "c", "d")
+        canonical = lambda e: boolean.npn_canonical(
+            boolean.to_bitset(e, symbols), 4)[0]
+        self.assertEqual(canonical("a*b"), canonical("~c+d"))
+        self.assertEqual(canonical("a*(b+c)"), canonical("~d*(~a+b)"))
+        self.assertEqual(canonical("a⊕b⊕c⊕d"), canonical("a⊙b⊕c⊕d"))
+        self.assertNotEqual(canonical("a*b"), canonical("a⊕b"))
+
+    def test_transform(self):
+        n = 5
+        for bitset in (0x0, 0x1, 0x96696996, 0x12345678, 0xfedcba98):
+            canonical, transform = boolean.npn_canonical(bitset, n)
+            self.assertEqual(boolean.npn_transform(bitset, n, transform),
+                             canonical)
+            self.assertTrue(canonical <= bitset)
+        self.assertEqual(boolean.npn_transform(0b1000, 2, ((1, 0), 0b01,
+                                                           True)),
+                         0b1011)
+
+    def test_cache(self):
+        cache_info = boolean._npn_canonical.cache_info
+        self.assertEqual(cache_info().maxsize, boolean.NPN_CACHE_SIZE)
+        first = boolean.npn_canonical(0x96, 3)
+        hits = cache_info().hits
+        self.assertIs(boolean.npn_canonical(0x96, 3), first)
+        self.assertEqual(cache_info().hits, hits + 1)
+
+    def test_incorrect(self):
+        self.assertRaises(ValueError, boolean.npn_canonical, 0, 7)
+        self.assertRaises(ValueError, boolean.npn_canonical, 0x100, 3)
+
+
 class OtherTestCase(unittest.TestCase):
 
     def test_class_order(self):
@@ -509,6 +695,40 @@ class TruthTableTestCase(unittest.TestCase):
                 self.assertTrue(v in (str(boolean.TRUE), str(boolean.FALSE)))
 
 
+class FromTruthTableTestCase(unittest.TestCase):
+
+    def test_constants(self):
+        self.assertTrue(boolean.from_truth_table([], "ab")
+                        is boolean.FALSE)
+        self.assertTrue(boolean.from_truth_table([0, 1, 2, 3], "ab")
+                        is boolean.TRUE)
+        self.assertTrue(boolean.from_truth_table([1, 2], "ab", [0, 3])
+                        is boolean.TRUE)
+
+    def test_sop(self):
+        a, b, c = boolean.symbols("a", "b", "c")
+        self.assertEqual(boolean.from_truth_table([1, 3, 5, 7], "abc"), c)
+        self.assertEqual(boolean.from_truth_table([3, 5, 6, 7], "abc"),
+                         boolean.parse("(a*b)+(a*c)+(b*c)", eval=False))
+        self.assertEqual(boolean.from_truth_table([1], (a, b)), ~a * b)
+        self.assertEqual(boolean.from_truth_table([1], (a, b), [3]), b)
+
+    def test_bitset(self):
+        on_set = 0b1110100010000001
+        symbols = boolean.symbols("a", "b", "c", "d")
+        expr = boolean.from_bitset(on_set, symbols)
+        for m, row in enumerate(itertools.product((False, True), repeat=4)):
+            subs_dict = {s: boolean.BaseElement(v)
+                         for s, v in zip(symbols, row)}
+            self.assertEqual(bool(expr.subs(subs_dict)),
+                             bool(on_set >> m & 1))
+
+    def test_incorrect(self):
+        self.assertRaises(ValueError, boolean.from_truth_table, [4], "ab")
+        self.assertRaises(ValueError, boolean.from_bitset, 1 << 4, "a")
+        self.assertRaises(TypeError, boolean.from_truth_table, [0])
+
+
 class ParseTestCase(unittest.TestCase):
 
     def test_and(self):
@@ -545,6 +765,30 @@ class ParseTestCase(unittest.TestCase):
         self.assertEqual(expr, l_not)
         self.assertEqual(expr, p_not)
 
+    def test_xor(self):
+        a, b, c = boolean.symbols("A", "B", "C")
+        self.assertEqual(boolean.parse("A⊕B"), boolean.XOR(a, b))
+        self.assertEqual(boolean.parse("A^B", xor_caret=True),
+                         boolean.XOR(a, b))
+        self.assertEqual(boolean.parse("A^B"), a * b)
+        self.assertEqual(boolean.parse("A⊙B"), boolean.XNOR(a, b))
+        # XOR is between AND and OR
+        self.assertEqual(boolean.parse("A*B⊕C+A", eval=False),
+                         boolean.OR(boolean.XOR(a * b, c, eval=False), a,
+                                    eval=False))
+        # XNOR is read from left to right
+        self.assertEqual(boolean.parse("A⊙B⊙C", eval=False),
+                         boolean.XNOR(boolean.XNOR(a, b, eval=False), c,
+                                      eval=False))
+        self.assertEqual(boolean.parse("A⊙B⊙C"), boolean.XOR(a, b, c))
+        # XOR and XNOR have the same precedence
+        self.assertEqual(boolean.parse("A⊕B⊙C", eval=False),
+                         boolean.XNOR(boolean.XOR(a, b, eval=False), c,
+                                      eval=False))
+        self.assertEqual(boolean.parse("A⊙B⊕C", eval=False),
+                         boolean.XOR(boolean.XNOR(a, b, eval=False), c,
+                                     eval=False))
+
     def test_incorrect(self):
         self.assertRaises(TypeError, boolean.parse, "A)")
         self.assertRaises(TypeError, boolean.parse, "-")
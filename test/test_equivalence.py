@@ -0,0 +1,114 @@
+import sys
+sys.path.append("..")
+
+import unittest
+import logic_circuit as lc
+import netlist as nl
+import aig as ag
+import optimisation as op
+import equivalence as eq
+
+
+def adder(bits, nand=False):
+    """
+    Returns a ripple carry adder of two numbers as a circuit board, with the
+    carries computed by AND and OR gates or by NAND gates.
+    """
+    netlist = nl.Netlist()
+    a = [netlist.add(lc.OP_INPUT) for _ in range(bits)]
+    b = [netlist.add(lc.OP_INPUT) for _ in range(bits)]
+    carry = netlist.add(lc.OP_FALSE)
+    for i in range(bits):
+        if nand:
+            p = netlist.add(lc.OP_XOR, (a[i], b[i]))
+            not_carry = netlist.add(lc.OP_NOT, (carry,))
+            netlist.outputs.append(netlist.add(lc.OP_XNOR, (p, not_carry)))
+            carry = netlist.add(lc.OP_NAND, (
+                netlist.add(lc.OP_NAND, (a[i], b[i])),
+                netlist.add(lc.OP_NAND, (p, carry))))
+        else:
+            netlist.outputs.append(netlist.add(lc.OP_XOR,
+                                               (a[i], b[i], carry)))
+            carry = netlist.add(lc.OP_OR, (
+                netlist.add(lc.OP_AND, (a[i], b[i])),
+                netlist.add(lc.OP_AND, (a[i], carry)),
+                netlist.add(lc.OP_AND, (b[i], carry))))
+    netlist.outputs.append(carry)
+    return netlist.to_board()
+
+
+class EquivalenceTestCase(unittest.TestCase):
+
+    def assertCounterexample(self, board_a, board_b, vector):
+        outputs = []
+        for board in (board_a, board_b):
+            compiled = board.compile()
+            values = compiled.run(vector)
+            outputs.append([values[compiled.node(o)]
+                            for o in compiled.outputs])
+        self.assertNotEqual(outputs[0], outputs[1])
+
+    def test_expressions(self):
+        a = lc.circuit_board("(A⊕B)*~(C+D)+~(A*C)")
+        b = lc.circuit_board("(A⊕B)*~(C+D)+~(A*C)",
+                             structural_hashing=False)
+        op.optimise(b)
+        self.assertEqual(lc.equivalent(a, b), (True, None))
+        c = lc.circuit_board("(A⊕B)*~(C+D)+~(A*B)")
+        result, vector = lc.equivalent(a, c)
+        self.assertFalse(result)
+        self.assertCounterexample(a, c, vector)
+
+    def test_adders(self):
+        a = adder(48)
+        b = adder(48, nand=True)
+        self.assertEqual(lc.equivalent(a, b), (True, None))
+        self.assertEqual(lc.equivalent(a, ag.AIG.from_board(b).to_board()),
+                         (True, None))
+
+        # The top carry ignores the carry into the top bit
+        netlist = nl.Netlist.from_board(b)
+        generate = netlist.fanins(netlist.outputs[-1])[0]
+        netlist.outputs[-1] = netlist.add(lc.OP_NOT, (generate,))
+        wrong = netlist.to_board()
+        result, vector = lc.equivalent(a, wrong)
+        self.assertFalse(result)
+        self.assertCounterexample(a, wrong, vector)
+
+    def test_rare_difference(self):
+        # The outputs only differ if all 40 inputs are TRUE, which random
+        # simulation does not find
+        netlist = nl.Netlist()
+        inputs = [netlist.add(lc.OP_INPUT) for _ in range(40)]
+        netlist.outputs.append(netlist.add(lc.OP_AND, inputs))
+        a = netlist.to_board()
+        netlist.outputs[0] = netlist.add(lc.OP_FALSE)
+        b = netlist.to_board()
+        self.assertEqual(lc.equivalent(a, b), (False, (True,) * 40))
+
+    def test_mapping(self):
+        a = lc.circuit_board("A*~B")
+        b = lc.circuit_board("~B*A")
+        inputs_a = [c for c in a if isinstance(c, lc.Input)]
+        inputs_b = [c for c in b if isinstance(c, lc.Input)]
+        bulb_a, bulb_b = a[-1], b[-1]
+        # circuit_board adds the switches in the order the symbols appear
+        self.assertFalse(lc.equivalent(a, b)[0])
+        mapping = {inputs_a[0]: inputs_b[1], inputs_a[1]: inputs_b[0],
+                   bulb_a: bulb_b}
+        self.assertEqual(lc.equivalent(a, b, mapping), (True, None))
+        self.assertRaises(ValueError, lc.equivalent, a, b,
+                          {inputs_a[0]: inputs_b[0]})
+        self.assertRaises(ValueError, lc.equivalent, a,
+                          lc.circuit_board("A"))
+
+    def test_miter(self):
+        a = lc.circuit_board("A+B")
+        b = lc.circuit_board("~(~A*~B)")
+        miter = eq.miter(a, b)
+        self.assertEqual(len(miter.inputs), 2)
+        self.assertEqual(miter.outputs, [ag.FALSE])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
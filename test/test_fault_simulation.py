@@ -0,0 +1,100 @@
+import sys
+sys.path.append("..")
+
+import io
+import itertools
+import unittest
+import logic_circuit as lc
+import netlist_formats as nf
+import fault_simulation as fs
+from circuits import C17_BENCH, random_netlist
+
+
+def serial_detects(netlist, fault, vector):
+    """
+    Returns if a vector detects a fault by simulating the faulty circuit
+    without any tricks.
+    """
+    node, index, value = fault
+
+    def simulate(faulty):
+        values = []
+        for n in range(len(netlist)):
+            fanins = [values[f] for f in netlist.fanins(n)]
+            if faulty and n == node and index is not None:
+                fanins[index] = value
+            opcode = netlist.types[n]
+            if opcode == lc.OP_INPUT:
+                v = vector[netlist.inputs.index(n)]
+            elif opcode in (lc.OP_AND, lc.OP_NAND):
+                v = all(fanins)
+            elif opcode in (lc.OP_OR, lc.OP_NOR):
+                v = any(fanins)
+            elif opcode in (lc.OP_XOR, lc.OP_XNOR):
+                v = sum(fanins) % 2 == 1
+            else:
+                v = fanins[0]
+            if opcode in (lc.OP_NAND, lc.OP_NOR, lc.OP_XNOR, lc.OP_NOT):
+                v = not v
+            if faulty and n == node and index is None:
+                v = value
+            values.append(bool(v))
+        return [values[o] for o in netlist.outputs]
+    return simulate(False) != simulate(True)
+
+
+class FaultSimulationTestCase(unittest.TestCase):
+
+    def test_c17(self):
+        netlist = nf.read_bench(io.StringIO(C17_BENCH))
+        self.assertEqual(len(fs.fault_list(netlist, collapse=False)), 34)
+        self.assertEqual(len(fs.fault_list(netlist)), 22)
+        vectors = list(itertools.product((False, True), repeat=5))
+        self.assertEqual(fs.fault_coverage(netlist, vectors), 1.0)
+        self.assertLess(fs.fault_coverage(netlist, vectors[:2]), 1.0)
+
+    def test_serial(self):
+        for seed in range(3):
+            netlist = random_netlist(seed, gates=25)
+            vectors = list(itertools.product((False, True), repeat=6))
+            faults = fs.fault_list(netlist, collapse=False)
+            # Words that are smaller than the vectors
+            simulator = fs.FaultSimulator(netlist, faults, word_size=24)
+            detected = simulator.simulate(vectors)
+            for fault in faults:
+                first = next((i for i, v in enumerate(vectors)
+                              if serial_detects(netlist, fault, v)), None)
+                self.assertEqual(detected.get(fault), first)
+
+    def test_collapse(self):
+        # Every fault that is left out is detected by the same vectors as a
+        # fault that is kept
+        for seed in range(5):
+            netlist = random_netlist(seed)
+            faults = fs.fault_list(netlist, collapse=False)
+            collapsed = fs.fault_list(netlist)
+            self.assertLess(len(collapsed), len(faults))
+            self.assertTrue(set(collapsed) <= set(faults))
+            masks = lc.boolean.variable_bitsets(6)
+            good = netlist.run_vectors(masks, 64)
+            simulator = fs.FaultSimulator(netlist, faults)
+            full = (1 << 64) - 1
+            kept = {simulator.detect(f, good, full) for f in collapsed}
+            for fault in faults:
+                self.assertIn(simulator.detect(fault, good, full), kept)
+
+    def test_board(self):
+        board = lc.circuit_board("(A*B)+(C*~D)")
+        simulator = fs.FaultSimulator(board)
+        self.assertEqual(simulator.coverage, 0.0)
+        detected = simulator.simulate([(True, True, False, False)])
+        self.assertTrue(detected)
+        self.assertEqual(set(detected.values()), {0})
+        simulator.simulate(itertools.product((False, True), repeat=4))
+        self.assertEqual(simulator.undetected, [])
+        self.assertEqual(simulator.vectors, 17)
+        self.assertRaises(ValueError, simulator.simulate, [(True,)])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -1,6 +1,7 @@
 import sys
 sys.path.append("..")
 
+import itertools
 import unittest
 import logic_circuit as lc
 
@@ -49,6 +50,41 @@ class GateTestCase(unittest.TestCase):
         g.remove(b)
         self.assertEqual(g.empty_input_keys, (g.expression,))
 
+    def test_lookup_table(self):
+        s1 = lc.Switch()
+        s2 = lc.Switch(True)
+        g = lc.Gate("A*~B", {"A": s1, "B": s2}, False)
+        symbols, table = g.lookup_table
+        self.assertEqual(len(symbols), 2)
+        self.assertEqual(table, lc.boolean.to_bitset(g.expression, symbols))
+        self.assertTrue(g.lookup_table is g.lookup_table)
+        g.update()
+        self.assertEqual(g.output, False)
+        s1.press()
+        g.update()
+        self.assertEqual(g.output, False)
+        # Rewiring does not need the table to change
+        g.inputs[lc.boolean.Symbol("B")] = s1
+        g.inputs[lc.boolean.Symbol("A")] = s2
+        s1.press()
+        g.update()
+        self.assertEqual(g.output, True)
+
+        g = lc.Gate("1")
+        g.update()
+        self.assertEqual(g.output, True)
+
+    def test_wide(self):
+        names = ["A%s" % i for i in range(lc.LOOKUP_TABLE_MAX_INPUTS + 1)]
+        switches = [lc.Switch(True) for _ in names]
+        g = lc.Gate("*".join(names), dict(zip(names, switches)))
+        g.update()
+        self.assertEqual(g.lookup_table[1], None)
+        self.assertEqual(g.output, True)
+        switches[-1].press()
+        g.update()
+        self.assertEqual(g.output, False)
+
     def test_anonymous(self):
         s = lc.Switch()
 
@@ -118,6 +154,21 @@ class FunctionGateTestCase(unittest.TestCase):
         g.update()
         self.assertEqual(g.output, True)
 
+    def test_xor(self):
+        s1 = lc.Switch()
+        s2 = lc.Switch()
+
+        g = lc.Xor((s1, s2))
+        h = lc.Xnor((s1, s2))
+        for v1, v2 in ((False, False), (False, True),
+                       (True, False), (True, True)):
+            s1.output = v1
+            s2.output = v2
+            g.update()
+            h.update()
+            self.assertEqual(g.output, v1 != v2)
+            self.assertEqual(h.output, v1 == v2)
+
 
 class CircuitBoardTestCase(unittest.TestCase):
 
@@ -146,6 +197,324 @@ class CircuitBoardTestCase(unittest.TestCase):
         self.assertEqual(w.output, True)
 
 
+    def test_settle(self):
+        s1 = lc.Switch()
+        s2 = lc.Switch()
+        s3 = lc.Switch()
+        a = lc.And((s1, s2))
+        w1 = lc.Wire(a)
+        w2 = lc.Wire(s3)
+        o = lc.Or((w1, w2))
+        b = lc.Bulb(o)
+        cb = lc.CircuitBoard([b, o, w2, w1, a, s3, s2, s1])
+
+        # The first settle updates everything
+        self.assertEqual(cb.settle(), 4)
+        self.assertEqual(b.output, False)
+        self.assertEqual(cb.settle(), 0)
+
+        s3.press()
+        self.assertEqual(cb.settle(), 3)
+        self.assertEqual(b.output, True)
+
+        # The output of the AND does not change, so it stops there
+        s1.press()
+        self.assertEqual(cb.settle(), 1)
+        s3.press()
+        s2.press()
+        cb.settle()
+        self.assertEqual(b.output, True)
+
+    def test_settle_board_changes(self):
+        s = lc.Switch()
+        w = lc.Wire(s)
+        cb = lc.CircuitBoard([s, w])
+        cb.settle()
+        n = lc.Not(w)
+        cb.append(n)
+        cb.settle()
+        self.assertEqual(n.output, True)
+        s.press()
+        cb.settle()
+        self.assertEqual(n.output, False)
+
+    def test_index(self):
+        s1 = lc.Switch()
+        s2 = lc.Switch()
+        a = lc.And((s1, s1))
+        o = lc.Or((s1, s2))
+        cb = lc.CircuitBoard([s1, s2, a, o])
+        self.assertEqual(set(cb.readers(s1)), {a, o})
+        self.assertEqual(cb.readers(s2), (o,))
+        self.assertEqual(cb.drivers(a), (s1,))
+        self.assertEqual(set(cb.drivers(o)), {s1, s2})
+
+        # One of the two connections of a to s1 is left
+        key = next(iter(a.inputs))
+        cb.disconnect(a, key)
+        self.assertEqual(set(cb.readers(s1)), {a, o})
+        cb.connect(a, key, s2)
+        self.assertEqual(set(cb.readers(s2)), {a, o})
+
+        n = lc.Not(o)
+        cb.append(n)
+        self.assertEqual(cb.readers(o), (n,))
+        cb.remove(o)
+        self.assertEqual(cb.readers(o), ())
+        self.assertEqual(cb.readers(s1), (a,))
+        self.assertEqual(n.empty_input_keys, tuple(n.inputs))
+        cb.remove(s2)
+        self.assertEqual(cb.readers(s2), ())
+        self.assertEqual(len(a.empty_input_keys), 1)
+        cb.pop()
+        self.assertEqual(cb, [s1, a])
+
+    def test_index_direct_rewiring(self):
+        s1 = lc.Switch(True)
+        s2 = lc.Switch()
+        w = lc.Wire(s1)
+        n = lc.Not(w)
+        cb = lc.CircuitBoard([s1, s2, w, n])
+        cb.settle()
+        self.assertEqual(n.output, False)
+
+        # Rewired without connect, away from s1
+        w.input = s2
+        cb.remove(s1)
+        self.assertIs(w.input, s2)
+        self.assertEqual(cb.readers(s2), (w,))
+        cb.remove(w)
+        self.assertEqual(cb, [s2, n])
+        self.assertEqual(cb.readers(w), ())
+        self.assertEqual(n.empty_input_keys, tuple(n.inputs))
+
+        # Rewired without connect, to s2, is found by check_index
+        n.inputs[next(iter(n.inputs))] = s2
+        self.assertEqual(cb.check_index(), 1)
+        self.assertEqual(cb.check_index(), 0)
+        self.assertEqual(cb.readers(s2), (n,))
+        cb.settle()
+        self.assertEqual(n.output, True)
+
+    def test_settle_rewired(self):
+        s1 = lc.Switch(True)
+        s2 = lc.Switch()
+        n = lc.Not(s1)
+        cb = lc.CircuitBoard([s1, s2, n])
+        cb.settle()
+        self.assertEqual(n.output, False)
+        cb.connect(n, next(iter(n.inputs)), s2)
+        cb.settle()
+        self.assertEqual(n.output, True)
+        s1.press()
+        self.assertEqual(cb.settle(), 0)
+
+    def test_settle_oscillating(self):
+        n = lc.Not()
+        n.inputs[n.empty_input_keys[0]] = n
+        n._output = True
+        cb = lc.CircuitBoard([n])
+        self.assertEqual(cb.settle(max_iterations=10), 10)
+        self.assertFalse(cb.settled)
+
+    def test_settle_continues(self):
+        # A chain of NOT gates settles one gate per iteration
+        s = lc.Switch()
+        gates = [lc.Not(s)]
+        for _ in range(5):
+            gates.append(lc.Not(gates[-1]))
+        cb = lc.CircuitBoard([s] + gates)
+        self.assertFalse(cb.settled)
+        cb.settle()
+        self.assertTrue(cb.settled)
+        self.assertEqual(gates[-1].output, False)
+        s.press()
+        self.assertEqual(cb.settle(max_iterations=2), 2)
+        self.assertFalse(cb.settled)
+        self.assertEqual(gates[-1].output, False)
+        self.assertEqual(cb.settle(max_iterations=2), 2)
+        self.assertEqual(cb.settle(), 2)
+        self.assertTrue(cb.settled)
+        self.assertEqual(gates[-1].output, True)
+
+
+class FeedbackTestCase(unittest.TestCase):
+
+    def sr_latch(self, gate_class=lc.Nor):
+        s = lc.Switch()
+        r = lc.Switch()
+        q = gate_class((r, None))
+        q_not = gate_class((s, q))
+        q.inputs[q.empty_input_keys[0]] = q_not
+        return lc.CircuitBoard([s, r, q, q_not]), s, r, q, q_not
+
+    def test_strongly_connected_components(self):
+        board, s, r, q, q_not = self.sr_latch()
+        b = lc.Bulb(q)
+        board.insert(0, b)
+        components = board.strongly_connected_components()
+        self.assertEqual(len(components), 4)
+        self.assertEqual(set(components[-2]), {q, q_not})
+        self.assertEqual(components[-1], (b,))
+        self.assertEqual(set(components[:2]), {(s,), (r,)})
+
+    def test_sr_latch(self):
+        board, s, r, q, q_not = self.sr_latch()
+        # Nothing has been stored yet
+        board.solve()
+        self.assertEqual((q.output, q_not.output), (None, None))
+        s.press()
+        board.solve()
+        self.assertEqual((q.output, q_not.output), (True, False))
+        s.press()
+        board.solve()
+        self.assertEqual((q.output, q_not.output), (True, False))
+        r.press()
+        board.solve()
+        self.assertEqual((q.output, q_not.output), (False, True))
+        r.press()
+        board.solve()
+        self.assertEqual((q.output, q_not.output), (False, True))
+
+    def test_nand_latch(self):
+        board, s, r, q, q_not = self.sr_latch(lc.Nand)
+        s.output = r.output = True
+        board.solve()
+        self.assertEqual(q.output, None)
+        # The inputs of a NAND latch are active low
+        s.press()
+        board.solve()
+        self.assertEqual((q.output, q_not.output), (False, True))
+        s.press()
+        board.solve()
+        self.assertEqual((q.output, q_not.output), (False, True))
+
+    def test_acyclic(self):
+        board = lc.circuit_board("(A*B)+~(C⊕A)")
+        switches = [c for c in board if isinstance(c, lc.Switch)]
+        for values in itertools.product((False, True), repeat=3):
+            for switch, value in zip(switches, values):
+                switch.output = value
+            self.assertEqual(board.solve(), len(board))
+            output = board[-1].output
+            board.settle()
+            self.assertEqual(output, board[-1].output)
+
+    def test_oscillation(self):
+        n = lc.Not()
+        n.inputs[n.empty_input_keys[0]] = n
+        board = lc.CircuitBoard([n])
+        # An unknown output stays unknown
+        board.solve()
+        self.assertEqual(n.output, None)
+        n._output = True
+        with self.assertRaises(lc.OscillationError) as context:
+            board.solve()
+        self.assertEqual(context.exception.components, (n,))
+
+        # A ring of 3 inverters
+        n1 = lc.Not()
+        n2 = lc.Not(n1)
+        n3 = lc.Not(n2)
+        n1.inputs[n1.empty_input_keys[0]] = n3
+        n1._output, n2._output, n3._output = True, False, True
+        board = lc.CircuitBoard([n1, n2, n3])
+        self.assertRaises(lc.OscillationError, board.solve)
+        self.assertRaises(lc.OscillationError, board.solve, 1)
+
+
+class CompiledBoardTestCase(unittest.TestCase):
+
+    def test_run(self):
+        for expr_str in ("A", "~A", "A*B+~C", "~(A+B)*C", "A⊕B⊙C",
+                         "~~A*(B+1)", "~(A*B)+0"):
+            expr = lc.boolean.parse(expr_str, eval=False)
+            board = lc.circuit_board(expr)
+            compiled = board.compile()
+            switches = [c for c in board if isinstance(c, lc.Switch)]
+            self.assertEqual(len(compiled.inputs), len(switches))
+            for values in itertools.product((False, True),
+                                            repeat=len(switches)):
+                for switch, value in zip(switches, values):
+                    switch.output = value
+                board.settle()
+                self.assertEqual(compiled.output_values(),
+                                 (board[-1].output,))
+                self.assertEqual(compiled.output_values(values),
+                                 (board[-1].output,))
+
+    def test_run_vectors(self):
+        board = lc.circuit_board("(A⊕B)*~(C+D)+~(A*C)")
+        compiled = board.compile()
+        n = len(compiled.inputs)
+        table, = compiled.truth_tables()
+        self.assertEqual(compiled.truth_tables(chunk_inputs=2), (table,))
+        for i, values in enumerate(itertools.product((False, True),
+                                                     repeat=n)):
+            self.assertEqual(compiled.output_values(values),
+                             (bool(table >> i & 1),))
+
+        vectors = compiled.run_vectors((0b0011, 0b0101, 0b0000, 0b1111), 4)
+        for i in range(4):
+            values = compiled.run([bool(v >> i & 1)
+                                   for v in (0b0011, 0b0101, 0b0000,
+                                             0b1111)])
+            self.assertEqual([None if v is None else bool(v >> i & 1)
+                              for v in vectors], values)
+
+    def test_truth_tables(self):
+        s1 = lc.Switch()
+        s2 = lc.Switch()
+        b1 = lc.Bulb(lc.And((s1, s2)))
+        b2 = lc.Bulb(lc.Nor((s1, s2)))
+        b3 = lc.Bulb(lc.Xor((s1, None)))
+        board = lc.CircuitBoard([s1, s2, b1, b1.input, b2, b2.input, b3,
+                                 b3.input])
+        self.assertEqual(board.compile().truth_tables(),
+                         (0b1000, 0b0001, None))
+
+    def test_levelized(self):
+        board = lc.circuit_board("(A*B)+(C*~D)")
+        compiled = board.compile()
+        self.assertTrue(all(isinstance(c, lc.Input)
+                            for c in compiled.inputs))
+        for node, fanins in enumerate(compiled.fanins):
+            for fanin in fanins:
+                self.assertTrue(fanin < node)
+                self.assertTrue(compiled.levels[fanin] <
+                                compiled.levels[node])
+        # Wires are collapsed
+        opcodes = [o for o in compiled.opcodes
+                   if o not in (lc.OP_NONE, lc.OP_FALSE, lc.OP_TRUE)]
+        self.assertEqual(len(opcodes), 4 + 4)
+        wire = next(c for c in board if isinstance(c, lc.Wire))
+        self.assertEqual(compiled.node(wire), compiled.node(wire.input))
+
+    def test_none(self):
+        s = lc.Switch(True)
+        a = lc.And((s, None))
+        n = lc.Not(s)
+        compiled = lc.CircuitBoard([s, a, n]).compile()
+        values = compiled.run()
+        self.assertEqual(values[compiled.node(a)], None)
+        self.assertEqual(values[compiled.node(n)], False)
+        self.assertRaises(ValueError, compiled.run, (True, False))
+
+    def test_immutable(self):
+        s = lc.Switch()
+        n = lc.Not(s)
+        board = lc.CircuitBoard([s, n])
+        compiled = board.compile()
+        board.append(lc.Not(n))
+        self.assertEqual(len(compiled.run()), len(compiled))
+        self.assertRaises(KeyError, compiled.node, board[-1])
+
+    def test_recursion(self):
+        n = lc.Not()
+        n.inputs[n.empty_input_keys[0]] = n
+        self.assertRaises(lc.RecursionError, lc.CircuitBoard([n]).compile)
+
+
 class ConvertTestCase(unittest.TestCase):
 
     def test_expression(self):
@@ -167,6 +536,77 @@ class ConvertTestCase(unittest.TestCase):
                 if s is None)
         )
 
+    def ripple_carry_adder(self, bits):
+        """
+        Returns the switches and the carry out of a ripple carry adder.
+
+        Every carry is read twice, so written out the expression of the
+        carry out doubles in size with every bit.
+        """
+        switches = []
+        carry = lc.Switch()
+        switches.append(carry)
+        for _ in range(bits):
+            a = lc.Switch()
+            b = lc.Switch()
+            switches.extend((a, b))
+            c = lc.Wire(carry)
+            carry = lc.Or((lc.Or((lc.And((a, b)), lc.And((a, c)))),
+                           lc.And((b, c))))
+        return switches, carry
+
+    def test_shared(self):
+        _, carry = self.ripple_carry_adder(64)
+        expr = lc.expression(carry)
+        # The carry of the previous bit is the same object in both places
+        self.assertTrue(expr.args[0].args[1].args[1] is expr.args[1].args[1])
+
+        switches, carry = self.ripple_carry_adder(3)
+        expr = lc.expression(carry)
+        self.assertEqual(len(expr.symbols), len(switches))
+        for values in itertools.product((False, True), repeat=7):
+            subs_dict = {lc.boolean.Symbol(chr(ord("A") + i)):
+                         lc.boolean.TRUE if value else lc.boolean.FALSE
+                         for i, value in enumerate(values)}
+            # The first symbol is the carry in of the first bit
+            c = values[6]
+            for i in range(3):
+                a, b = values[4 - 2 * i], values[5 - 2 * i]
+                c = (a and b) or (a and c) or (b and c)
+            self.assertEqual(bool(expr.subs(subs_dict)), c)
+
+    def test_let(self):
+        _, carry = self.ripple_carry_adder(32)
+        bindings, expr = lc.expression(carry, let=True)
+        # Every carry but the last one is used twice
+        self.assertEqual(len(bindings), 31)
+        self.assertEqual(bindings[0][0], lc.boolean.Symbol("t1"))
+        self.assertEqual(expr.symbols & {s for s, _ in bindings},
+                         {lc.boolean.Symbol("t31")})
+        for i, (_, e) in enumerate(bindings):
+            used = {s for s, _ in bindings} & e.symbols
+            self.assertTrue(used <= {s for s, _ in bindings[:i]})
+
+        bindings, expr = lc.expression(carry, True, True)
+        self.assertEqual(bindings[0][0].obj, None)
+
+    def test_max_size(self):
+        _, carry = self.ripple_carry_adder(32)
+        self.assertRaises(lc.ExpressionSizeError, lc.expression, carry,
+                          max_size=10000)
+        bindings, _ = lc.expression(carry, let=True, max_size=10000)
+        self.assertRaises(lc.ExpressionSizeError, lc.expression, carry,
+                          let=True, max_size=100)
+        self.assertEqual(len(bindings), 31)
+
+    def test_recursion(self):
+        n = lc.Not()
+        n.inputs[n.empty_input_keys[0]] = lc.Wire(n)
+        self.assertRaises(lc.RecursionError, lc.expression, n)
+        w = lc.Wire()
+        w.input = w
+        self.assertRaises(lc.RecursionError, lc.expression, w)
+
     def test_circuit_board(self):
         self.assertIsInstance(lc.circuit_board("A"), lc.CircuitBoard)
 
@@ -174,11 +614,31 @@ class ConvertTestCase(unittest.TestCase):
                      lc.boolean.parse("A+B"),
                      lc.boolean.parse("A+(B*~C)"),
                      lc.boolean.parse("~(A+B)"),
-                     lc.boolean.parse("~A+~B+~C+~D"))
+                     lc.boolean.parse("~A+~B+~C+~D"),
+                     lc.boolean.parse("A⊕B⊕C"))
         for expr in expr_list:
             self.assertEqual(expr,
                              lc.expression(lc.circuit_board(expr)[-1]).eval())
 
+    def test_structural_hashing(self):
+        expr = lc.boolean.parse("(A*B)+((A*B)*C)", eval=False)
+        def and_a_b(board):
+            switches = [c for c in board if isinstance(c, lc.Switch)][:2]
+            return [c for c in board
+                    if isinstance(c.expression, lc.boolean.AND) and
+                    {w.input for w in c.inputs.values()} == set(switches)]
+
+        board = lc.circuit_board(expr)
+        gates = and_a_b(board)
+        self.assertEqual(len(gates), 1)
+        self.assertEqual(len(board.readers(gates[0])), 2)
+        self.assertEqual(lc.expression(board[-1]), expr)
+
+        unshared = lc.circuit_board(expr, structural_hashing=False)
+        self.assertEqual(len(and_a_b(unshared)), 2)
+        self.assertEqual(len(unshared) - len(board), 3)
+        self.assertEqual(lc.expression(unshared[-1]), expr)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,92 @@
+import sys
+sys.path.append("..")
+
+import itertools
+import unittest
+import logic_circuit as lc
+import netlist as nl
+
+
+class NetlistTestCase(unittest.TestCase):
+
+    def test_add(self):
+        netlist = nl.Netlist()
+        a = netlist.add(lc.OP_INPUT, name="a")
+        b = netlist.add(lc.OP_INPUT)
+        g = netlist.add(lc.OP_NAND, (a, b))
+        self.assertEqual((a, b, g), (0, 1, 2))
+        self.assertEqual(list(netlist.fanins(g)), [a, b])
+        self.assertEqual(list(netlist.inputs), [a, b])
+        self.assertEqual(netlist.names, {a: "a"})
+        self.assertRaises(ValueError, netlist.add, lc.OP_NOT, (3,))
+        self.assertEqual(len(netlist), 3)
+
+    def test_evaluate(self):
+        netlist = nl.Netlist()
+        a, b, c = (netlist.add(lc.OP_INPUT) for _ in range(3))
+        nodes = [netlist.add(opcode, (a, b, c))
+                 for opcode in (lc.OP_AND, lc.OP_OR, lc.OP_NAND, lc.OP_NOR,
+                                lc.OP_XOR, lc.OP_XNOR)]
+        nodes.append(netlist.add(lc.OP_NOT, (a,)))
+        nodes.append(netlist.add(lc.OP_BUF, (b,)))
+        nodes.append(netlist.add(lc.OP_TRUE))
+        netlist.outputs.extend(nodes)
+        for values in itertools.product((False, True), repeat=3):
+            self.assertEqual(netlist.evaluate(values),
+                             (all(values), any(values), not all(values),
+                              not any(values), sum(values) % 2 == 1,
+                              sum(values) % 2 == 0, not values[0], values[1],
+                              True))
+        # Values that are not known
+        self.assertEqual(netlist.evaluate((None, True, False))[:2],
+                         (None, None))
+        self.assertRaises(ValueError, netlist.evaluate, (True,))
+
+        vectors = netlist.run_vectors((0b0011, 0b0101, 0b1111), 4)
+        for i in range(4):
+            netlist.evaluate((bool(0b0011 >> i & 1), bool(0b0101 >> i & 1),
+                              True))
+            self.assertEqual([vectors[node] >> i & 1 for node in nodes],
+                             [netlist.values[node] for node in nodes])
+
+    def test_board(self):
+        board = lc.circuit_board("(A⊕B)*~(C+D)+~(A*C)")
+        board.settle()
+        netlist = nl.Netlist.from_board(board)
+        compiled = board.compile()
+        self.assertEqual(netlist.output_values(), compiled.output_values())
+        for values in itertools.product((False, True), repeat=4):
+            self.assertEqual(netlist.evaluate(values),
+                             compiled.output_values(values))
+
+        new_board = netlist.to_board()
+        self.assertEqual(new_board.compile().truth_tables(),
+                         compiled.truth_tables())
+        self.assertEqual([c.output for c in new_board
+                          if isinstance(c, lc.Output)],
+                         list(netlist.output_values()))
+
+    def test_unknown(self):
+        # A gate that is not connected outputs None
+        s = lc.Switch()
+        g = lc.And((s, None))
+        board = lc.CircuitBoard([s, g, lc.Bulb(g)])
+        netlist = nl.Netlist.from_board(board)
+        self.assertEqual(netlist.evaluate((True,)), (None,))
+        self.assertEqual(netlist.run_vectors((1,), 1)[netlist.outputs[0]],
+                         None)
+        new_board = netlist.to_board()
+        self.assertEqual(new_board[-1].output, None)
+
+    def test_size(self):
+        netlist = nl.Netlist()
+        for _ in range(2):
+            netlist.add(lc.OP_INPUT)
+        for i in range(2, 1000):
+            netlist.add(lc.OP_AND, (i - 2, i - 1))
+        # About 14 bytes per gate
+        self.assertLess(netlist.nbytes, 1000 * 16)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
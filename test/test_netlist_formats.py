@@ -0,0 +1,172 @@
+import sys
+sys.path.append("..")
+
+import io
+import os
+import tempfile
+import unittest
+import boolean
+import logic_circuit as lc
+import netlist as nl
+import netlist_formats as nf
+from circuits import C17_BENCH
+
+C17_BLIF = """\
+.model c17
+.inputs 1 2 3 \\
+  6 7
+.outputs 22 23
+.names 10 16 22
+11 0
+.names 16 19 23
+0- 1
+-0 1
+.names 1 3 10
+11 0
+.names 3 6 11
+11 0
+.names 2 11 16
+11 0
+.names 11 7 19
+11 0
+.end
+"""
+
+C17_VERILOG = """\
+// c17
+module c17 (N1, N2, N3, N6, N7, N22, N23);
+  input N1, N2, N3, N6, N7;
+  output N22, N23;
+  wire N10, N11, N16, N19;
+  /* gates
+     from the benchmark */
+  nand NAND2_1 (N10, N1, N3);
+  nand NAND2_2 (N11, N3, N6);
+  nand NAND2_3 (N16, N2, N11);
+  nand NAND2_4 (N19, N11, N7);
+  nand NAND2_5 (N22, N10, N16);
+  nand NAND2_6 (N23,
+                N16, N19);
+endmodule
+"""
+
+
+def truth_tables(netlist):
+    """
+    Returns the truth tables of the outputs of a netlist.
+    """
+    n = len(netlist.inputs)
+    masks = boolean.variable_bitsets(n)
+    values = netlist.run_vectors([masks[n - 1 - i] for i in range(n)], 1 << n)
+    return tuple(values[node] for node in netlist.outputs)
+
+
+class NetlistFormatsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.c17 = nf.read_bench(io.StringIO(C17_BENCH))
+
+    def test_read(self):
+        netlist = self.c17
+        self.assertEqual([netlist.names[n] for n in netlist.inputs],
+                         ["1", "2", "3", "6", "7"])
+        self.assertEqual([netlist.names[n] for n in netlist.outputs],
+                         ["22", "23"])
+        for node in range(len(netlist)):
+            self.assertTrue(all(f < node for f in netlist.fanins(node)))
+
+        # All inputs 0
+        self.assertEqual(netlist.evaluate((0, 0, 0, 0, 0)), (False, False))
+        self.assertEqual(netlist.evaluate((1, 0, 1, 0, 0)), (True, False))
+
+        tables = truth_tables(netlist)
+        self.assertEqual(truth_tables(nf.read_blif(io.StringIO(C17_BLIF))),
+                         tables)
+        verilog = nf.read_verilog(io.StringIO(C17_VERILOG))
+        self.assertEqual(truth_tables(verilog), tables)
+        self.assertEqual(verilog.names[verilog.outputs[0]], "N22")
+
+    def test_write(self):
+        tables = truth_tables(self.c17)
+        for write, read in ((nf.write_bench, nf.read_bench),
+                            (nf.write_blif, nf.read_blif),
+                            (nf.write_verilog, nf.read_verilog)):
+            file = io.StringIO()
+            write(self.c17, file)
+            file.seek(0)
+            netlist = read(file)
+            self.assertEqual(truth_tables(netlist), tables)
+            self.assertEqual([netlist.names[n] for n in netlist.outputs],
+                             ["22", "23"])
+
+    def test_board(self):
+        board = lc.circuit_board("(A⊕B⊕C)*~(C+D)+~(A*C)")
+        compiled = board.compile()
+        for write, read in ((nf.write_bench, nf.read_bench),
+                            (nf.write_blif, nf.read_blif),
+                            (nf.write_verilog, nf.read_verilog)):
+            file = io.StringIO()
+            write(board, file)
+            file.seek(0)
+            self.assertEqual(
+                read(file).to_board().compile().truth_tables(),
+                compiled.truth_tables())
+
+    def test_constants(self):
+        netlist = nl.Netlist()
+        a = netlist.add(lc.OP_INPUT, name="a")
+        netlist.outputs.append(netlist.add(lc.OP_TRUE))
+        netlist.outputs.append(netlist.add(lc.OP_FALSE))
+        # An output that is also an input
+        netlist.outputs.append(a)
+        for write, read in ((nf.write_blif, nf.read_blif),
+                            (nf.write_verilog, nf.read_verilog)):
+            file = io.StringIO()
+            write(netlist, file)
+            file.seek(0)
+            self.assertEqual(read(file).evaluate((False,)),
+                             (True, False, False))
+        self.assertRaises(ValueError, nf.write_bench, netlist, io.StringIO())
+
+    def test_latch(self):
+        bench = ["INPUT(a)", "OUTPUT(q)", "q = DFF(d)", "d = NOT(q)"]
+        netlist = nf.read_bench(bench)
+        self.assertEqual([netlist.names[n] for n in netlist.inputs],
+                         ["a", "q"])
+        self.assertEqual([netlist.names[n] for n in netlist.outputs],
+                         ["q", "d"])
+        netlist = nf.read_blif([".model t", ".inputs a", ".outputs q",
+                                ".latch d q 0", ".names q d", "0 1", ".end"])
+        self.assertEqual(netlist.evaluate((False, True)), (True, False))
+
+    def test_errors(self):
+        self.assertRaises(nf.ParseError, nf.read_bench,
+                          ["INPUT(a)", "b = NAND(a, c)"])
+        self.assertRaises(nf.ParseError, nf.read_bench,
+                          ["b = NOT(c)", "c = NOT(b)"])
+        self.assertRaises(nf.ParseError, nf.read_bench,
+                          ["INPUT(a)", "b = MUX(a, a)"])
+        self.assertRaises(nf.ParseError, nf.read_bench,
+                          ["INPUT(a)", "a = NOT(a)"])
+        self.assertRaises(nf.ParseError, nf.read_bench,
+                          ["INPUT(a)", "OUTPUT(b)"])
+        self.assertRaises(nf.ParseError, nf.read_blif,
+                          [".inputs a", ".outputs b", ".subckt x a=a b=b"])
+        self.assertRaises(nf.ParseError, nf.read_verilog,
+                          ["module m (a);", "input [1:0] a;", "endmodule"])
+
+    def test_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "c17.v")
+            nf.write(self.c17, path)
+            self.assertEqual(truth_tables(nf.read(path)),
+                             truth_tables(self.c17))
+            os.remove(path)
+        finally:
+            os.rmdir(directory)
+        self.assertRaises(ValueError, nf.read, "c17.txt")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
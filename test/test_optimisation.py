@@ -0,0 +1,81 @@
+import sys
+sys.path.append("..")
+
+import unittest
+import logic_circuit as lc
+import optimisation as op
+
+
+class OptimisationTestCase(unittest.TestCase):
+
+    def assertSameOutputs(self, board, expression):
+        expected = lc.circuit_board(expression).compile().truth_tables()
+        board.settle()
+        self.assertEqual(board.compile().truth_tables(), expected)
+
+    def test_collapse_wires(self):
+        board = lc.circuit_board("A*~B")
+        op.collapse_wires(board)
+        self.assertEqual(
+            [c for c in board if type(c) is lc.Wire], [])
+        self.assertIsInstance(board[-1], lc.Bulb)
+        self.assertSameOutputs(board, "A*~B")
+
+    def test_propagate_constants(self):
+        board = lc.circuit_board("(A*1)+(B*0)")
+        op.collapse_wires(board)
+        op.propagate_constants(board)
+        # A*1 and the OR with B*0 become wires
+        gates = [c for c in board if isinstance(c, lc.Gate) and
+                 not isinstance(c, lc.Output) and c.expression.symbols]
+        self.assertEqual([type(g) for g in gates], [lc.Wire, lc.Wire])
+        self.assertSameOutputs(board, "(A*1)+(B*0)")
+
+        board = lc.circuit_board("(A⊕1)*~(B*0)")
+        op.optimise(board)
+        self.assertSameOutputs(board, "(A⊕1)*~(B*0)")
+
+    def test_remove_dead_gates(self):
+        board = lc.circuit_board("A*B")
+        dead = lc.Or((board[0], board[1]))
+        board.append(dead)
+        op.remove_dead_gates(board)
+        self.assertNotIn(dead, board)
+        self.assertEqual(len([c for c in board
+                              if isinstance(c, lc.Input)]), 2)
+        self.assertSameOutputs(board, "A*B")
+
+    def test_merge_duplicates(self):
+        board = lc.circuit_board("(A*B)+((B*A)*C)", structural_hashing=False)
+        op.collapse_wires(board)
+        ands = [c for c in board if isinstance(c, lc.Gate) and
+                len(c.inputs) == 2 and c.lookup_table[1] == 0b1000]
+        op.merge_duplicates(board)
+        self.assertEqual(len([c for c in ands if c in board]), 2)
+        self.assertSameOutputs(board, "(A*B)+((A*B)*C)")
+
+    def test_pass_manager(self):
+        expression = "(A*B)+((A*B)*C)+(D*1)+(A*0)"
+        board = lc.circuit_board(expression, structural_hashing=False)
+        size = len(board)
+        report = op.PassManager().run(board)
+        self.assertEqual(report[0][0], "collapse_wires")
+        self.assertEqual(report[0][1], size)
+        self.assertEqual(report[-1][2], len(board))
+        # The last round did not change anything
+        self.assertTrue(all(before == after for _, before, after
+                            in report[-len(op.DEFAULT_PASSES):]))
+        self.assertLess(len(board), size // 2)
+        self.assertSameOutputs(board, expression)
+        self.assertIn("collapse_wires", op.format_report(report))
+
+        # Outputs are kept even if they read from a constant
+        board = lc.circuit_board("A*0")
+        op.optimise(board)
+        self.assertIsInstance(board[-1], lc.Bulb)
+        board.settle()
+        self.assertFalse(board[-1].output)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
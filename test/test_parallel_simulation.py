@@ -0,0 +1,88 @@
+import sys
+sys.path.append("..")
+
+import random
+import unittest
+import logic_circuit as lc
+import netlist as nl
+import parallel_simulation as ps
+from circuits import random_netlist
+
+
+def expected_outputs(netlist, inputs, width):
+    values = netlist.run_vectors(inputs, width)
+    return [values[node] for node in netlist.outputs]
+
+
+class ParallelSimulationTestCase(unittest.TestCase):
+
+    def test_partition(self):
+        netlist = random_netlist(0, inputs=10, gates=2000)
+        levels = ps.levels(netlist)
+        assignment = ps.partition(netlist, 4)
+        self.assertEqual(len(assignment), len(netlist))
+        # Every level is balanced
+        by_level = {}
+        for node in range(len(netlist)):
+            if levels[node]:
+                counts = by_level.setdefault(levels[node], [0] * 4)
+                counts[assignment[node]] += 1
+        for counts in by_level.values():
+            self.assertLessEqual(max(counts),
+                                 sum(counts) / 4 * (1 + ps.BALANCE_SLACK) + 1)
+        # Fewer edges are cut than by dealing the nodes out in turn
+        round_robin = [node % 4 for node in range(len(netlist))]
+        self.assertLess(ps.cut_edges(netlist, assignment),
+                        ps.cut_edges(netlist, round_robin))
+
+    def test_partitioned(self):
+        r = random.Random(1)
+        netlist = random_netlist(1, inputs=8, gates=500)
+        netlist.outputs.extend(range(50, 500, 7))
+        inputs = [r.getrandbits(100) for _ in range(8)]
+        with ps.PartitionedSimulator(netlist, 3) as simulator:
+            self.assertGreater(simulator.stages, 1)
+            self.assertEqual(simulator.run_vectors(inputs, 100),
+                             expected_outputs(netlist, inputs, 100))
+            # The memory is made for every call, so the width can change
+            self.assertEqual(simulator.run_vectors(inputs, 3),
+                             expected_outputs(netlist, inputs, 3))
+            self.assertRaises(ValueError, simulator.run_vectors, [1], 1)
+        self.assertRaises(ValueError, simulator.run_vectors, inputs, 100)
+
+        # Everything in one cluster works as well
+        with ps.PartitionedSimulator(netlist, 1) as simulator:
+            self.assertEqual(simulator.stages, 1)
+            self.assertEqual(simulator.run_vectors(inputs, 100),
+                             expected_outputs(netlist, inputs, 100))
+
+    def test_constants_and_unknown(self):
+        netlist = nl.Netlist()
+        a = netlist.add(lc.OP_INPUT)
+        one = netlist.add(lc.OP_TRUE)
+        none = netlist.add(lc.OP_NONE)
+        netlist.outputs.extend([netlist.add(lc.OP_AND, (a, one)), one,
+                                netlist.add(lc.OP_OR, (a, none)), a])
+        with ps.PartitionedSimulator(netlist, 2) as simulator:
+            self.assertEqual(simulator.run_vectors([0b0110], 4),
+                             [0b0110, 0b1111, None, 0b0110])
+        self.assertEqual(ps.run_batches(netlist, [0b0110], 4, 2),
+                         [0b0110, 0b1111, None, 0b0110])
+
+    def test_batches(self):
+        r = random.Random(2)
+        netlist = random_netlist(2, inputs=8, gates=300)
+        for width in (1, 8, 100, 257):
+            inputs = [r.getrandbits(width) for _ in range(8)]
+            self.assertEqual(ps.run_batches(netlist, inputs, width, 3),
+                             expected_outputs(netlist, inputs, width))
+
+        board = lc.circuit_board("(A⊕B)*~(C+D)+~(A*C)")
+        masks = lc.boolean.variable_bitsets(4)
+        table, = board.compile().truth_tables()
+        self.assertEqual(ps.run_batches(board, masks[::-1], 16, 2), [table])
+        self.assertRaises(ValueError, ps.run_batches, board, masks, 16, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,71 @@
+import sys
+sys.path.append("..")
+
+import itertools
+import random
+import unittest
+import sat
+
+
+def satisfiable(variables, clauses):
+    """
+    Returns if clauses can be satisfied by trying every assignment.
+    """
+    for values in itertools.product((False, True), repeat=variables):
+        if all(any(values[l >> 1] != bool(l & 1) for l in c)
+               for c in clauses):
+            return True
+    return False
+
+
+class SATTestCase(unittest.TestCase):
+
+    def test_random(self):
+        for seed in range(100):
+            r = random.Random(seed)
+            variables = r.randint(3, 8)
+            clauses = [[r.randrange(2 * variables) for _ in range(3)]
+                       for _ in range(r.randint(1, 5 * variables))]
+            solver = sat.Solver()
+            for clause in clauses:
+                solver.add_clause(clause)
+            result = solver.solve()
+            self.assertEqual(result, satisfiable(variables, clauses))
+            if result:
+                for clause in clauses:
+                    self.assertTrue(any(solver.value(l) for l in clause))
+            # Assumptions only hold for one call
+            assumptions = [r.randrange(2 * variables) for _ in range(2)]
+            self.assertEqual(solver.solve(assumptions),
+                             satisfiable(variables, clauses +
+                                         [[l] for l in assumptions]))
+            self.assertEqual(solver.solve(), result)
+
+    def test_pigeonhole(self):
+        # 6 pigeons do not fit into 5 holes
+        solver = sat.Solver()
+
+        def variable(pigeon, hole):
+            return pigeon * 5 + hole
+        for pigeon in range(6):
+            solver.add_clause([2 * variable(pigeon, h) for h in range(5)])
+        for hole in range(5):
+            for p, q in itertools.combinations(range(6), 2):
+                solver.add_clause([2 * variable(p, hole) + 1,
+                                   2 * variable(q, hole) + 1])
+        self.assertIsNone(solver.solve(conflict_limit=1))
+        self.assertFalse(solver.solve())
+
+    def test_units(self):
+        solver = sat.Solver()
+        self.assertTrue(solver.add_clause([0, 2]))
+        self.assertTrue(solver.add_clause([1]))
+        self.assertTrue(solver.solve())
+        self.assertTrue(solver.value(2))
+        self.assertFalse(solver.solve([3]))
+        self.assertFalse(solver.add_clause([3]))
+        self.assertFalse(solver.solve())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
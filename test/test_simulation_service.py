@@ -0,0 +1,120 @@
+import sys
+sys.path.append("..")
+
+import asyncio
+import io
+import itertools
+import os
+import tempfile
+import unittest
+import logic_circuit as lc
+import netlist_formats as nf
+import simulation_service as ss
+from circuits import C17_BENCH
+
+
+def c17_outputs(vector):
+    """
+    Returns the outputs of c17 by simulating it on its own.
+    """
+    netlist = nf.read_bench(io.StringIO(C17_BENCH))
+    return [bool(v) for v in netlist.evaluate(vector)]
+
+
+class SimulationServiceTestCase(unittest.TestCase):
+
+    def test_batching(self):
+        async def run():
+            server = ss.SimulationServer(
+                {"c17": nf.read_bench(io.StringIO(C17_BENCH)),
+                 "and": lc.circuit_board("A*B")},
+                batch_delay=0.05)
+            host, port = await server.start()
+            vectors = list(itertools.product((False, True), repeat=5))
+            async with await ss.SimulationClient.connect(host, port) as c:
+                self.assertEqual(await c.boards(),
+                                 {"c17": (5, 2), "and": (2, 1)})
+                # Concurrent requests are simulated in one batch
+                results = await asyncio.gather(
+                    *(c.evaluate("c17", [v]) for v in vectors),
+                    c.evaluate("c17", vectors[:3]))
+                for v, result in zip(vectors, results):
+                    self.assertEqual(result, [c17_outputs(v)])
+                self.assertEqual(results[-1],
+                                 [c17_outputs(v) for v in vectors[:3]])
+                self.assertEqual(await c.evaluate("and", [(1, 1), (1, 0)]),
+                                 [[True], [False]])
+                self.assertEqual(await c.evaluate("and", []), [])
+
+                with self.assertRaises(ss.ServiceError):
+                    await c.evaluate("missing", [(1, 1)])
+                with self.assertRaises(ss.ServiceError):
+                    await c.evaluate("and", [(1,)])
+                with self.assertRaises(ss.ServiceError):
+                    await c.request({"op": "unknown"})
+
+                metrics = await c.metrics()
+            await server.close()
+            return metrics
+
+        metrics = asyncio.run(run())
+        self.assertEqual(metrics["requests"], 35)
+        self.assertEqual(metrics["vectors"], 37)
+        self.assertEqual(metrics["batches"], 2)
+        self.assertEqual(metrics["errors"], 3)
+        self.assertGreater(metrics["requests_per_batch"], 1)
+        self.assertIsNotNone(metrics["latency_p95"])
+
+    def test_max_batch(self):
+        async def run():
+            server = ss.SimulationServer({"and": lc.circuit_board("A*B")},
+                                         batch_delay=10, max_batch=4)
+            outputs = await asyncio.gather(
+                server.evaluate("and", [(1, 1), (0, 1)]),
+                server.evaluate("and", [(1, 0), (1, 1)]))
+            return outputs, server.metrics.batches
+
+        # Full batches do not wait for the delay
+        outputs, batches = asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertEqual(outputs, [[[1], [0]], [[0], [1]]])
+        self.assertEqual(batches, 1)
+
+    def test_replaced_board(self):
+        async def run():
+            server = ss.SimulationServer({"f": lc.circuit_board("A*B*C")},
+                                         batch_delay=0.05)
+            old = asyncio.ensure_future(server.evaluate("f", [(1, 1, 1)]))
+            await asyncio.sleep(0)
+            # Requests that are waiting still use the board they were for
+            server.add_board("f", lc.circuit_board("A+B"))
+            new = await server.evaluate("f", [(0, 1)])
+            return await old, new, server.metrics.batches
+
+        old, new, batches = asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertEqual(old, [[1]])
+        self.assertEqual(new, [[1]])
+        self.assertEqual(batches, 2)
+
+    def test_unix_socket(self):
+        if not hasattr(asyncio, "start_unix_server"):
+            self.skipTest("Unix sockets are not supported")
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "simulation.sock")
+        bench = os.path.join(directory, "c17.bench")
+        with open(bench, "w") as file:
+            file.write(C17_BENCH)
+
+        async def run():
+            server = ss.SimulationServer()
+            await server.start(path=path)
+            async with await ss.SimulationClient.connect(path=path) as c:
+                await c.load("c17", bench)
+                result = await c.evaluate("c17", [(1, 0, 1, 1, 0)])
+            await server.close()
+            return result
+
+        self.assertEqual(asyncio.run(run()), [c17_outputs((1, 0, 1, 1, 0))])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
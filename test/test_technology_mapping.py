@@ -0,0 +1,108 @@
+import sys
+sys.path.append("..")
+
+import itertools
+import unittest
+import boolean
+import logic_circuit as lc
+import technology_mapping as tm
+
+
+def gates(expr):
+    """
+    Returns all NAND and NOR gates in a mapped expression.
+    """
+    if expr.args is None:
+        return []
+    inner = expr.args[0]
+    return [inner] + [g for arg in inner.args for g in gates(arg)]
+
+
+class LibraryTestCase(unittest.TestCase):
+
+    def test_complete(self):
+        for name in tm.LIBRARIES:
+            for inputs in (1, 2, 3):
+                self.assertEqual(len(tm.library(name, inputs)),
+                                 2 ** 2 ** inputs)
+
+    def test_costs(self):
+        nand = tm.library("nand", 2)
+        self.assertEqual(nand[0b0111][0], 1)  # NAND
+        self.assertEqual(nand[0b1000][0], 2)  # AND
+        self.assertEqual(nand[0b1110][0], 3)  # OR
+        self.assertEqual(tm.library("nor", 2)[0b1110][0], 2)
+        self.assertRaises(ValueError, tm.library, "xor", 2)
+
+
+class MapTestCase(unittest.TestCase):
+
+    expr_list = ("A",
+                 "~A",
+                 "A*B",
+                 "A+B",
+                 "A*B+C",
+                 "(A+~B)*(C+D*~A)",
+                 "A*B*C*D+~A*~B*~C*~D",
+                 "A*~B+~A*B")
+
+    def test_equivalent(self):
+        for expr_str in self.expr_list:
+            expr = boolean.parse(expr_str, eval=False)
+            symbols = sorted(expr.symbols, key=str)
+            for name in tm.LIBRARIES:
+                mapped = tm.map_expression(expr, name)
+                for values in itertools.product((boolean.FALSE, boolean.TRUE),
+                                                repeat=len(symbols)):
+                    subs_dict = dict(zip(symbols, values))
+                    self.assertEqual(bool(expr.subs(subs_dict)),
+                                     bool(mapped.subs(subs_dict)))
+
+    def test_deep_expression(self):
+        # Deeper than the recursion limit
+        symbols = boolean.symbols(*("a{}".format(i) for i in range(3000)))
+        expr = symbols[0]
+        for i, symbol in enumerate(symbols[1:]):
+            operation = boolean.AND if i % 2 else boolean.OR
+            expr = operation(expr, symbol, eval=False)
+        mapped = tm.map_expression(expr, "nand")
+        self.assertGreater(tm.gate_count(mapped), len(symbols))
+
+    def test_only_library_gates(self):
+        operations = {"nand": (boolean.AND,),
+                      "nor": (boolean.OR,),
+                      "mixed": (boolean.AND, boolean.OR)}
+        for expr_str in self.expr_list:
+            for name in tm.LIBRARIES:
+                for gate in gates(tm.map_expression(expr_str, name)):
+                    self.assertIsInstance(gate, operations[name])
+                    self.assertEqual(len(gate.args), 2)
+
+    def test_constants(self):
+        self.assertTrue(tm.map_expression("A*~A") is boolean.FALSE)
+        self.assertTrue(tm.map_expression("A+~A", "nor") is boolean.TRUE)
+
+    def test_gate_count(self):
+        self.assertEqual(tm.gate_count(tm.map_expression("A*B")), 2)
+        self.assertEqual(tm.gate_count(tm.map_expression("A*B+C")), 3)
+        self.assertEqual(tm.gate_count(tm.map_expression("A+B", "nor")), 2)
+
+    def test_circuit_board(self):
+        # The majority function does not depend on the order of the switches
+        board = lc.circuit_board(tm.map_expression("A*B+A*C+B*C"))
+        switches = [c for c in board if isinstance(c, lc.Switch)]
+        self.assertEqual(len(switches), 3)
+        for c in board:
+            if isinstance(c, lc.Gate) and not isinstance(c, lc.Wire):
+                self.assertIsInstance(c.expression, boolean.NOT)
+                self.assertIsInstance(c.expression.args[0], boolean.AND)
+        for values in itertools.product((False, True), repeat=3):
+            for switch, value in zip(switches, values):
+                switch.output = value
+            for _ in range(len(board)):
+                board.update()
+            self.assertEqual(board[-1].output, sum(values) >= 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,109 @@
+import sys
+sys.path.append("..")
+
+import unittest
+import logic_circuit as lc
+import timing_simulation as ts
+from circuits import hazard_board
+
+
+class TimingSimulatorTestCase(unittest.TestCase):
+
+    def test_delay(self):
+        s = lc.Switch()
+        w = lc.Wire(s)
+        n = lc.Not(w)
+        b = lc.Bulb(n)
+        board = lc.CircuitBoard([s, w, n, b])
+        board.settle()
+        sim = ts.TimingSimulator(board)
+        sim.set(s, True)
+        self.assertEqual(sim.run(), 4)
+        self.assertEqual(sim.waveforms[b], [(3, False)])
+        self.assertEqual(sim.settle_times(), {b: 3})
+
+        sim = ts.TimingSimulator(board, delays={n: 10, b: 0})
+        sim.set(s, True, time=5)
+        sim.run()
+        self.assertEqual(sim.waveforms[b], [(16, False)])
+        self.assertEqual(sim.outputs[b], False)
+        self.assertEqual(sim.time, 17)
+
+    def test_hazard(self):
+        board, a, bulb = hazard_board()
+        sim = ts.TimingSimulator(board)
+        sim.set(a, False)
+        sim.run()
+        self.assertEqual(sim.waveforms[bulb], [(3, False), (4, True)])
+        self.assertEqual(sim.glitches(), {bulb: [(3, 4, False)]})
+        self.assertEqual(sim.hazards(), {bulb: "static"})
+        self.assertEqual(sim.settle_times(), {bulb: 4})
+
+        # Going back does not glitch
+        start = sim.time
+        sim.set(a, True)
+        sim.run()
+        self.assertEqual(sim.glitches(start), {bulb: []})
+        self.assertEqual(sim.hazards(start), {bulb: None})
+        self.assertEqual(sim.settle_times(start), {bulb: None})
+
+    def test_driver_not_on_board(self):
+        s = lc.Switch()
+        e = lc.Switch(True)
+        small = lc.And((s, e))
+        # Too many inputs for a lookup table
+        drivers = [s] + [e] * lc.LOOKUP_TABLE_MAX_INPUTS
+        names = ["A{}".format(i) for i in range(len(drivers))]
+        large = lc.Gate("*".join(names), dict(zip(names, drivers)))
+        self.assertIsNone(large.lookup_table[1])
+        b1, b2 = lc.Bulb(small), lc.Bulb(large)
+        board = lc.CircuitBoard([s, small, large, b1, b2])
+        board.settle()
+        sim = ts.TimingSimulator(board)
+        # Both gates read the output e had when the simulator was created
+        e.press()
+        sim.set(s, True)
+        sim.run()
+        self.assertEqual(sim.outputs[b1], True)
+        self.assertEqual(sim.outputs[b2], True)
+
+    def test_balanced(self):
+        # With the same delay on both paths there is no hazard
+        board, a, bulb = hazard_board()
+        n = next(c for c in board if isinstance(c, lc.Not))
+        sim = ts.TimingSimulator(board, delays={n: 0})
+        sim.set(a, False)
+        sim.run()
+        self.assertEqual(sim.hazards(), {bulb: None})
+
+    def test_overflow(self):
+        s = lc.Switch()
+        n = lc.Not(s)
+        board = lc.CircuitBoard([s, n])
+        board.settle()
+        sim = ts.TimingSimulator(board, delays={n: 1000}, watch=[n],
+                                 wheel_size=8)
+        sim.set(s, True, time=3)
+        sim.run(until=100)
+        self.assertEqual(sim.outputs[n], True)
+        sim.run()
+        self.assertEqual(sim.waveforms[n], [(1003, False)])
+        self.assertRaises(ValueError, sim.set, s, False, 0)
+        self.assertRaises(ValueError, ts.TimingSimulator, board,
+                          wheel_size=6)
+
+    def test_oscillator(self):
+        # A NOT gate reading its own output toggles every unit of time
+        n = lc.Not()
+        n.inputs[n.empty_input_keys[0]] = n
+        n._output = True
+        board = lc.CircuitBoard([n])
+        sim = ts.TimingSimulator(board, watch=[n])
+        sim.set(n, False)
+        sim.run(until=4)
+        self.assertEqual([t for t, _ in sim.waveforms[n]], [0, 1, 2, 3, 4])
+        self.assertEqual(sim.time, 5)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
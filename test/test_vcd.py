@@ -0,0 +1,94 @@
+import sys
+sys.path.append("..")
+
+import io
+import os
+import tempfile
+import unittest
+import logic_circuit as lc
+import timing_simulation as ts
+import vcd
+from circuits import hazard_board
+
+
+def parse(text):
+    """
+    Returns the names of the signals of a VCD file and their changes as
+    lists of (time, value).
+    """
+    header, _, body = text.partition("$enddefinitions $end\n")
+    names = {}
+    for line in header.splitlines():
+        words = line.split()
+        if words[0] == "$var":
+            names[words[3]] = words[4]
+    changes = {name: [] for name in names.values()}
+    time = None
+    for line in body.splitlines():
+        if line.startswith("#"):
+            time = int(line[1:])
+        elif line[0] in "01x":
+            changes[names[line[1:]]].append((time, line[0]))
+    return names, changes
+
+
+class VCDTestCase(unittest.TestCase):
+
+    def test_identifier(self):
+        codes = [vcd.identifier(i) for i in range(94 * 95 + 1)]
+        self.assertEqual(codes[:2], ["!", "\""])
+        self.assertEqual(codes[93], "~")
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertEqual(len(codes[-1]), 3)
+
+    def test_hazard(self):
+        board, a, bulb = hazard_board()
+        simulator = ts.TimingSimulator(board, watch=[])
+        file = io.StringIO()
+        writer = vcd.VCDWriter(file, board, names={a: "a", bulb: "out"},
+                               signals=["a", bulb, board[4]],
+                               buffer_size=2)
+        simulator.subscribe(writer)
+        simulator.set(a, False)
+        simulator.run()
+        writer.close()
+        self.assertEqual(simulator.waveforms, {})
+
+        text = file.getvalue()
+        self.assertTrue(text.startswith("$timescale 1 ns $end\n"))
+        names, changes = parse(text)
+        self.assertEqual(sorted(names.values()), ["And4", "a", "out"])
+        # The initial values, then the glitch of the output
+        self.assertEqual(changes["a"], [(0, "1"), (0, "0")])
+        self.assertEqual(changes["out"], [(0, "1"), (3, "0"), (4, "1")])
+        self.assertEqual(changes["And4"], [(0, "1"), (1, "0")])
+
+    def test_file(self):
+        s = lc.Switch()
+        n = lc.Not(s)
+        bulb = lc.Bulb(n)
+        board = lc.CircuitBoard([s, n, bulb])
+        board.settle()
+        simulator = ts.TimingSimulator(board, watch=[])
+        path = os.path.join(tempfile.mkdtemp(), "not.vcd")
+        with vcd.VCDWriter(path, board, timescale="1 ps") as writer:
+            simulator.subscribe(writer)
+            for time in range(0, 100, 10):
+                simulator.set(s, time % 20 == 0, time)
+            simulator.run()
+        with open(path) as file:
+            names, changes = parse(file.read())
+        # The switch and the bulb by default
+        self.assertEqual(sorted(names.values()), ["Bulb2", "Switch0"])
+        # The initial value and ten changes
+        self.assertEqual(len(changes["Bulb2"]), 11)
+        self.assertEqual(changes["Bulb2"][-1], (92, "1"))
+
+        self.assertRaises(ValueError, vcd.VCDWriter, io.StringIO(), board,
+                          ["missing"])
+        writer = vcd.VCDWriter(io.StringIO(), board)
+        self.assertRaises(ValueError, writer.changes, 0, {s: True})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,279 @@
+"""
+Timing Simulation
+
+This module simulates circuit boards from logic_circuit with delays. Every
+component takes some time to change its output after one of its inputs
+changed. By default every wire and every gate takes 1 unit of time, so the
+delay through a circuit is the number of components the signal passes, which
+is also the number of times CircuitBoard.update has to be called.
+
+Output changes are events that are put on a timing wheel, a ring of buckets
+with one bucket for every unit of time, so scheduling and finding the next
+event do not depend on the number of events. Events that are further in the
+future than the size of the wheel wait in a heap until the wheel reaches
+them.
+
+Because every change is simulated at the time it happens, glitches and hazards
+are visible in the recorded waveforms.
+"""
+import heapq
+
+import logic_circuit
+
+# The number of buckets of the timing wheel, must be a power of 2
+WHEEL_SIZE = 256
+
+
+def default_delay(component):
+    """
+    Returns the default delay of a component.
+
+    Wires and gates take 1 unit of time, inputs do not have a delay.
+    """
+    if isinstance(component, logic_circuit.Gate):
+        return 1
+    return 0
+
+
+class TimingSimulator:
+
+    """
+    Simulates a circuit board with delays.
+
+    delays maps components to their delays, components that are not in it
+    use default_delay. The simulation starts at time 0 with the current
+    outputs of the components, so the board should be settled first.
+    Components that are not on the board but are read by it keep the outputs
+    they had when the simulator was created. The waveforms of the watched
+    components, by default the outputs of the board, are recorded as lists of
+    (time, output) for every change.
+
+    Sinks, like vcd.VCDWriter, can subscribe to the changes of all components
+    instead, watch can be empty so no waveforms are kept in memory.
+    """
+
+    def __init__(self,
+                 board,
+                 delays={},
+                 watch=None,
+                 wheel_size=WHEEL_SIZE):
+        if wheel_size & (wheel_size - 1):
+            raise ValueError("The wheel size must be a power of 2 but is {}"
+                             .format(wheel_size))
+        self.time = 0
+        self.outputs = {c: c.output for c in board}
+        for c in board:
+            for driver in c.inputs.values():
+                if driver is not None and driver not in self.outputs:
+                    self.outputs[driver] = driver.output
+        # The output every component will have after all scheduled events
+        self._projected = dict(self.outputs)
+        self._readers = {c: board.readers(c) for c in board}
+        self._delays = {c: delays.get(c, default_delay(c)) for c in board}
+        # The truth table of every gate with the components it reads from in
+        # the order of its symbols, see Gate.lookup_table
+        self._tables = {}
+        for c in board:
+            if isinstance(c, logic_circuit.Gate):
+                symbols, table = c.lookup_table
+                if table is not None and\
+                        all(c.inputs[s] is not None for s in symbols):
+                    self._tables[c] = (tuple(c.inputs[s] for s in symbols),
+                                       table)
+
+        if watch is None:
+            watch = [c for c in board if isinstance(c, logic_circuit.Output)]
+        self._initial_outputs = {c: c.output for c in watch}
+        self.waveforms = {c: [] for c in watch}
+
+        self._wheel_mask = wheel_size - 1
+        self._wheel = [[] for _ in range(wheel_size)]
+        # Events that do not fit on the wheel as (time, order, component,
+        # output)
+        self._overflow = []
+        self._order = 0
+        self._pending = 0
+        self.events = 0
+        self.sinks = []
+
+    def _evaluate(self, component):
+        outputs = self.outputs
+        if component in self._tables:
+            drivers, table = self._tables[component]
+            index = 0
+            for driver in drivers:
+                output = outputs.get(driver)
+                if output is None:
+                    return None
+                index = index << 1 | output
+            return bool(table >> index & 1)
+        elif isinstance(component, logic_circuit.Gate):
+            return component.evaluate(outputs)
+        return None
+
+    def _schedule(self, component, output, time):
+        if time - self.time <= self._wheel_mask:
+            self._wheel[time & self._wheel_mask].append((component, output))
+        else:
+            heapq.heappush(self._overflow,
+                           (time, self._order, component, output))
+            self._order += 1
+        self._projected[component] = output
+        self._pending += 1
+
+    def subscribe(self, sink):
+        """
+        Adds a sink that is told about every change of an output.
+
+        sink.start(time, outputs) is called with the current time and the
+        outputs of all components, then sink.changes(time, changed) is called
+        for every time where outputs changed, changed maps the components
+        to their new outputs.
+        """
+        self.sinks.append(sink)
+        sink.start(self.time, dict(self.outputs))
+
+    def unsubscribe(self, sink):
+        self.sinks.remove(sink)
+
+    def set(self, component, output, time=None):
+        """
+        Schedules an input to change its output at a time.
+
+        The time defaults to the current time and cannot be in the past.
+        """
+        if time is None:
+            time = self.time
+        if time < self.time:
+            raise ValueError("Cannot change an input at {} before the current "
+                             "time {}".format(time, self.time))
+        self._schedule(component, bool(output), time)
+
+    def run(self, until=None):
+        """
+        Processes events until there are none left or until a time is reached.
+
+        Returns the number of events that were processed. Afterwards the time
+        is just after the last event that was processed.
+        """
+        wheel = self._wheel
+        mask = self._wheel_mask
+        outputs = self.outputs
+        projected = self._projected
+        readers = self._readers
+        delays = self._delays
+        waveforms = self.waveforms
+        overflow = self._overflow
+        sinks = self.sinks
+        events = 0
+
+        while self._pending:
+            if until is not None and self.time > until:
+                break
+            # Move the events that are now on the wheel from the overflow
+            while overflow and overflow[0][0] - self.time <= mask:
+                time, _, component, output = heapq.heappop(overflow)
+                wheel[time & mask].append((component, output))
+
+            bucket = wheel[self.time & mask]
+            # All changes at this time, for the sinks
+            step = {} if sinks else None
+            # Components with a delay of 0 add events to the current bucket
+            while bucket:
+                wheel[self.time & mask] = []
+                self._pending -= len(bucket)
+                events += len(bucket)
+                changed = {}
+                for component, output in bucket:
+                    if outputs.get(component) != output:
+                        outputs[component] = output
+                        changed[component] = None
+                        if component in waveforms:
+                            waveforms[component].append((self.time, output))
+                        if step is not None:
+                            step[component] = output
+                affected = {}
+                for component in changed:
+                    for reader in readers.get(component, ()):
+                        affected[reader] = None
+                for component in affected:
+                    output = self._evaluate(component)
+                    if output != projected.get(component):
+                        self._schedule(component, output,
+                                       self.time + delays[component])
+                bucket = wheel[self.time & mask]
+            if step:
+                for sink in sinks:
+                    sink.changes(self.time, step)
+
+            # Time goes on after the last event, so new inputs come after it
+            self.time += 1
+            if not self._pending:
+                break
+            if self._pending == len(overflow) and overflow[0][0] > self.time:
+                # Jump over the time where nothing happens
+                self.time = overflow[0][0]
+        self.events += events
+        return events
+
+    def transitions(self, component, since=0):
+        """
+        Returns the output of a watched component just before a time and its
+        changes from then on as a list of (time, output).
+        """
+        waveform = self.waveforms[component]
+        initial = self._initial_outputs[component]
+        for i, (time, output) in enumerate(waveform):
+            if time >= since:
+                return initial, waveform[i:]
+            initial = output
+        return initial, []
+
+    def settle_times(self, since=0):
+        """
+        Returns the time it took every watched component to settle after a
+        time, or None if it did not change.
+        """
+        times = {}
+        for component in self.waveforms:
+            _, changes = self.transitions(component, since)
+            times[component] = changes[-1][0] - since if changes else None
+        return times
+
+    def glitches(self, since=0):
+        """
+        Returns the pulses of every watched component after a time.
+
+        A pulse is a tuple (start, end, output) where the output changed and
+        changed back.
+        """
+        glitches = {}
+        for component in self.waveforms:
+            initial, changes = self.transitions(component, since)
+            pulses = []
+            previous = initial
+            for (start, output), (end, after) in zip(changes, changes[1:]):
+                if after == previous:
+                    pulses.append((start, end, output))
+                previous = output
+            glitches[component] = pulses
+        return glitches
+
+    def hazards(self, since=0):
+        """
+        Returns the hazard of every watched component after a time.
+
+        This is "static" if the output changed and ended where it started,
+        "dynamic" if it ended on the other output but changed more than once,
+        or None. It is only meaningful if only one input changed at the time.
+        """
+        hazards = {}
+        for component in self.waveforms:
+            initial, changes = self.transitions(component, since)
+            if len(changes) >= 2 and changes[-1][1] == initial:
+                hazards[component] = "static"
+            elif len(changes) >= 3:
+                hazards[component] = "dynamic"
+            else:
+                hazards[component] = None
+        return hazards
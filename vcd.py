@@ -0,0 +1,173 @@
+"""
+Value Change Dumps
+
+This module writes the outputs of circuit components over time to Value
+Change Dump (VCD) files, the format of IEEE 1364 that waveform viewers like
+GTKWave read. A VCDWriter is a sink of a timing_simulation.TimingSimulator:
+
+    simulator = TimingSimulator(board, watch=[])
+    with VCDWriter("run.vcd", board) as writer:
+        simulator.subscribe(writer)
+        simulator.run()
+
+Changes are written as they happen and are not kept, so runs of any length
+only need memory for the write buffer.
+"""
+from logic_circuit import Input, Output
+
+# The number of lines that are collected before they are written
+BUFFER_SIZE = 4096
+
+_VALUES = {False: "0", True: "1", None: "x"}
+
+
+def identifier(index):
+    """
+    Returns the short identifier of the signal with an index, made of the
+    printable ASCII characters from ! to ~.
+    """
+    characters = []
+    while True:
+        index, digit = divmod(index, 94)
+        characters.append(chr(33 + digit))
+        if not index:
+            return "".join(characters)
+        index -= 1
+
+
+class VCDWriter:
+
+    """
+    Writes the outputs of components of a circuit board to a VCD file.
+
+    file is a path or a file opened for writing text. names maps components
+    to the names of their signals, other components are named after their
+    class and their position on the board, like Gate12. signals selects the
+    components to write, by component or by name, and defaults to the
+    Inputs and Outputs of the board. timescale is the unit of time of the
+    simulation.
+    """
+
+    def __init__(self,
+                 file,
+                 board,
+                 signals=None,
+                 names={},
+                 timescale="1 ns",
+                 module="board",
+                 buffer_size=BUFFER_SIZE):
+        self._owns_file = isinstance(file, str)
+        self.file = open(file, "w") if self._owns_file else file
+        self.timescale = timescale
+        self.module = module
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._time = None
+        self._started = False
+
+        all_names = {}
+        by_name = {}
+        for i, c in enumerate(board):
+            name = names.get(c, "{}{}".format(c.__class__.__name__, i))
+            all_names[c] = name
+            by_name[name] = c
+        if signals is None:
+            signals = [c for c in board if isinstance(c, (Input, Output))]
+        components = []
+        for signal in signals:
+            if isinstance(signal, str):
+                if signal not in by_name:
+                    raise ValueError("There is no signal named {}"
+                                     .format(signal))
+                signal = by_name[signal]
+            elif signal not in all_names:
+                raise ValueError("{!r} is not on the board".format(signal))
+            components.append(signal)
+        components = list(dict.fromkeys(components))
+        # Maps the selected components to their identifiers
+        self.identifiers = {c: identifier(i)
+                            for i, c in enumerate(components)}
+        self.names = {c: all_names[c] for c in components}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write(self, line):
+        self._buffer.append(line)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered lines to the file.
+        """
+        if self._buffer:
+            self._buffer.append("")
+            self.file.write("\n".join(self._buffer))
+            self._buffer = []
+
+    def close(self):
+        """
+        Flushes the buffer and closes the file if the writer opened it.
+        """
+        self.flush()
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def start(self, time, outputs):
+        """
+        Writes the header and the outputs at the start time.
+
+        outputs maps components to their outputs, components that are not in
+        it are unknown.
+        """
+        if self._started:
+            raise ValueError("The VCD file has already been started")
+        self._started = True
+        write = self._write
+        write("$timescale {} $end".format(self.timescale))
+        write("$scope module {} $end".format(self.module))
+        for c, code in self.identifiers.items():
+            # Spaces would end the name
+            name = self.names[c].replace(" ", "_")
+            write("$var wire 1 {} {} $end".format(code, name))
+        write("$upscope $end")
+        write("$enddefinitions $end")
+        self._time = time
+        write("#{}".format(time))
+        write("$dumpvars")
+        for c, code in self.identifiers.items():
+            write(_VALUES[outputs.get(c)] + code)
+        write("$end")
+
+    def changes(self, time, changed):
+        """
+        Writes the new outputs of the components that changed at a time.
+
+        Times have to increase, changed maps components to their outputs.
+        """
+        if not self._started:
+            raise ValueError("start has to be called before changes")
+        identifiers = self.identifiers
+        if len(changed) <= len(identifiers):
+            lines = [_VALUES[output] + identifiers[c]
+                     for c, output in changed.items() if c in identifiers]
+        else:
+            lines = [_VALUES[changed[c]] + code
+                     for c, code in identifiers.items() if c in changed]
+        if not lines:
+            return
+        if time != self._time:
+            if time < self._time:
+                raise ValueError("Time {} is before the time {} of the last "
+                                 "change".format(time, self._time))
+            self._time = time
+            lines.insert(0, "#{}".format(time))
+        self._buffer.extend(lines)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()